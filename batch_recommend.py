@@ -0,0 +1,170 @@
+"""
+Offline batch recommendations.
+Streams queries from a JSONL file, answers them in large batches (one batched encode
+and index search per batch), optionally across a pool of worker processes, and
+streams results out in input order.
+
+Usage:
+    python batch_recommend.py queries.jsonl --output results.jsonl --csv video_game_reviews.csv --workers 4
+
+Input (one JSON object per line; "mood" and "filters" are optional):
+    {"id": "q1", "query": "relaxing farming game", "mood": "Chill", "filters": {"max_price": 20, "genre": "Simulation"}}
+Output (one line per input line, same order):
+    {"id": "q1", "query": "...", "mood": "Chill", "results": [{"name": "Stardew Valley", "score": 0.95}, ...]}
+
+Mood is passed through to the output; like get_recommendations, the ML engine
+does not use it for ranking. Filters are listed in catalog.CATEGORY_FILTERS / RANGE_FILTERS.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+
+# Recommender of the current worker process (see _init_worker)
+_recommender = None
+
+
+def _load_recommender(model_name, csv_path, embedding_dir):
+    from game_recommender import GameRecommender
+    recommender = GameRecommender(model_name=model_name, device='cpu', embedding_dir=embedding_dir)
+    recommender.initialize_model(csv_path)
+    return recommender
+
+
+def _init_worker(model_name, csv_path, embedding_dir, threads):
+    global _recommender
+    import torch
+    torch.set_num_threads(threads)
+    _recommender = _load_recommender(model_name, csv_path, embedding_dir)
+
+
+def answer_batch(recommender, lines, top_k=5, candidates=50):
+    """Turn a list of raw JSONL lines into output records, in the same order."""
+    records, queries, filters, positions = [], [], [], []
+    for line in lines:
+        try:
+            item = json.loads(line)
+            query = str(item['query'])
+            record = {'id': item.get('id'), 'query': query, 'mood': item.get('mood')}
+            if item.get('filters') is not None and not isinstance(item['filters'], dict):
+                record['error'] = "invalid filters: expected an object of name -> value"
+            else:
+                positions.append(len(records))
+                queries.append(query)
+                filters.append(item.get('filters'))
+        except (ValueError, KeyError, TypeError) as e:
+            record = {'error': f"invalid input line: {e}"}
+        records.append(record)
+
+    if queries:
+        try:
+            answers = recommender.batch_query(queries, top_k=top_k, candidates=candidates, filters=filters)
+        except ValueError:
+            # A bad filter fails the whole batch; retry one query at a time to isolate it
+            answers = []
+            for query, query_filters in zip(queries, filters):
+                try:
+                    answers.append(recommender.batch_query([query], top_k=top_k, candidates=candidates,
+                                                           filters=[query_filters])[0])
+                except ValueError as e:
+                    answers.append(e)
+        for position, answer in zip(positions, answers):
+            if isinstance(answer, Exception):
+                records[position]['error'] = str(answer)
+            else:
+                records[position]['results'] = [{'name': name, 'score': round(score, 4)} for name, score in answer]
+    return [json.dumps(record, ensure_ascii=False) for record in records]
+
+
+def _answer_in_worker(task):
+    lines, top_k, candidates = task
+    return answer_batch(_recommender, lines, top_k=top_k, candidates=candidates)
+
+
+def _read_batches(path, batch_size):
+    """Yield lists of non-empty lines without reading the whole file."""
+    batch = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                batch.append(line)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def run(input_path, output_path, csv_path=None, model_name='all-mpnet-base-v2', embedding_dir="embeddings",
+        top_k=5, candidates=50, batch_size=256, workers=1):
+    """
+    Answer every query in input_path and write results to output_path in input order.
+
+    Returns:
+        Number of queries processed
+    """
+    # Build (or load) the embeddings once, so workers only ever load them from disk
+    recommender = _load_recommender(model_name, csv_path, embedding_dir)
+    pool = None
+    if workers > 1:
+        del recommender
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = mp.get_context("spawn").Pool(workers, initializer=_init_worker,
+                                            initargs=(model_name, csv_path, embedding_dir, threads))
+
+    processed = 0
+    start = time.perf_counter()
+    last_report = start
+    with open(output_path, 'w', encoding='utf-8') as out:
+        def write(lines):
+            nonlocal processed, last_report
+            out.write("\n".join(lines) + "\n")
+            processed += len(lines)
+            now = time.perf_counter()
+            if now - last_report >= 10:
+                print(f"{processed:,} queries, {processed / (now - start):,.1f} queries/sec")
+                last_report = now
+
+        if pool is None:
+            for lines in _read_batches(input_path, batch_size):
+                write(answer_batch(recommender, lines, top_k=top_k, candidates=candidates))
+        else:
+            # Bounded window of in-flight batches: memory stays flat on huge inputs,
+            # and results are written in submission (= input) order
+            pending = deque()
+            for lines in _read_batches(input_path, batch_size):
+                pending.append(pool.apply_async(_answer_in_worker, ((lines, top_k, candidates),)))
+                if len(pending) >= 2 * workers:
+                    write(pending.popleft().get())
+            while pending:
+                write(pending.popleft().get())
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {processed:,} queries in {elapsed:.1f}s ({processed / max(elapsed, 1e-9):,.1f} queries/sec) -> {output_path}")
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch game recommendations: JSONL in, JSONL out.")
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("--output", required=True, help="JSONL file for the results")
+    parser.add_argument("--csv", default=None, help="catalog CSV (defaults to the built-in sample data)")
+    parser.add_argument("--model", default='all-mpnet-base-v2')
+    parser.add_argument("--embedding-dir", default="embeddings")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=256, help="queries encoded and searched together")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, each with its own model and index")
+    args = parser.parse_args()
+
+    run(args.input, args.output, csv_path=args.csv, model_name=args.model, embedding_dir=args.embedding_dir,
+        top_k=args.top_k, candidates=args.candidates, batch_size=args.batch_size, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
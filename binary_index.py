@@ -0,0 +1,137 @@
+"""
+Two-stage binary-code index.
+Stores one sign bit per embedding dimension (96 bytes per game for a 768-dim model
+instead of 3 KB of float32), finds candidates by Hamming distance with a packed-bit
+popcount, and re-scores only the top candidates against the full-precision vectors,
+which stay memory-mapped on disk.
+
+Usage (benchmark):
+    python binary_index.py --embeddings embeddings/game_embeddings.npy --rerank 100 200 400 --queries 1000 --k 10
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+# Candidates re-scored with full-precision vectors per query
+DEFAULT_RERANK = 200
+# Shallower re-scoring for requests running out of time
+COARSE_RERANK = DEFAULT_RERANK // 4
+
+
+def binary_codes(vectors):
+    """Sign bits of each row, packed into uint64 words (padded to a multiple of 64 bits)."""
+    bits = np.packbits(np.asarray(vectors) > 0, axis=1)
+    padding = -bits.shape[1] % 8
+    if padding:
+        bits = np.pad(bits, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(bits).view(np.uint64)
+
+
+def memory_per_million(dim):
+    """Bytes per million games for binary codes vs a float32 flat index."""
+    code_bytes = -(-dim // 64) * 8
+    return {'binary_codes_mb': code_bytes * 1e6 / 2**20, 'float32_mb': dim * 4 * 1e6 / 2**20}
+
+
+class BinaryPrefilterIndex:
+    """
+    Hamming-distance prefilter over sign-bit codes with exact inner-product re-scoring.
+
+    search() has the FAISS shape: (scores, ids) arrays of (num_queries, k), ids -1
+    where fewer than k games exist.
+    """
+    def __init__(self, embeddings_path, rerank=DEFAULT_RERANK, block_size=65536):
+        """
+        Args:
+            embeddings_path: Saved .npy matrix of normalized game embeddings
+            rerank: Candidates per query re-scored against the full-precision vectors
+            block_size: Rows encoded at a time while building the codes
+        """
+        self.embeddings = np.load(embeddings_path, mmap_mode='r')
+        self.rerank = rerank
+        self.codes = np.vstack([binary_codes(self.embeddings[start:start + block_size])
+                                for start in range(0, len(self.embeddings), block_size)])
+        print(f"Binary codes built: {self.codes.nbytes / 2**20:.1f} MB for {self.ntotal:,} games "
+              f"({self.codes.shape[1] * 8} bytes each)")
+
+    @property
+    def ntotal(self):
+        return len(self.codes)
+
+    def hamming_candidates(self, query, depth):
+        """Row ids of the `depth` codes closest to the query's code."""
+        distances = np.bitwise_count(self.codes ^ binary_codes(query[None, :])).sum(axis=1)
+        if depth >= len(distances):
+            return np.arange(len(distances))
+        return np.argpartition(distances, depth - 1)[:depth]
+
+    def search(self, queries, k, rerank=None):
+        """Top-k (scores, ids) per query: Hamming prefilter, then exact re-scoring (rerank overrides self.rerank)."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        rerank = self.rerank if rerank is None else rerank
+        k = min(k, self.ntotal)
+        D = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        I = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, query in enumerate(queries):
+            candidates = np.sort(self.hamming_candidates(query, max(rerank, k)))
+            scores = np.asarray(self.embeddings[candidates], dtype=np.float32) @ query
+            top = np.argsort(-scores, kind='stable')[:k]
+            D[row, :len(top)] = scores[top]
+            I[row, :len(top)] = candidates[top]
+        return D, I
+
+
+def benchmark(embeddings_path, rerank_depths, num_queries=1000, k=10):
+    """Recall@k against an exact IndexFlatIP and per-query latency for each re-rank depth."""
+    import faiss
+    embeddings = np.load(embeddings_path, mmap_mode='r')
+    rng = np.random.default_rng(0)
+    queries = np.asarray(embeddings[rng.integers(0, len(embeddings), num_queries)], dtype=np.float32)
+    queries += rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact = faiss.IndexFlatIP(embeddings.shape[1])
+    exact.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    index = BinaryPrefilterIndex(embeddings_path)
+    for rerank in rerank_depths:
+        index.rerank = rerank
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            _, ids = index.search(query[None, :], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(np.intersect1d(ids[0], expected))
+        rows.append({
+            'rerank': rerank,
+            'recall': hits / truth.size,
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+        })
+    return rows, memory_per_million(embeddings.shape[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and latency of the binary-code prefilter vs exact search.")
+    parser.add_argument("--embeddings", default=os.path.join("embeddings", "game_embeddings.npy"))
+    parser.add_argument("--rerank", nargs="+", type=int, default=[100, 200, 400])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rows, memory = benchmark(args.embeddings, args.rerank, num_queries=args.queries, k=args.k)
+    print(f"\nMemory per million games: {memory['binary_codes_mb']:,.0f} MB binary codes "
+          f"vs {memory['float32_mb']:,.0f} MB float32 (IndexFlatIP)")
+    print(f"\n{'rerank':>8} | {f'recall@{args.k}':>10} | {'p50_ms':>10} | {'p99_ms':>10}")
+    print("-" * 48)
+    for row in rows:
+        print(f"{row['rerank']:>8} | {row['recall']:>10.3f} | {row['p50_ms']:>10.3f} | {row['p99_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
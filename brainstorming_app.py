@@ -4,10 +4,17 @@ Interactive AI that helps users discover and explore new gaming possibilities.
 """
 
 import gradio as gr
-from recommendation import get_recommendations, format_recommendations
+from recommendation import get_recommendations_response, format_recommendations, record_feedback, precompute_canned_answers, cache_stats, serving_stats
+from intent_engine import match_intents
+from worker_pool import BUSY_MESSAGE, GRADIO_QUEUE_KWARGS, QueueFullError, get_engine_pool
+from deadlines import LATENCY_BUDGET_MS
 import re
 import random
 
+# MMR lambda for brainstorming results (1.0 = pure relevance, lower = more varied games)
+BRAINSTORM_DIVERSITY = 0.7
+EXPLORATORY_DIVERSITY = 0.5
+
 # Custom CSS for a creative, brainstorming-focused design
 custom_css = """
 .gradio-container {
@@ -241,48 +248,14 @@ I'm your creative gaming companion, here to help you **discover**, **explore**,
 
 def analyze_creative_intent(text):
     """Analyze user input for creative brainstorming opportunities."""
-    text_lower = text.lower()
-    
-    # Creative exploration indicators
-    creative_indicators = {
-        'discovery': ['discover', 'explore', 'new', 'never tried', 'unfamiliar', 'unknown', 'curious', 'wonder'],
-        'learning': ['learn', 'teach', 'education', 'skill', 'improve', 'develop', 'master', 'understand'],
-        'social': ['friends', 'together', 'social', 'multiplayer', 'co-op', 'party', 'group', 'team'],
-        'creative': ['creative', 'build', 'design', 'art', 'craft', 'create', 'imagine', 'invent'],
-        'challenge': ['challenge', 'difficult', 'hard', 'complex', 'advanced', 'expert', 'master'],
-        'relaxation': ['relax', 'calm', 'peaceful', 'zen', 'meditation', 'stress', 'unwind', 'chill'],
-        'adventure': ['adventure', 'explore', 'journey', 'quest', 'discover', 'world', 'travel'],
-        'story': ['story', 'narrative', 'plot', 'characters', 'drama', 'cinematic', 'emotional'],
-        'puzzle': ['puzzle', 'brain', 'think', 'logic', 'problem', 'solve', 'mystery'],
-        'action': ['action', 'fast', 'intense', 'thrilling', 'exciting', 'adrenaline', 'rush']
-    }
-    
-    detected_themes = []
-    for theme, keywords in creative_indicators.items():
-        if any(keyword in text_lower for keyword in keywords):
-            detected_themes.append(theme)
-    
-    # Mood analysis
-    mood_indicators = {
-        'excited': ['excited', 'pumped', 'thrilled', 'energetic', 'hyped', 'ready'],
-        'curious': ['curious', 'wonder', 'interested', 'intrigued', 'fascinated'],
-        'bored': ['bored', 'tired', 'stuck', 'uninspired', 'routine'],
-        'stressed': ['stressed', 'overwhelmed', 'anxious', 'tense', 'pressure'],
-        'creative': ['creative', 'inspired', 'artistic', 'imaginative', 'innovative'],
-        'adventurous': ['adventurous', 'bold', 'daring', 'brave', 'explorer']
-    }
-    
-    detected_mood = 'any'
-    for mood, keywords in mood_indicators.items():
-        if any(keyword in text_lower for keyword in keywords):
-            detected_mood = mood
-            break
+    # One pass over the text covers every keyword table (cached per text)
+    matches = match_intents(text)
     
     return {
-        'themes': detected_themes,
-        'mood': detected_mood,
+        'themes': matches.all('creative_theme'),
+        'mood': matches.first('creative_mood', 'any'),
         'original_text': text,
-        'is_exploratory': any(word in text_lower for word in ['explore', 'discover', 'new', 'try', 'brainstorm', 'ideas'])
+        'is_exploratory': matches.has('exploratory')
     }
 
 def generate_brainstorming_prompts(intent_analysis):
@@ -355,7 +328,7 @@ def generate_brainstorming_prompts(intent_analysis):
     
     return random.sample(prompts, min(3, len(prompts)))
 
-def generate_brainstorming_response(intent_analysis, recommendations, explanation):
+def generate_brainstorming_response(intent_analysis, recommendations, explanation, formatted_recs=None):
     """Generate a creative, brainstorming-focused response."""
     themes = intent_analysis['themes']
     mood = intent_analysis['mood']
@@ -383,7 +356,9 @@ def generate_brainstorming_response(intent_analysis, recommendations, explanatio
         response += f"**I can see you're interested in:** {theme_text.title()}\n\n"
     
     # Add the recommendations
-    response += f"**Here are some games that might spark your imagination:**\n\n{format_recommendations(recommendations)}"
+    if formatted_recs is None:
+        formatted_recs = format_recommendations(recommendations)
+    response += f"**Here are some games that might spark your imagination:**\n\n{formatted_recs}"
     
     # Add brainstorming prompts
     if prompts:
@@ -404,43 +379,69 @@ def generate_brainstorming_response(intent_analysis, recommendations, explanatio
     
     return response
 
-def get_brainstorming_recommendations(user_input, mood):
-    """Get creative, brainstorming-focused recommendations."""
+def get_brainstorming_diversity(intent_analysis):
+    """MMR lambda for a request: exploratory requests get more varied results."""
+    return EXPLORATORY_DIVERSITY if intent_analysis['is_exploratory'] else BRAINSTORM_DIVERSITY
+
+def get_brainstorming_recommendations(user_input, mood, session_id=None):
+    """
+    Get creative, brainstorming-focused recommendations.
+    Returns the response text and the recommendations shown.
+    """
     # Analyze the user's creative intent
     intent_analysis = analyze_creative_intent(user_input)
     
-    # Get recommendations
-    recommendations, explanation = get_recommendations(user_input, mood)
+    # Get diverse recommendations (MMR) - exploratory requests lean further towards variety
+    diversity = get_brainstorming_diversity(intent_analysis)
+    recommendations, explanation, formatted_recs, _ = get_recommendations_response(user_input, mood, diversity=diversity,
+                                                                                   session_id=session_id,
+                                                                                   budget_ms=LATENCY_BUDGET_MS)
     
     # Generate brainstorming response
     if recommendations:
-        response = generate_brainstorming_response(intent_analysis, recommendations, explanation)
+        response = generate_brainstorming_response(intent_analysis, recommendations, explanation, formatted_recs)
     else:
         response = f"🧠 **Let's brainstorm together!**\n\nI can see you're looking for something, but I need a bit more to spark some creative ideas!\n\n**💭 Try asking me things like:**\n• \"I want to discover games I've never heard of\"\n• \"I'm curious about games that could teach me something\"\n• \"I want to explore genres I've never tried\"\n• \"I'm looking for games that could inspire my creativity\"\n• \"I want to find games that could surprise me\"\n\n**🎯 The more specific you are about what you're curious about, the better I can help you brainstorm!**"
     
-    return response
+    return response, recommendations
+
+# Brainstorming starters shown as clickable suggestions; answers are precomputed at startup
+BRAINSTORMING_SUGGESTIONS = [
+    "I want to discover games I've never heard of",
+    "I'm curious about games that could teach me something",
+    "I want to explore genres I've never tried",
+    "I'm looking for games that could inspire my creativity",
+    "I want to find games that could surprise me",
+    "I'm interested in games that could help me relax in a unique way",
+    "I want to discover games that my friends and I could enjoy together",
+    "I'm looking for games that could challenge my creativity",
+    "I want to find games that could transport me to different worlds",
+    "I'm curious about games that combine different genres",
+    "I want to explore indie games that big studios don't make",
+    "I'm interested in games that could build communities"
+]
+
+MOOD_CHOICES = ["Any", "Excited", "Curious", "Creative", "Bored", "Stressed", "Adventurous"]
 
 def get_brainstorming_suggestions():
     """Generate dynamic brainstorming conversation starters."""
-    suggestions = [
-        "I want to discover games I've never heard of",
-        "I'm curious about games that could teach me something",
-        "I want to explore genres I've never tried",
-        "I'm looking for games that could inspire my creativity",
-        "I want to find games that could surprise me",
-        "I'm interested in games that could help me relax in a unique way",
-        "I want to discover games that my friends and I could enjoy together",
-        "I'm looking for games that could challenge my creativity",
-        "I want to find games that could transport me to different worlds",
-        "I'm curious about games that combine different genres",
-        "I want to explore indie games that big studios don't make",
-        "I'm interested in games that could build communities"
-    ]
-    return random.sample(suggestions, 6)
+    return random.sample(BRAINSTORMING_SUGGESTIONS, 6)
+
+def precompute_suggestion_answers():
+    """Precompute answers for every brainstorming suggestion, each with its own diversity."""
+    by_diversity = {}
+    for suggestion in BRAINSTORMING_SUGGESTIONS:
+        diversity = get_brainstorming_diversity(analyze_creative_intent(suggestion))
+        by_diversity.setdefault(diversity, []).append(suggestion)
+    for diversity, prompts in by_diversity.items():
+        precompute_canned_answers(prompts, MOOD_CHOICES, diversity=diversity)
 
 def main():
     """Create and launch the brainstorming Gradio interface."""
     
+    # Answer every suggestion ahead of time so clicks never hit the model
+    precompute_suggestion_answers()
+    
     with gr.Blocks(css=custom_css, title="GameBot Brainstorming - Creative Gaming Discovery") as demo:
         
         # Header section
@@ -461,7 +462,7 @@ def main():
                 
                 # Mood selector
                 mood_selector = gr.Dropdown(
-                    choices=["Any", "Excited", "Curious", "Creative", "Bored", "Stressed", "Adventurous"],
+                    choices=MOOD_CHOICES,
                     value="Any",
                     label="🎭 What's your creative mood today?",
                     info="This helps me tailor my brainstorming approach to your energy!"
@@ -505,6 +506,14 @@ def main():
                     elem_classes=["output-section"]
                 )
                 
+                # Feedback for session personalization
+                liked_games = gr.Dropdown(
+                    choices=[],
+                    value=None,
+                    label="❤️ Which idea sparked your interest?",
+                    info="I'll steer your next brainstorm towards it and keep the ideas fresh"
+                )
+                
                 gr.HTML('</div>')
         
         # Information panel
@@ -521,33 +530,68 @@ def main():
                 </div>
                 """)
         
+        # Engine load (queue depth, wait times, rejections), cache hit rates and serving modes
+        with gr.Accordion("📊 Server load", open=False):
+            load_stats = gr.JSON(label="Engine pool")
+            cache_stats_json = gr.JSON(label="Caches")
+            serving_stats_json = gr.JSON(label="Serving modes")
+            refresh_stats_btn = gr.Button("🔄 Refresh", variant="secondary", elem_classes=["btn-secondary"])
+        
         # Event handlers
-        def process_brainstorming_request(input_text, mood):
+        async def process_brainstorming_request(input_text, mood, request: gr.Request):
             if not input_text.strip():
-                return create_brainstorming_welcome()
-            return get_brainstorming_recommendations(input_text, mood)
+                return create_brainstorming_welcome(), gr.update(choices=[], value=None)
+            try:
+                # Engine work runs in the shared bounded pool, not on the event loop
+                response, recommendations = await get_engine_pool().run(
+                    get_brainstorming_recommendations, input_text, mood, session_id=request.session_hash)
+            except QueueFullError:
+                return BUSY_MESSAGE, gr.update(choices=[], value=None)
+            return response, gr.update(choices=[game['name'] for game in recommendations], value=None)
+        
+        async def record_like(game_name, request: gr.Request):
+            if game_name:
+                try:
+                    await get_engine_pool().run(record_feedback, request.session_hash, [game_name])
+                except QueueFullError:
+                    pass  # Feedback is best-effort under load
         
         def clear_conversation():
-            return create_brainstorming_welcome()
+            return create_brainstorming_welcome(), gr.update(choices=[], value=None)
         
         # Connect the interface
         brainstorm_btn.click(
             process_brainstorming_request, 
             inputs=[user_input, mood_selector], 
-            outputs=output_text
+            outputs=[output_text, liked_games]
         )
         
         user_input.submit(
             process_brainstorming_request, 
             inputs=[user_input, mood_selector], 
-            outputs=output_text
+            outputs=[output_text, liked_games]
+        )
+        
+        liked_games.input(
+            record_like,
+            inputs=liked_games,
+            outputs=None
         )
         
         clear_btn.click(
             clear_conversation, 
             inputs=None, 
-            outputs=output_text
+            outputs=[output_text, liked_games]
         )
+
+        refresh_stats_btn.click(
+            lambda: (get_engine_pool().stats(), cache_stats(), serving_stats()),
+            inputs=None,
+            outputs=[load_stats, cache_stats_json, serving_stats_json]
+        )
+    
+    # Bounded Gradio queue; engine work is rejected fast once the pool is full
+    demo.queue(**GRADIO_QUEUE_KWARGS)
     
     # Launch the interface
     demo.launch(
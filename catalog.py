@@ -0,0 +1,165 @@
+"""
+Compact columnar catalog representation.
+Stores the serving catalog as categorical codes, Arrow-backed strings and small
+numeric arrays instead of Python object columns, with a memory report.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = "string"
+    print("⚠️ pyarrow not available, text columns will use pandas' Python string dtype")
+
+# Free-text columns, always stored as strings
+TEXT_COLUMNS = ('User Review Text',)
+
+# Columns that must be numeric for serving (re-ranking, display)
+NUMERIC_COLUMNS = ('User Rating', 'Price')
+
+# Object columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+# Filter name -> column matched case-insensitively against one value or a list of values
+CATEGORY_FILTERS = {'genre': 'Genre', 'platform': 'Platform', 'age_group': 'Age Group Targeted'}
+
+# Filter name -> (column, keep rows where column <= value (True) or >= value (False))
+RANGE_FILTERS = {'max_price': ('Price', True), 'min_rating': ('User Rating', False)}
+
+
+def compact_catalog(df, verbose=True):
+    """
+    Convert a preprocessed catalog DataFrame into a compact columnar one.
+
+    - Numeric columns (and User Rating / Price, even if they hold 'Unknown')
+      become float32 / downcast integer arrays
+    - Low-cardinality object columns (genre, age group, platform, repeated titles...)
+      become categorical codes
+    - Free text becomes Arrow-backed strings
+
+    Returns:
+        New compact DataFrame; the input is left unchanged
+    """
+    compact = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for col in df.columns:
+        # Positional: chunks of a streamed CSV keep their row offsets as index
+        values = df[col].reset_index(drop=True)
+        if col in NUMERIC_COLUMNS:
+            compact[col] = pd.to_numeric(values, errors='coerce').astype(np.float32)
+        elif pd.api.types.is_float_dtype(values):
+            compact[col] = values.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(values):
+            compact[col] = pd.to_numeric(values, downcast='integer')
+        elif pd.api.types.is_bool_dtype(values):
+            compact[col] = values
+        elif col not in TEXT_COLUMNS and values.nunique() <= CATEGORY_MAX_RATIO * max(len(values), 1):
+            compact[col] = values.astype(str).astype('category')
+        else:
+            compact[col] = values.astype(str).astype(TEXT_DTYPE)
+
+    if verbose:
+        before = df.memory_usage(deep=True).sum()
+        after = compact.memory_usage(deep=True).sum()
+        print(f"Compact catalog: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB "
+              f"({before / max(after, 1):.1f}x smaller)")
+    return compact
+
+
+def concat_compact(frames, verbose=True):
+    """
+    Concatenate compact catalog chunks (see compact_catalog), e.g. from a streamed CSV,
+    without expanding them back to Python objects: categorical columns are merged with
+    union_categoricals, numeric ones stay float32/downcast, and a column compacted
+    differently across chunks falls back to Arrow-backed strings.
+    """
+    if not frames:
+        return pd.DataFrame()
+    compact = pd.DataFrame(index=pd.RangeIndex(sum(len(frame) for frame in frames)))
+    for col in frames[0].columns:
+        parts = [frame[col] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            compact[col] = pd.api.types.union_categoricals([part.array for part in parts], ignore_order=True)
+        elif all(pd.api.types.is_numeric_dtype(part) or pd.api.types.is_bool_dtype(part) for part in parts):
+            compact[col] = pd.concat(parts, ignore_index=True).to_numpy()
+        else:
+            compact[col] = pd.concat([part.astype(str).astype(TEXT_DTYPE) for part in parts], ignore_index=True).array
+
+    if verbose:
+        print(f"Compact catalog: {compact.memory_usage(deep=True).sum() / 1e6:.1f} MB "
+              f"from {len(frames)} chunks")
+    return compact
+
+
+def filter_mask(df, filters):
+    """
+    Boolean mask of catalog rows matching all filters, e.g.
+    {"genre": "RPG", "platform": ["PC", "Nintendo Switch"], "max_price": 20, "min_rating": 8}.
+    Raises ValueError for malformed or unknown filters, or columns this catalog does not have.
+    """
+    if filters is not None and not isinstance(filters, dict):
+        raise ValueError(f"Filters must be an object of name -> value, got {type(filters).__name__}")
+    mask = np.ones(len(df), dtype=bool)
+    for name, value in (filters or {}).items():
+        if name in CATEGORY_FILTERS:
+            column = CATEGORY_FILTERS[name]
+            if column not in df.columns:
+                raise ValueError(f"Catalog has no '{column}' column for filter '{name}'")
+            wanted = {str(v).strip().lower() for v in (value if isinstance(value, (list, tuple)) else [value])}
+            values = df[column].astype(str).str.strip().str.lower()
+            mask &= values.isin(wanted).to_numpy()
+        elif name in RANGE_FILTERS:
+            column, upper = RANGE_FILTERS[name]
+            if column not in df.columns:
+                raise ValueError(f"Catalog has no '{column}' column for filter '{name}'")
+            try:
+                limit = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Filter '{name}' needs a number, got {value!r}")
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy()
+            mask &= (values <= limit) if upper else (values >= limit)
+        else:
+            raise ValueError(f"Unknown filter '{name}'")
+    return mask
+
+
+def memory_report(original, compact):
+    """
+    Compare per-column memory of the original and compact catalogs.
+
+    Returns:
+        DataFrame with dtype and bytes per column, plus a TOTAL row
+    """
+    before = original.memory_usage(deep=True, index=False)
+    after = compact.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'original_dtype': original.dtypes.astype(str),
+        'compact_dtype': compact.dtypes.astype(str),
+        'original_bytes': before,
+        'compact_bytes': after,
+    })
+    report.loc['TOTAL'] = ['', '', before.sum(), after.sum()]
+    report['ratio'] = report['original_bytes'] / report['compact_bytes'].clip(lower=1)
+    return report
+
+
+def main(csv_path):
+    """Print a memory report for a catalog CSV, preprocessed the same way as serving."""
+    df = pd.read_csv(csv_path)
+    if 'User Review Text' in df.columns:
+        df['User Review Text'] = df['User Review Text'].fillna('').str.lower().str.replace(r'[^a-zA-Z0-9\s]', '', regex=True)
+    df = df.fillna('Unknown')
+    compact = compact_catalog(df)
+    with pd.option_context('display.width', 200, 'display.max_columns', 10):
+        print(memory_report(df, compact))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python catalog.py <video_game_reviews.csv>")
+        sys.exit(1)
+    main(sys.argv[1])
@@ -0,0 +1,63 @@
+"""
+Deadline-aware serving.
+Requests carry a latency budget; as it runs out, cheaper query modes are used
+(no re-ranking, a coarser search, BM25 only, then the placeholder rankings).
+Recent latencies of each mode decide which ones still fit in the time left.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Query modes from most to least complete; "fallback" is answered from GAME_DATABASE rankings
+SERVING_MODES = ('full', 'no_rerank', 'coarse', 'lexical', 'fallback')
+
+# Default budget per request, including time spent waiting in the engine queue (override via environment)
+LATENCY_BUDGET_MS = float(os.environ.get("GAMEBOT_LATENCY_BUDGET_MS", 1500))
+
+
+class LatencyModel:
+    """
+    Recent latencies per query mode, used to pick the most complete mode that
+    is expected to finish before a deadline.
+
+    A mode with no recent samples is assumed to be free, so modes skipped while
+    the box was saturated are tried again once their samples age out.
+    """
+    def __init__(self, percentile=90, window=200, max_age_seconds=60):
+        """
+        Args:
+            percentile: Latency percentile used as a mode's expected cost
+            window: Samples kept per mode
+            max_age_seconds: Samples older than this are ignored
+        """
+        self.percentile = percentile
+        self.max_age_seconds = max_age_seconds
+        self._samples = {mode: deque(maxlen=window) for mode in SERVING_MODES}
+        self._lock = threading.Lock()
+
+    def record(self, mode, seconds):
+        """Add one observed latency for a mode."""
+        with self._lock:
+            self._samples[mode].append((time.perf_counter(), seconds))
+
+    def estimate(self, mode):
+        """Expected latency of a mode in seconds (0.0 without recent samples)."""
+        cutoff = time.perf_counter() - self.max_age_seconds
+        with self._lock:
+            recent = [seconds for recorded, seconds in self._samples[mode] if recorded >= cutoff]
+        return float(np.percentile(recent, self.percentile)) if recent else 0.0
+
+    def choose(self, remaining, modes=SERVING_MODES[:-1]):
+        """First of `modes` expected to finish within `remaining` seconds, else "fallback"."""
+        for mode in modes:
+            if remaining > 0 and self.estimate(mode) <= remaining:
+                return mode
+        return 'fallback'
+
+    def stats(self):
+        """Expected latency of every mode, in ms."""
+        return {mode: self.estimate(mode) * 1000 for mode in SERVING_MODES}
@@ -0,0 +1,440 @@
+"""
+Length-bucketed catalog encoding.
+Sorts texts by token length, batches similar lengths together with a batch size chosen
+per batch under a token budget, and restores the original order afterwards, so
+batches carry little padding. Long runs are checkpointed in shards and resumable,
+and shards can be encoded in parallel by a pool of worker processes.
+
+Usage (benchmark, source order vs bucketed):
+    python encoding.py --csv video_game_reviews.csv --sample 2000
+Usage (scaling benchmark over worker processes):
+    python encoding.py --csv video_game_reviews.csv --sample 20000 --workers 1 2 4 8
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import shutil
+import time
+
+import numpy as np
+
+DEFAULT_TOKEN_BUDGET = 8192
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_SHARD_SIZE = 10000
+MANIFEST_FILE = "manifest.json"
+# Written next to a finished embeddings file: which catalog texts (and model) it encodes
+META_SUFFIX = ".meta.json"
+
+
+def token_lengths(model, texts):
+    """Token count of every text as the model will see it (truncated to max_seq_length)."""
+    max_length = getattr(model, 'max_seq_length', None) or 512
+    tokenizer = getattr(model, 'tokenizer', None)
+    if tokenizer is not None:
+        ids = tokenizer(list(texts), add_special_tokens=True, truncation=False, verbose=False)['input_ids']
+        lengths = np.fromiter((len(row) for row in ids), dtype=np.int64, count=len(texts))
+    else:
+        # Rough estimate when the model exposes no tokenizer
+        lengths = np.fromiter((int(len(str(text).split()) * 1.3) + 2 for text in texts), dtype=np.int64, count=len(texts))
+    return np.minimum(lengths, max_length)
+
+
+def plan_batches(lengths, token_budget=DEFAULT_TOKEN_BUDGET, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """
+    Split texts into length-sorted batches whose padded size stays under token_budget.
+
+    Longest texts come first, so a batch that does not fit in memory fails right away.
+
+    Returns:
+        List of index arrays into the original texts
+    """
+    order = np.argsort(-lengths, kind='stable')
+    batches = []
+    start = 0
+    while start < len(order):
+        longest = max(1, int(lengths[order[start]]))
+        size = max(1, min(max_batch_size, token_budget // longest))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+def padding_efficiency(lengths, batches):
+    """Share of encoded positions that are real tokens rather than padding."""
+    real = int(lengths.sum())
+    padded = sum(int(lengths[batch].max()) * len(batch) for batch in batches if len(batch))
+    return real / padded if padded else 1.0
+
+
+def encode_texts(model, texts, token_budget=DEFAULT_TOKEN_BUDGET, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 show_progress=True):
+    """
+    Encode texts in length-bucketed batches and return embeddings in the input order.
+
+    Args:
+        model: SentenceTransformer
+        texts: List of strings
+        token_budget: Max padded tokens per batch (batch size x longest text)
+        max_batch_size: Upper bound on texts per batch, for very short texts
+        show_progress: Print progress and the final tokens/sec
+
+    Returns:
+        (len(texts), dim) embedding matrix
+    """
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+    start_time = time.perf_counter()
+    lengths = token_lengths(model, texts)
+    batches = plan_batches(lengths, token_budget, max_batch_size)
+
+    embeddings = None
+    done = 0
+    for number, batch in enumerate(batches, 1):
+        vectors = model.encode([texts[i] for i in batch], convert_to_tensor=False,
+                               batch_size=len(batch), show_progress_bar=False)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if embeddings is None:
+            embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        # Scatter back to the original positions
+        embeddings[batch] = vectors
+        done += len(batch)
+        if show_progress and (number % 50 == 0 or number == len(batches)):
+            print(f"Encoded {done}/{len(texts)} texts")
+
+    if show_progress:
+        elapsed = time.perf_counter() - start_time
+        print(f"Encoding: {int(lengths.sum()) / elapsed:,.0f} tokens/sec over {len(batches)} batches "
+              f"({padding_efficiency(lengths, batches):.0%} of positions are real tokens)")
+    return embeddings
+
+
+def fingerprint_texts(texts, digest=None):
+    """
+    Hash of the texts, so a checkpoint or saved matrix is only reused for the same
+    catalog. Pass the same hashlib digest for every chunk to hash a stream.
+    """
+    digest = digest if digest is not None else hashlib.sha1()
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def save_embeddings_meta(output_path, fingerprint, num_texts, dim, model_name=None):
+    """Record which catalog (and model) a finished embeddings file was encoded from."""
+    _write_json(output_path + META_SUFFIX, {'fingerprint': fingerprint, 'num_texts': num_texts,
+                                            'dim': dim, 'model': model_name})
+
+
+def read_embeddings_meta(output_path):
+    """Metadata saved with an embeddings file (see save_embeddings_meta), or None without any."""
+    if not os.path.exists(output_path + META_SUFFIX):
+        return None
+    with open(output_path + META_SUFFIX, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def meta_matches(meta, fingerprint, num_texts, model_name=None):
+    """Whether saved metadata describes embeddings of this catalog (and model)."""
+    return ((meta.get('fingerprint'), meta.get('num_texts')) == (fingerprint, num_texts)
+            and (model_name is None or meta.get('model') in (None, model_name)))
+
+
+def load_encoded(output_path, texts, model_name=None):
+    """
+    Saved embeddings for exactly these texts, or None if the file is missing or was
+    encoded from a different catalog or model. Files saved without metadata are
+    accepted when their row count matches.
+    """
+    if not os.path.exists(output_path):
+        return None
+    meta = read_embeddings_meta(output_path)
+    if meta is None:
+        if len(np.load(output_path, mmap_mode='r')) != len(texts):
+            return None
+    elif not meta_matches(meta, fingerprint_texts(texts), len(texts), model_name):
+        return None
+    return np.load(output_path)
+
+
+def _write_json(path, data):
+    """Write JSON via a temporary file and rename, so a crash never leaves it half-written."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _shard_path(checkpoint_dir, shard):
+    return os.path.join(checkpoint_dir, f"shard_{shard:05d}.npy")
+
+
+def _normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _encode_task(model, task):
+    shard, texts, normalize_rows, token_budget, max_batch_size = task
+    vectors = encode_texts(model, texts, token_budget=token_budget, max_batch_size=max_batch_size,
+                           show_progress=False)
+    return shard, _normalize_rows(vectors) if normalize_rows else vectors
+
+
+# Model of the current pool worker process (see EncoderPool)
+_worker_model = None
+
+
+def _init_encoder_worker(model_name, threads):
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name, device='cpu')
+
+
+def _encode_in_worker(task):
+    return _encode_task(_worker_model, task)
+
+
+class EncoderPool:
+    """
+    Worker processes that each load their own copy of the model and encode whole shards.
+
+    Every worker is pinned to threads_per_worker torch threads (by default the cores
+    divided evenly), so workers do not oversubscribe the CPU. Each worker holds a full
+    model copy in memory.
+    """
+    def __init__(self, model_name, workers=None, threads_per_worker=None):
+        cores = os.cpu_count() or 1
+        self.workers = workers or cores
+        self.threads_per_worker = threads_per_worker or max(1, cores // self.workers)
+        # spawn, not fork: forking a process that already runs torch threads can deadlock
+        self._pool = mp.get_context("spawn").Pool(self.workers, initializer=_init_encoder_worker,
+                                                  initargs=(model_name, self.threads_per_worker))
+        print(f"Encoder pool: {self.workers} workers x {self.threads_per_worker} threads")
+
+    def imap_unordered(self, tasks):
+        """Encode tasks, yielding (shard, vectors) as workers finish them."""
+        return self._pool.imap_unordered(_encode_in_worker, tasks)
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pool_shard_size(num_texts, workers, shard_size=DEFAULT_SHARD_SIZE, shards_per_worker=4):
+    """
+    Shard size for a parallel encode: capped so every worker gets about
+    shards_per_worker shards, which keeps all workers busy on small catalogs and
+    evens out the last, shorter shard.
+    """
+    return max(1, min(shard_size, -(-num_texts // (workers * shards_per_worker))))
+
+
+def encode_checkpointed(model, texts, output_path, shard_size=DEFAULT_SHARD_SIZE, checkpoint_dir=None,
+                        normalize_rows=True, token_budget=DEFAULT_TOKEN_BUDGET, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                        pool=None, model_name=None):
+    """
+    Encode texts into a .npy matrix, saving each finished shard so a crashed or
+    preempted run resumes from the last completed shard instead of row zero.
+
+    Shards and a manifest (catalog fingerprint, shard size, model, dim, completed
+    shards) live in checkpoint_dir; a checkpoint left by another catalog or model is
+    discarded. When all shards are done they are copied one at a time into a
+    memory-mapped output file, renamed into place, and the checkpoint is removed.
+
+    Args:
+        model: SentenceTransformer
+        texts: List of strings
+        output_path: Final .npy path
+        shard_size: Texts per checkpointed shard (at most; with a pool, see pool_shard_size)
+        checkpoint_dir: Defaults to "<output_path>.parts"
+        normalize_rows: L2-normalize every vector
+        pool: Optional EncoderPool; shards are then encoded in parallel by its workers
+        model_name: Recorded in the manifest and the output's metadata (see load_encoded)
+
+    Returns:
+        output_path
+    """
+    texts = list(texts)
+    if pool is not None:
+        shard_size = pool_shard_size(len(texts), pool.workers, shard_size)
+    checkpoint_dir = checkpoint_dir or output_path + ".parts"
+    num_shards = max(1, -(-len(texts) // shard_size))
+    fingerprint = fingerprint_texts(texts)
+    manifest_path = os.path.join(checkpoint_dir, MANIFEST_FILE)
+    expected_dim = model.get_sentence_embedding_dimension() if model is not None else None
+
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        # Shards from another model must never be mixed in, even when the dims happen to match
+        dim_changed = None not in (manifest.get('dim'), expected_dim) and manifest['dim'] != expected_dim
+        if dim_changed or ((manifest.get('fingerprint'), manifest.get('shard_size'), manifest.get('num_texts'),
+                            manifest.get('model')) != (fingerprint, shard_size, len(texts), model_name)):
+            print("Encoding checkpoint is for a different catalog or model, starting over")
+            shutil.rmtree(checkpoint_dir)
+            manifest = None
+    if manifest is None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        manifest = {'fingerprint': fingerprint, 'shard_size': shard_size, 'num_texts': len(texts),
+                    'num_shards': num_shards, 'model': model_name, 'dim': None, 'completed': []}
+        _write_json(manifest_path, manifest)
+    elif manifest['completed']:
+        print(f"Resuming encoding: {len(manifest['completed'])}/{num_shards} shards already done")
+
+    completed = set(manifest['completed'])
+    tasks = ((shard, texts[shard * shard_size:(shard + 1) * shard_size], normalize_rows, token_budget, max_batch_size)
+             for shard in range(num_shards) if shard not in completed)
+    if pool is not None:
+        results = pool.imap_unordered(tasks)
+    else:
+        results = (_encode_task(model, task) for task in tasks)
+
+    start_time = time.perf_counter()
+    encoded = 0
+    for shard, vectors in results:
+        tmp_path = _shard_path(checkpoint_dir, shard) + ".tmp.npy"
+        np.save(tmp_path, vectors.astype(np.float32))
+        os.replace(tmp_path, _shard_path(checkpoint_dir, shard))
+        completed.add(shard)
+        manifest['completed'] = sorted(completed)
+        manifest['dim'] = int(vectors.shape[1])
+        _write_json(manifest_path, manifest)
+        encoded += len(vectors)
+        print(f"Checkpointed shard {shard + 1}/{num_shards} ({len(completed)}/{num_shards} done, "
+              f"{encoded / (time.perf_counter() - start_time):,.0f} texts/sec)")
+
+    # Assemble shard by shard into a memory-mapped output: peak memory is one shard
+    tmp_output = output_path + ".tmp.npy"
+    dim = manifest['dim'] or model.get_sentence_embedding_dimension()
+    matrix = np.lib.format.open_memmap(tmp_output, mode='w+', dtype=np.float32, shape=(len(texts), dim))
+    for shard in range(num_shards):
+        if len(texts):
+            matrix[shard * shard_size:(shard + 1) * shard_size] = np.load(_shard_path(checkpoint_dir, shard), mmap_mode='r')
+    matrix.flush()
+    del matrix
+    os.replace(tmp_output, output_path)
+    save_embeddings_meta(output_path, fingerprint, len(texts), dim, model_name)
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    return output_path
+
+
+def benchmark(model, texts, batch_size=64, token_budget=DEFAULT_TOKEN_BUDGET, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """
+    Tokens/sec of the previous fixed-size, source-order encode vs the bucketed encoder.
+
+    The source-order baseline encodes consecutive slices of batch_size texts, one
+    encode call per slice, since SentenceTransformer.encode sorts a whole list by
+    length internally; that library behaviour is reported as its own row.
+    """
+    lengths = token_lengths(model, texts)
+    total_tokens = int(lengths.sum())
+    model.encode(texts[:batch_size], convert_to_tensor=False, batch_size=batch_size, show_progress_bar=False)  # warm-up
+
+    source_batches = [np.arange(i, min(i + batch_size, len(texts))) for i in range(0, len(texts), batch_size)]
+    start = time.perf_counter()
+    for batch in source_batches:
+        model.encode(texts[batch[0]:batch[-1] + 1], convert_to_tensor=False, batch_size=batch_size,
+                     show_progress_bar=False)
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.encode(texts, convert_to_tensor=False, batch_size=batch_size, show_progress_bar=False)
+    library = time.perf_counter() - start
+    # What sentence-transformers does: sort all texts by length, then fixed-size batches
+    library_order = np.argsort(-lengths, kind='stable')
+    library_batches = [library_order[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    start = time.perf_counter()
+    encode_texts(model, texts, token_budget=token_budget, max_batch_size=max_batch_size, show_progress=False)
+    bucketed = time.perf_counter() - start
+    bucketed_batches = plan_batches(lengths, token_budget, max_batch_size)
+
+    return [
+        {'mode': f'source order, batch_size={batch_size}', 'tokens_per_sec': total_tokens / baseline,
+         'seconds': baseline, 'padding_efficiency': padding_efficiency(lengths, source_batches)},
+        {'mode': f'library length-sorted, batch_size={batch_size}', 'tokens_per_sec': total_tokens / library,
+         'seconds': library, 'padding_efficiency': padding_efficiency(lengths, library_batches)},
+        {'mode': f'bucketed, budget={token_budget}', 'tokens_per_sec': total_tokens / bucketed,
+         'seconds': bucketed, 'padding_efficiency': padding_efficiency(lengths, bucketed_batches)},
+    ]
+
+
+def scaling_benchmark(model_name, texts, worker_counts, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Texts/sec of a full parallel encode for each worker count (model loading excluded),
+    with shards sized as encode_checkpointed sizes them in production.
+    """
+    rows = []
+    for workers in worker_counts:
+        size = pool_shard_size(len(texts), workers, shard_size)
+        tasks = [(shard, texts[start:start + size], True, DEFAULT_TOKEN_BUDGET, DEFAULT_MAX_BATCH_SIZE)
+                 for shard, start in enumerate(range(0, len(texts), size))]
+        with EncoderPool(model_name, workers=workers) as pool:
+            list(pool.imap_unordered([(0, texts[:8], True, DEFAULT_TOKEN_BUDGET, DEFAULT_MAX_BATCH_SIZE)] * workers))  # warm-up
+            start = time.perf_counter()
+            for _ in pool.imap_unordered(tasks):
+                pass
+            elapsed = time.perf_counter() - start
+        rows.append({'workers': workers, 'threads_per_worker': pool.threads_per_worker, 'shard_size': size,
+                     'texts_per_sec': len(texts) / elapsed, 'seconds': elapsed})
+    base = rows[0]['texts_per_sec'] / rows[0]['workers'] if rows else 1.0
+    for row in rows:
+        row['efficiency'] = row['texts_per_sec'] / (base * row['workers'])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark length-bucketed encoding against fixed-size batches.")
+    parser.add_argument("--csv", default=None, help="catalog CSV (defaults to the built-in sample data)")
+    parser.add_argument("--sample", type=int, default=2000, help="number of catalog rows to encode")
+    parser.add_argument("--model", default='all-mpnet-base-v2')
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--workers", nargs="+", type=int, default=None,
+                        help="run the multi-process scaling benchmark over these worker counts")
+    args = parser.parse_args()
+
+    import torch
+    from game_recommender import GameRecommender
+
+    print(f"CPU threads: {torch.get_num_threads()}")
+    recommender = GameRecommender(model_name=args.model, device='cpu')
+    df = recommender.load_and_preprocess_data(args.csv)
+    texts = recommender.prepare_text(df.head(args.sample)).tolist()
+    print(f"Benchmarking {len(texts)} texts...")
+
+    if args.workers:
+        rows = scaling_benchmark(args.model, texts, args.workers)
+        print(f"\n{'workers':>8} | {'threads':>8} | {'shard':>6} | {'texts/sec':>10} | {'seconds':>8} | {'scaling eff.':>12}")
+        print("-" * 69)
+        for row in rows:
+            print(f"{row['workers']:>8} | {row['threads_per_worker']:>8} | {row['shard_size']:>6} | {row['texts_per_sec']:>10,.1f} | "
+                  f"{row['seconds']:>8.2f} | {row['efficiency']:>12.0%}")
+        return
+
+    rows = benchmark(recommender.model, texts, batch_size=args.batch_size,
+                     token_budget=args.token_budget, max_batch_size=args.max_batch_size)
+    print(f"\n{'mode':>40} | {'tokens/sec':>12} | {'seconds':>8} | {'real tokens':>11}")
+    print("-" * 82)
+    for row in rows:
+        print(f"{row['mode']:>40} | {row['tokens_per_sec']:>12,.0f} | {row['seconds']:>8.2f} | {row['padding_efficiency']:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Offline retrieval-quality vs latency evaluation.
+Runs a labeled query set through GameRecommender under several configurations (query
+path and index type) and reports recall@k, nDCG@k and MRR next to p50/p99 latency
+and the memory each configuration's index and catalog take.
+
+Usage:
+    python evaluate.py eval_queries.sample.jsonl --k 5 --configs dense hybrid hybrid+rerank binary+hybrid+rerank
+    python evaluate.py queries.jsonl --csv video_game_reviews.csv --models all-mpnet-base-v2 all-MiniLM-L6-v2
+
+Query file format (one JSON object per line):
+    {"query": "relaxing farming game", "relevant": ["Stardew Valley", "Animal Crossing: New Horizons"]}
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from binary_index import BinaryPrefilterIndex
+from lexical_index import normalize_title
+from sharding import ShardedIndex
+
+# Index types: name -> function(recommender) switching a freshly built recommender to it
+INDEX_MODES = {
+    'flat': lambda rec: None,
+    'binary': lambda rec: rec.enable_binary_prefilter(),
+    'sharded': lambda rec: rec.shard_index(num_shards=2),
+    'fields': lambda rec: rec.enable_field_embeddings(),
+}
+
+_hybrid_rerank = lambda rec, query, k: rec.hybrid_query(query, top_k=k)
+
+# Retrieval configurations: name -> (index type, function(recommender, query, k) -> [(title, score), ...])
+CONFIGURATIONS = {
+    'dense': ('flat', lambda rec, query, k: rec.query(query, top_k=k)),
+    'hybrid': ('flat', lambda rec, query, k: rec.hybrid_query(query, top_k=k, rerank_results=False)),
+    'hybrid+rerank': ('flat', _hybrid_rerank),
+    'hybrid+rerank+mmr': ('flat', lambda rec, query, k: rec.hybrid_query(query, top_k=k, diversity=0.7)),
+    'binary+hybrid+rerank': ('binary', _hybrid_rerank),
+    'sharded+hybrid+rerank': ('sharded', _hybrid_rerank),
+    'fields+hybrid+rerank': ('fields', _hybrid_rerank),
+}
+
+
+def load_queries(path):
+    """Load labeled queries from a JSONL file."""
+    queries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                queries.append((item['query'], {normalize_title(title) for title in item['relevant']}))
+    return queries
+
+
+def _unique_titles(results):
+    """Result titles in rank order, each game counted once (the catalog has one row per review)."""
+    seen = []
+    for title, _ in results:
+        key = normalize_title(title)
+        if key not in seen:
+            seen.append(key)
+    return seen
+
+
+def score_ranking(ranked_titles, relevant, k):
+    """Return (recall@k, nDCG@k, reciprocal rank) for one query with binary relevance."""
+    hits = [1.0 if title in relevant else 0.0 for title in ranked_titles[:k]]
+    if not relevant:
+        return 0.0, 0.0, 0.0
+    recall = sum(hits) / len(relevant)
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg = float(np.dot(hits, discounts[:len(hits)]))
+    idcg = float(discounts[:min(len(relevant), k)].sum())
+    rr = next((1.0 / rank for rank, hit in enumerate(hits, 1) if hit), 0.0)
+    return recall, dcg / idcg, rr
+
+
+def _catalog_mb(recommender):
+    """In-memory size of the serving catalog (all columns, including review text) in MB."""
+    return recommender.df.memory_usage(deep=True).sum() / 1e6
+
+
+def index_footprint(recommender):
+    """
+    (in-memory MB, memory-mapped MB) of the structures the recommender searches with:
+    the flat FAISS vectors, the shard workers' vectors, or the binary codes, plus
+    per-field matrices when enabled, and the embedding matrix kept for MMR and
+    feedback, which is memory-mapped (paged in on demand) once the index moved out.
+    """
+    resident = mapped = 0
+    index = recommender.index
+    dim = recommender.game_embeddings.shape[1]
+    if isinstance(index, BinaryPrefilterIndex):
+        resident += index.codes.nbytes
+    elif isinstance(index, ShardedIndex):
+        # Held by the worker processes, not the coordinator
+        resident += index.ntotal * dim * 4
+    else:
+        resident += index.ntotal * index.d * 4
+    if recommender.field_embeddings is not None:
+        resident += recommender.field_embeddings.nbytes
+    if isinstance(recommender.game_embeddings, np.memmap):
+        mapped += recommender.game_embeddings.nbytes
+    else:
+        resident += recommender.game_embeddings.nbytes
+    return resident / 1e6, mapped / 1e6
+
+
+def evaluate(recommender, queries, config, k=5, warmup=3):
+    """Run every query under one configuration and aggregate quality and latency."""
+    _, run = CONFIGURATIONS[config]
+    for query, _ in queries[:warmup]:
+        run(recommender, query, k)
+
+    latencies, recalls, ndcgs, rrs = [], [], [], []
+    for query, relevant in queries:
+        start = time.perf_counter()
+        results = run(recommender, query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recall, ndcg, rr = score_ranking(_unique_titles(results), relevant, k)
+        recalls.append(recall)
+        ndcgs.append(ndcg)
+        rrs.append(rr)
+
+    index_mb, mapped_mb = index_footprint(recommender)
+    return {
+        'config': config,
+        f'recall@{k}': float(np.mean(recalls)),
+        f'ndcg@{k}': float(np.mean(ndcgs)),
+        'mrr': float(np.mean(rrs)),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'index_mb': index_mb,
+        'mapped_mb': mapped_mb,
+        'catalog_mb': _catalog_mb(recommender),
+    }
+
+
+def print_report(rows, k):
+    """Print results as an aligned table."""
+    columns = ['model', 'config', f'recall@{k}', f'ndcg@{k}', 'mrr', 'p50_ms', 'p99_ms', 'index_mb', 'mapped_mb',
+               'catalog_mb']
+    print("\n" + " | ".join(f"{col:>18}" for col in columns))
+    print("-" * (21 * len(columns)))
+    for row in rows:
+        cells = [f"{row[col]:>18.4f}" if isinstance(row[col], float) else f"{str(row[col]):>18}" for col in columns]
+        print(" | ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality vs latency.")
+    parser.add_argument("queries", help="labeled JSONL query file")
+    parser.add_argument("--csv", default=None, help="catalog CSV (defaults to the built-in sample data)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--models", nargs="+", default=['all-mpnet-base-v2'])
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGURATIONS), choices=list(CONFIGURATIONS))
+    parser.add_argument("--output", default=None, help="optional JSON file for the results")
+    args = parser.parse_args()
+
+    from game_recommender import GameRecommender
+
+    queries = load_queries(args.queries)
+    print(f"Loaded {len(queries)} labeled queries")
+
+    rows = []
+    for model_name in args.models:
+        previous = None
+        for mode, switch_index in INDEX_MODES.items():
+            configs = [config for config in args.configs if CONFIGURATIONS[config][0] == mode]
+            if not configs:
+                continue
+            # A fresh recommender per index type (the model and saved embeddings are reused);
+            # separate embedding cache per model so configurations never mix vectors
+            recommender = GameRecommender.for_reload(
+                previous, model_name=model_name, device='cpu',
+                embedding_dir=os.path.join("embeddings", model_name.replace('/', '_')))
+            recommender.initialize_model(args.csv)
+            switch_index(recommender)
+            for config in configs:
+                row = evaluate(recommender, queries, config, k=args.k)
+                row['model'] = model_name
+                rows.append(row)
+                print(f"{model_name} / {config}: done")
+            recommender.close()
+            previous = recommender
+
+    print_report(rows, args.k)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
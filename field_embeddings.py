@@ -0,0 +1,146 @@
+"""
+Multi-field game embeddings with query-time weights.
+Production version of the notebook's WeightedGameEmbedder: title, genre, review, age
+and graphics are embedded separately once, and the field weights are applied per query,
+so re-weighting never re-runs the encoder.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import normalize
+
+from encoding import encode_texts, fingerprint_texts
+
+FIELD_EMBEDDINGS_FILE = "field_embeddings.npz"
+
+# Field name -> catalog column
+FIELD_COLUMNS = {
+    'title': 'Game Title',
+    'genre': 'Genre',
+    'review': 'User Review Text',
+    'age': 'Age Group Targeted',
+    'graphics': 'Graphics Quality',
+}
+
+# Weights from the notebook prototype
+DEFAULT_EMBEDDING_WEIGHTS = {'title': 0.4, 'age': 0.1, 'genre': 0.2, 'review': 0.2, 'graphics': 0.1}
+
+
+def fingerprint_fields(df, model_name=None):
+    """Hash of every embedded field's values (and the model), so saved field vectors are only reused for the same catalog."""
+    digest = hashlib.sha1(str(model_name).encode('utf-8'))
+    for field, column in FIELD_COLUMNS.items():
+        if column in df.columns:
+            digest.update(field.encode('utf-8'))
+            fingerprint_texts(df[column].astype(str), digest)
+    return digest.hexdigest()
+
+
+class MultiFieldEmbeddings:
+    """
+    Per-field embedding matrices scored with one matmul per query.
+
+    Each field stores vectors for its distinct values only (a handful of genres or
+    age groups, one vector per title) plus an int32 code per catalog row. All
+    distinct-value vectors are stacked into one matrix, so a query costs a single
+    (values x dim) matmul followed by a weighted gather per field.
+    """
+    def __init__(self, vectors, codes, fingerprint=None):
+        """
+        Args:
+            vectors: Dict field -> normalized (distinct_values, dim) float32 matrix
+            codes: Dict field -> (n,) row index into that field's matrix
+            fingerprint: Catalog fingerprint (see fingerprint_fields), saved with the vectors
+        """
+        self.fields = list(vectors)
+        self.fingerprint = fingerprint
+        self.codes = codes
+        self._rows = {}
+        stacked = []
+        offset = 0
+        for field in self.fields:
+            stacked.append(np.asarray(vectors[field], dtype=np.float32))
+            self._rows[field] = np.asarray(codes[field], dtype=np.int64) + offset
+            offset += len(vectors[field])
+        self.vectors = vectors
+        self.stacked = np.ascontiguousarray(np.vstack(stacked))
+
+    def __len__(self):
+        return len(self.codes[self.fields[0]])
+
+    @property
+    def nbytes(self):
+        """Bytes held by the field matrices and per-row codes."""
+        return (self.stacked.nbytes + sum(vectors.nbytes for vectors in self.vectors.values())
+                + sum(codes.nbytes for codes in self.codes.values()) + sum(rows.nbytes for rows in self._rows.values()))
+
+    @classmethod
+    def build(cls, df, model, batch_size=64, fingerprint=None):
+        """
+        Encode the distinct values of every field present in the catalog, in
+        length-bucketed batches of at most batch_size (see encoding.encode_texts).
+        """
+        vectors, codes = {}, {}
+        for field, column in FIELD_COLUMNS.items():
+            if column not in df.columns:
+                continue
+            field_codes, uniques = pd.factorize(df[column].astype(str))
+            print(f"Encoding {field}: {len(uniques)} distinct values")
+            encoded = encode_texts(model, list(uniques), max_batch_size=batch_size, show_progress=False)
+            vectors[field] = normalize(encoded).astype(np.float32)
+            codes[field] = field_codes.astype(np.int32)
+        return cls(vectors, codes, fingerprint)
+
+    def save(self, directory):
+        """Save all field matrices and codes to one .npz next to the embeddings."""
+        arrays = {}
+        for field in self.fields:
+            arrays[f"{field}_vectors"] = self.vectors[field]
+            arrays[f"{field}_codes"] = self.codes[field]
+        if self.fingerprint is not None:
+            arrays['fingerprint'] = np.array(self.fingerprint)
+        np.savez(os.path.join(directory, FIELD_EMBEDDINGS_FILE), **arrays)
+
+    @classmethod
+    def load(cls, directory, num_rows=None, fingerprint=None):
+        """
+        Load saved field embeddings, or return None if missing or built for another
+        catalog: a different row count or, when fingerprint is given, different field
+        values (files saved without a fingerprint are then rejected too).
+        """
+        path = os.path.join(directory, FIELD_EMBEDDINGS_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            fields = [name[:-len("_vectors")] for name in data.files if name.endswith("_vectors")]
+            vectors = {field: data[f"{field}_vectors"] for field in fields}
+            codes = {field: data[f"{field}_codes"] for field in fields}
+            saved_fingerprint = str(data['fingerprint']) if 'fingerprint' in data.files else None
+        if not fields or (num_rows is not None and len(codes[fields[0]]) != num_rows):
+            return None
+        if fingerprint is not None and saved_fingerprint != fingerprint:
+            return None
+        return cls(vectors, codes, saved_fingerprint)
+
+    def scores(self, query_vector, weights=None):
+        """Weighted cosine similarity of every game, normalized by the total weight."""
+        weights = DEFAULT_EMBEDDING_WEIGHTS if weights is None else weights
+        sims = self.stacked @ np.asarray(query_vector, dtype=np.float32).ravel()
+        total = np.zeros(len(self), dtype=np.float32)
+        weight_sum = 0.0
+        for field, weight in weights.items():
+            if weight and field in self._rows:
+                total += weight * sims[self._rows[field]]
+                weight_sum += weight
+        return total / weight_sum if weight_sum else total
+
+    def search(self, query_vector, k, weights=None):
+        """Top-k (ids, scores) for a normalized query vector."""
+        scores = self.scores(query_vector, weights)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top, scores[top]
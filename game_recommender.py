@@ -5,41 +5,26 @@ Extracted from Jupyter notebook and optimized for production use.
 
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.preprocessing import normalize
-import torch
 import os
-import faiss
+import hashlib
 import re
-import spacy
-from sklearn.preprocessing import MinMaxScaler
-from pathlib import Path
+import uuid
+from sessions import SessionStore
+from catalog import compact_catalog, concat_compact
+from reranking import build_rerank_features
+from hot_reload import SnapshotManager
+from encoding import encode_texts, fingerprint_texts, meta_matches, read_embeddings_meta, save_embeddings_meta
+from result_cards import ResultCards
+from binary_index import DEFAULT_RERANK, BinaryPrefilterIndex
+from recommender_base import BaseRecommender
 import warnings
 warnings.filterwarnings('ignore')
 
-class GameRecommender:
-    def __init__(self, model_name='all-mpnet-base-v2', device=None, embedding_dir="embeddings"):
-        """
-        Game recommender using combined embeddings.
-        """
-        self.device = device if device else ('cuda' if torch.cuda.is_available() else 'cpu')
-        print(f"Using device: {self.device}")
-        self.model = SentenceTransformer(model_name, device=self.device)
-        self.embedding_dir = embedding_dir
-        os.makedirs(self.embedding_dir, exist_ok=True)
-        self.game_embeddings = None
-        self.game_names = None
-        self.index = None
-        self.df = None
-        self.scaler = MinMaxScaler()
-        
-        # Initialize spaCy for text preprocessing
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("spaCy model not found. Please install with: python -m spacy download en_core_web_sm")
-            self.nlp = None
-
+class GameRecommender(BaseRecommender):
+    """
+    Game recommender over a CSV catalog (sample data when none is given).
+    """
     def load_and_preprocess_data(self, csv_path=None):
         """
         Load and preprocess the game dataset.
@@ -103,128 +88,150 @@ class GameRecommender:
         Preprocess the game data for ML pipeline.
         """
         print("Preprocessing data...")
+        self.df = self._preprocess_frame(self.df)
         
+        # Serve from a compact columnar catalog (categoricals, Arrow strings, float32)
+        self.df = compact_catalog(self.df)
+        print("Data preprocessing completed")
+        return self.df
+
+    def _preprocess_frame(self, df):
+        """
+        Clean review text and fill missing values of a DataFrame (full catalog or one chunk).
+        """
         # Clean text data
-        if 'User Review Text' in self.df.columns:
-            self.df['User Review Text'] = self.df['User Review Text'].fillna('')
-            self.df['User Review Text'] = self.df['User Review Text'].str.lower()
-            self.df['User Review Text'] = self.df['User Review Text'].apply(
+        if 'User Review Text' in df.columns:
+            df['User Review Text'] = df['User Review Text'].fillna('')
+            df['User Review Text'] = df['User Review Text'].str.lower()
+            df['User Review Text'] = df['User Review Text'].apply(
                 lambda x: re.sub(r'[^a-zA-Z0-9\s]', '', str(x))
             )
             
             # Apply spaCy preprocessing if available
             if self.nlp:
-                self.df['User Review Text'] = self.df['User Review Text'].apply(
+                df['User Review Text'] = df['User Review Text'].apply(
                     lambda doc: " ".join([token.lemma_ for token in self.nlp(doc) if not token.is_stop])
                 )
         
         # Fill missing values
-        self.df = self.df.fillna('Unknown')
-        
-        print("Data preprocessing completed")
-        return self.df
+        return df.fillna('Unknown')
 
-    def prepare_text(self, df):
-        """
-        Combine all textual features into a single string per game.
+    def stream_encode_catalog(self, csv_path, chunk_size=5000, batch_size=64, rerank=DEFAULT_RERANK):
         """
-        combined = (
-            df['Game Title'].astype(str) + " | " +
-            df['Genre'].astype(str) + " | " +
-            df['User Review Text'].astype(str) + " | " +
-            "Age: " + df['Age Group Targeted'].astype(str) + " | " +
-            "Graphics: " + df['Graphics Quality'].astype(str)
-        )
-        return combined
-
-    def encode_games(self, df=None):
-        """
-        Encode all games and save/load embeddings.
+        Streaming ingestion for catalogs whose review text does not fit in RAM.
+
+        Reads the CSV in chunks, preprocesses and encodes each chunk, and appends the
+        normalized vectors straight to an on-disk .npy matrix; review text and
+        encoder batches are bounded by chunk_size. The serving index is built from
+        that file: sign-bit codes searched by Hamming distance, re-scored against
+        the memory-mapped vectors (see enable_binary_prefilter), so no float matrix
+        or FAISS flat index is ever held in RAM. Each chunk's detail columns are
+        compacted (categoricals, float32) as it arrives, so per-row memory is a few
+        bytes of codes. Review text is dropped after encoding, and the BM25 lexical
+        index is not built in this mode.
+
+        A first pass fingerprints the chunk texts; if the saved matrix was encoded
+        from the same texts and model, it is reused and nothing is encoded.
         """
-        if df is None:
-            df = self.df
-        
-        self.game_names = df['Game Title'].tolist()
+        print(f"Streaming catalog from {csv_path} in chunks of {chunk_size} rows...")
+        print("⚠️ Streamed catalogs have no BM25 lexical index: exact-title and keyword answers, "
+              "hybrid fusion and the \"more like this\" neighbor table are off; queries use embeddings only.")
+        dim = self.model.get_sentence_embedding_dimension()
         embedding_path = os.path.join(self.embedding_dir, "game_embeddings.npy")
 
-        if os.path.exists(embedding_path):
+        self.lexical_index = None
+        self.neighbor_table = None
+        details = []
+        num_rows = 0
+        digest = hashlib.sha1()
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+            chunk = self._preprocess_frame(chunk)
+            fingerprint_texts(self.prepare_text(chunk).tolist(), digest)
+            num_rows += len(chunk)
+            details.append(compact_catalog(chunk.drop(columns=['User Review Text'], errors='ignore'), verbose=False))
+        fingerprint = digest.hexdigest()
+
+        meta = read_embeddings_meta(embedding_path)
+        self.reencoded = not (meta is not None and os.path.exists(embedding_path)
+                              and meta_matches(meta, fingerprint, num_rows, self.model_name)
+                              and np.load(embedding_path, mmap_mode='r').shape == (num_rows, dim))
+        if not self.reencoded:
             print(f"Loading game embeddings from {embedding_path}")
-            self.game_embeddings = np.load(embedding_path)
         else:
-            print("Encoding game embeddings...")
-            combined_texts = self.prepare_text(df).tolist()
-            self.game_embeddings = self.model.encode(
-                combined_texts,
-                convert_to_tensor=False,
-                batch_size=64,
-                show_progress_bar=True
-            )
-            # Normalize embeddings
-            self.game_embeddings = normalize(self.game_embeddings)
-            np.save(embedding_path, self.game_embeddings)
-            print(f"Saved embeddings to {embedding_path}")
-
-        # Build FAISS index
-        dim = self.game_embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dim)  # inner product on normalized = cosine similarity
-        self.index.add(self.game_embeddings.astype('float32'))
-        print("FAISS index built.")
+            # Build into a temporary file: a live snapshot may still be memory-mapping the old one
+            tmp_path = embedding_path + ".tmp.npy"
+            matrix = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(num_rows, dim))
+            offset = 0
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+                texts = self.prepare_text(self._preprocess_frame(chunk)).tolist()
+                vectors = encode_texts(self.model, texts, max_batch_size=batch_size, show_progress=False)
+                matrix[offset:offset + len(vectors)] = normalize(vectors).astype('float32')
+                offset += len(vectors)
+                print(f"Encoded {offset}/{num_rows} games")
 
-    def query(self, user_input, top_k=5):
-        """
-        Find top-k games based on a user query.
-        """
-        if self.index is None:
-            raise ValueError("Model not initialized. Call encode_games() first.")
-            
-        user_emb = self.model.encode([user_input], convert_to_tensor=False)
-        user_emb = normalize(user_emb)
-        D, I = self.index.search(user_emb.astype('float32'), k=top_k)
-        results = [(self.game_names[idx], float(score)) for idx, score in zip(I[0], D[0])]
-        return results
-
-    def get_game_details(self, game_name):
-        """
-        Get detailed information about a specific game.
-        """
-        if self.df is None:
-            return None
-            
-        game_info = self.df[self.df['Game Title'] == game_name]
-        if len(game_info) > 0:
-            return game_info.iloc[0].to_dict()
-        return None
+            matrix.flush()
+            del matrix
+            os.replace(tmp_path, embedding_path)
+            # Lets encode_games(), reloads and the next streamed run reuse this matrix for the same catalog
+            save_embeddings_meta(embedding_path, fingerprint, num_rows, dim, self.model_name)
+            print(f"Saved embeddings to {embedding_path}")
+        self.df = concat_compact(details)
+        del details
+        self.game_names = self.df['Game Title'].astype('category').array if len(self.df) else []
+        self.game_embeddings = np.load(embedding_path, mmap_mode='r')
+        self.index = BinaryPrefilterIndex(embedding_path, rerank=rerank)
+        self.rating_norm, self.value_norm = build_rerank_features(self.df, self.scaler)
+        self.result_cards = ResultCards.build(self.df)
+        self.index_version = uuid.uuid4().hex
+        self.index_titles()
+        self.sessions = SessionStore(dim, len(self.title_rows))
 
-    def initialize_model(self, csv_path=None):
+    def initialize_model(self, csv_path=None, chunk_size=None, force_encode=False):
         """
         Complete initialization: load data, preprocess, and encode games.
+        Pass chunk_size to stream a large CSV in chunks instead (see stream_encode_catalog).
         """
         print("Initializing Game Recommender...")
-        self.load_and_preprocess_data(csv_path)
-        self.encode_games()
+        if chunk_size and csv_path and os.path.exists(csv_path):
+            self.stream_encode_catalog(csv_path, chunk_size=chunk_size)
+        else:
+            self.load_and_preprocess_data(csv_path)
+            self.encode_games(force_encode=force_encode)
         print("Game Recommender ready!")
 
-# Global recommender instance
-_recommender = None
+
+def _build_recommender(previous=None):
+    """Build a fully initialized recommender, reusing the previous one's model on reloads."""
+    recommender = GameRecommender.for_reload(previous, device='cpu')
+    # Saved embeddings are reused if the catalog is unchanged; otherwise encoding resumes from checkpoints
+    # Try to load from Kaggle dataset if available
+    try:
+        import kagglehub
+        path = kagglehub.dataset_download("jahnavipaliwal/video-game-reviews-and-ratings")
+        csv_path = os.path.join(path, "video_game_reviews.csv")
+        recommender.initialize_model(csv_path)
+    except Exception as e:
+        print(f"Could not load Kaggle dataset: {e}")
+        print("Using sample data instead...")
+        recommender.initialize_model()
+    recommender.adopt_settings(previous)
+    return recommender
+
+# Global recommender snapshots (swapped atomically on reload)
+_recommender = SnapshotManager(_build_recommender, name="GameRecommender")
 
 def get_recommender():
     """Get or create the global recommender instance."""
-    global _recommender
-    if _recommender is None:
-        _recommender = GameRecommender(device='cpu')
-        # Try to load from Kaggle dataset if available
-        try:
-            import kagglehub
-            path = kagglehub.dataset_download("jahnavipaliwal/video-game-reviews-and-ratings")
-            csv_path = os.path.join(path, "video_game_reviews.csv")
-            _recommender.initialize_model(csv_path)
-        except Exception as e:
-            print(f"Could not load Kaggle dataset: {e}")
-            print("Using sample data instead...")
-            _recommender.initialize_model()
-    return _recommender
-
-def get_recommendations(user_input, mood=None, top_k=5):
+    return _recommender.current()
+
+def reload_recommender(wait=False):
+    """
+    Rebuild the catalog and index in the background and swap them in atomically.
+    Queries already running finish on the previous snapshot.
+    """
+    return _recommender.reload(wait=wait)
+
+def get_recommendations(user_input, mood=None, top_k=5, diversity=None, session_id=None):
     """
     Get game recommendations for a user query.
     
@@ -232,14 +239,68 @@ def get_recommendations(user_input, mood=None, top_k=5):
         user_input: User's query string
         mood: Optional mood filter (not used in current implementation)
         top_k: Number of recommendations to return
+        diversity: Optional MMR lambda for diverse results (1.0 = pure relevance)
+        session_id: Optional chat session for personalization
     
     Returns:
         List of tuples (game_name, similarity_score)
     """
-    recommender = get_recommender()
-    return recommender.query(user_input, top_k=top_k)
+    with _recommender.acquire() as recommender:
+        return recommender.hybrid_query(user_input, top_k=top_k, diversity=diversity, session_id=session_id)
+
+def record_feedback(session_id, game_names):
+    """Record liked or clicked games for a chat session."""
+    with _recommender.acquire() as recommender:
+        recommender.record_feedback(session_id, game_names)
+
+def has_session_state(session_id):
+    """Whether a chat session has feedback or shown games (its results are personal)."""
+    with _recommender.acquire() as recommender:
+        return recommender.has_session_state(session_id)
+
+def mark_shown(session_id, game_names):
+    """Record games shown to a chat session from a cached response."""
+    with _recommender.acquire() as recommender:
+        recommender.mark_shown(session_id, game_names)
+
+def get_similar_games(game_name, top_k=5):
+    """Get games similar to a game title from the precomputed neighbor table."""
+    with _recommender.acquire() as recommender:
+        return recommender.similar_games(game_name, top_k=top_k)
+
+def get_index_version():
+    """Version token of the current catalog/index (changes whenever it is rebuilt)."""
+    with _recommender.acquire() as recommender:
+        return recommender.index_version
 
 def get_game_info(game_name):
     """Get detailed information about a specific game."""
-    recommender = get_recommender()
-    return recommender.get_game_details(game_name)
+    with _recommender.acquire() as recommender:
+        return recommender.get_game_details(game_name)
+
+def get_game_cards(game_names):
+    """Get pre-rendered result cards for a list of game titles."""
+    with _recommender.acquire() as recommender:
+        return recommender.game_cards(game_names)
+
+def get_cache_stats():
+    """Semantic query cache metrics of the current recommender (None when disabled)."""
+    with _recommender.acquire() as recommender:
+        return recommender.semantic_cache.stats() if recommender.semantic_cache is not None else None
+
+def get_deadline_recommendations(user_input, deadline, top_k=5, diversity=None, session_id=None):
+    """
+    Get game recommendations before a deadline (time.perf_counter() value), in the
+    most complete query mode that still fits.
+
+    Returns:
+        Tuple of (list of (game_name, similarity_score), mode)
+    """
+    with _recommender.acquire() as recommender:
+        return recommender.deadline_query(user_input, deadline, top_k=top_k, diversity=diversity,
+                                          session_id=session_id)
+
+def get_title_popularity():
+    """Get the number of reviews per game title in the current catalog."""
+    with _recommender.acquire() as recommender:
+        return recommender.title_popularity()
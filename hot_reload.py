@@ -0,0 +1,124 @@
+"""
+Hot catalog reload.
+Double-buffered, reference-counted snapshots of the recommender: a reload builds the
+new catalog and index in the background and swaps it in atomically, while in-flight
+queries finish on the snapshot they started with.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class Snapshot:
+    """One built recommender plus the number of queries currently using it."""
+    def __init__(self, value, generation):
+        self.value = value
+        self.generation = generation
+        self.refs = 0
+        self.retired = False
+
+
+class SnapshotManager:
+    """
+    Owns the live snapshot and swaps in new ones without downtime.
+
+    Args:
+        build: Callable(previous_value_or_None) -> new value. Receives the live
+            value on reloads so expensive parts (e.g. the model) can be reused.
+        name: Label used in log messages
+    """
+    def __init__(self, build, name="catalog"):
+        self._build = build
+        self.name = name
+        self._current = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._reload_thread = None
+
+    @property
+    def generation(self):
+        """Number of snapshots installed so far."""
+        return self._generation
+
+    def _ensure_built(self):
+        if self._current is None:
+            with self._build_lock:
+                if self._current is None:
+                    self._install(self._build(None))
+
+    def current(self):
+        """The live value, without pinning it (for quick, non-critical reads)."""
+        self._ensure_built()
+        return self._current.value
+
+    @contextmanager
+    def acquire(self):
+        """Pin the live snapshot for the duration of a query."""
+        self._ensure_built()
+        with self._lock:
+            snapshot = self._current
+            snapshot.refs += 1
+        try:
+            yield snapshot.value
+        finally:
+            with self._lock:
+                snapshot.refs -= 1
+                release = snapshot.retired and snapshot.refs == 0
+            if release:
+                self._release(snapshot)
+
+    def _install(self, value):
+        """Atomically make value the live snapshot and retire the previous one."""
+        with self._lock:
+            previous = self._current
+            self._generation += 1
+            self._current = Snapshot(value, self._generation)
+            release = False
+            if previous is not None:
+                previous.retired = True
+                release = previous.refs == 0
+        print(f"✅ {self.name} snapshot #{self._generation} is live")
+        if release:
+            self._release(previous)
+
+    def _release(self, snapshot):
+        """
+        Drop the last reference to a retired snapshot so its memory can be freed,
+        closing it first if it has a close() (e.g. to stop index worker processes).
+        """
+        value, snapshot.value = snapshot.value, None
+        close = getattr(value, 'close', None)
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                print(f"⚠️ Could not close {self.name} snapshot #{snapshot.generation}: {e}")
+        print(f"Released {self.name} snapshot #{snapshot.generation}")
+
+    def _reload(self):
+        with self._build_lock:
+            previous = self._current.value if self._current is not None else None
+            try:
+                value = self._build(previous)
+            except Exception as e:
+                print(f"⚠️ {self.name} reload failed, keeping the current snapshot: {e}")
+                return
+        self._install(value)
+
+    def reload(self, wait=False):
+        """
+        Build a new snapshot in a background thread and swap it in when ready.
+        A reload already in progress is reused rather than started twice.
+
+        Returns:
+            The reload thread
+        """
+        with self._lock:
+            if self._reload_thread is None or not self._reload_thread.is_alive():
+                self._reload_thread = threading.Thread(target=self._reload, name=f"{self.name}-reload", daemon=True)
+                self._reload_thread.start()
+            thread = self._reload_thread
+        if wait:
+            thread.join()
+        return thread
@@ -0,0 +1,191 @@
+"""
+Shared Intent Engine
+Compiles every keyword table used by the apps into a single Aho-Corasick automaton,
+so a message is scanned once, in O(len(text)), no matter how many keywords exist.
+"""
+
+from collections import deque
+from functools import lru_cache
+
+# Keyword tables, grouped by the caller that reads them.
+# Category order matters: callers that want a single answer take the first hit.
+INTENT_TABLES = {
+    # recommendation.parse_user_intent - rule name -> keywords
+    'intent_rules': {
+        'sad': ['sad', 'depressed', 'down', 'blue', 'melancholy', 'gloomy', 'feeling low'],
+        'stressed': ['stressed', 'anxious', 'overwhelmed', 'tense', 'worried', 'pressure'],
+        'bored': ['bored', 'boring', 'nothing to do', 'uninterested', 'tired of', 'stuck'],
+        'happy': ['happy', 'cheerful', 'excited', 'joyful', 'upbeat', 'positive'],
+        'chill': ['chill', 'relaxed', 'calm', 'peaceful', 'zen', 'mellow', 'laid back'],
+        'quick': ['quick', 'fast', 'short', '30 minutes', '15 minutes', 'brief', 'casual'],
+        'long': ['long', 'extended', 'hours', 'all day', 'marathon', 'deep dive'],
+        'social': ['friends', 'multiplayer', 'together', 'co-op', 'social', 'with others'],
+        'solo': ['alone', 'solo', 'by myself', 'single player', 'personal'],
+        'language_learning': [
+            'learn spanish', 'learn french', 'learn german', 'learn japanese',
+            'learn language', 'spanish', 'french', 'german', 'japanese',
+            'language learning', 'learn a language'
+        ],
+        'educational': [
+            'parent', 'child', 'kid', 'learn math', 'educational', 'school',
+            'homework', 'study', 'my child', 'for my kid', 'educational game',
+            'learn', 'education', 'skill', 'practice', 'improve'
+        ],
+        'puzzle': ['puzzle', 'brain', 'think', 'logic', 'challenge', 'problem solving'],
+        'action': ['action', 'fast', 'intense', 'thrilling', 'exciting', 'adrenaline'],
+        'strategy': ['strategy', 'planning', 'tactical', 'thinking', 'management'],
+        'creative': ['creative', 'build', 'design', 'art', 'craft', 'create'],
+        'story': ['story', 'narrative', 'plot', 'characters', 'drama', 'cinematic'],
+    },
+    # interactive_app.analyze_user_intent
+    'mood': {
+        'happy': ['happy', 'cheerful', 'excited', 'joyful', 'upbeat', 'positive', 'good mood'],
+        'sad': ['sad', 'depressed', 'down', 'blue', 'melancholy', 'gloomy', 'feeling low'],
+        'stressed': ['stressed', 'anxious', 'overwhelmed', 'tense', 'worried', 'pressure'],
+        'chill': ['chill', 'relaxed', 'calm', 'peaceful', 'zen', 'mellow', 'laid back'],
+        'bored': ['bored', 'boring', 'nothing to do', 'uninterested', 'tired of', 'stuck'],
+        'excited': ['excited', 'pumped', 'thrilled', 'energetic', 'hyped', 'ready for action'],
+    },
+    'time': {
+        'quick': ['quick', 'fast', 'short', '30 minutes', '15 minutes', 'brief', 'casual'],
+        'long': ['long', 'extended', 'hours', 'all day', 'marathon', 'deep dive'],
+        'any': ['any time', 'flexible', 'whenever'],
+    },
+    'social': {
+        'solo': ['alone', 'solo', 'by myself', 'single player', 'personal'],
+        'multiplayer': ['friends', 'multiplayer', 'together', 'co-op', 'social', 'with others'],
+        'competitive': ['competitive', 'vs', 'against', 'challenge', 'battle', 'fight'],
+    },
+    'learning': {
+        'learning': ['learn', 'education', 'skill', 'practice', 'improve', 'study', 'knowledge'],
+    },
+    'genre': {
+        'adventure': ['adventure', 'explore', 'journey', 'quest', 'discovery'],
+        'puzzle': ['puzzle', 'brain', 'think', 'logic', 'challenge', 'problem solving'],
+        'action': ['action', 'fast', 'intense', 'thrilling', 'exciting', 'adrenaline'],
+        'strategy': ['strategy', 'planning', 'tactical', 'thinking', 'management'],
+        'creative': ['creative', 'build', 'design', 'art', 'craft', 'create'],
+        'story': ['story', 'narrative', 'plot', 'characters', 'drama', 'cinematic'],
+    },
+    # brainstorming_app.analyze_creative_intent
+    'creative_theme': {
+        'discovery': ['discover', 'explore', 'new', 'never tried', 'unfamiliar', 'unknown', 'curious', 'wonder'],
+        'learning': ['learn', 'teach', 'education', 'skill', 'improve', 'develop', 'master', 'understand'],
+        'social': ['friends', 'together', 'social', 'multiplayer', 'co-op', 'party', 'group', 'team'],
+        'creative': ['creative', 'build', 'design', 'art', 'craft', 'create', 'imagine', 'invent'],
+        'challenge': ['challenge', 'difficult', 'hard', 'complex', 'advanced', 'expert', 'master'],
+        'relaxation': ['relax', 'calm', 'peaceful', 'zen', 'meditation', 'stress', 'unwind', 'chill'],
+        'adventure': ['adventure', 'explore', 'journey', 'quest', 'discover', 'world', 'travel'],
+        'story': ['story', 'narrative', 'plot', 'characters', 'drama', 'cinematic', 'emotional'],
+        'puzzle': ['puzzle', 'brain', 'think', 'logic', 'problem', 'solve', 'mystery'],
+        'action': ['action', 'fast', 'intense', 'thrilling', 'exciting', 'adrenaline', 'rush'],
+    },
+    'creative_mood': {
+        'excited': ['excited', 'pumped', 'thrilled', 'energetic', 'hyped', 'ready'],
+        'curious': ['curious', 'wonder', 'interested', 'intrigued', 'fascinated'],
+        'bored': ['bored', 'tired', 'stuck', 'uninspired', 'routine'],
+        'stressed': ['stressed', 'overwhelmed', 'anxious', 'tense', 'pressure'],
+        'creative': ['creative', 'inspired', 'artistic', 'imaginative', 'innovative'],
+        'adventurous': ['adventurous', 'bold', 'daring', 'brave', 'explorer'],
+    },
+    'exploratory': {
+        'exploratory': ['explore', 'discover', 'new', 'try', 'brainstorm', 'ideas'],
+    },
+}
+
+
+class IntentMatch:
+    """Read-only view of every (table, category) hit found in one text."""
+    def __init__(self, hits, tables):
+        self._hits = hits
+        self._tables = tables
+
+    def all(self, table):
+        """Every category of a table that matched, in table order."""
+        matched = self._hits.get(table, ())
+        return [category for category in self._tables[table] if category in matched]
+
+    def first(self, table, default=None):
+        """The first matching category of a table, in table order."""
+        matched = self._hits.get(table, ())
+        for category in self._tables[table]:
+            if category in matched:
+                return category
+        return default
+
+    def has(self, table, category=None):
+        """Whether a table (or one of its categories) matched."""
+        matched = self._hits.get(table, ())
+        return bool(matched) if category is None else category in matched
+
+
+class IntentEngine:
+    """
+    Aho-Corasick automaton over all keywords of all tables.
+
+    Matching is plain substring matching on the lowercased text, the same
+    semantics as `keyword in text_lower`, but done in a single pass.
+    """
+    def __init__(self, tables):
+        self.tables = tables
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        labels = {}
+        for table, categories in tables.items():
+            for category, keywords in categories.items():
+                for keyword in keywords:
+                    labels.setdefault(keyword.lower(), set()).add((table, category))
+
+        for keyword, keyword_labels in labels.items():
+            self._add(keyword, tuple(keyword_labels))
+        self._link()
+
+    def _add(self, keyword, keyword_labels):
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].extend(keyword_labels)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge outputs along them."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text):
+        """Scan text once and return an IntentMatch with every table/category hit."""
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = {}
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for table, category in out[state]:
+                hits.setdefault(table, set()).add(category)
+        return IntentMatch({table: frozenset(cats) for table, cats in hits.items()}, self.tables)
+
+
+_intent_engine = IntentEngine(INTENT_TABLES)
+
+
+@lru_cache(maxsize=4096)
+def match_intents(text):
+    """Scan a message with the shared engine, caching results per text."""
+    return _intent_engine.scan(text)
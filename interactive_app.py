@@ -4,7 +4,10 @@ Enhanced with natural language understanding and conversational AI.
 """
 
 import gradio as gr
-from recommendation import get_recommendations, format_recommendations
+from recommendation import get_recommendations_response, format_recommendations, record_feedback, precompute_canned_answers, cache_stats, serving_stats
+from intent_engine import match_intents
+from worker_pool import BUSY_MESSAGE, GRADIO_QUEUE_KWARGS, QueueFullError, get_engine_pool
+from deadlines import LATENCY_BUDGET_MS
 import re
 import random
 
@@ -165,79 +168,19 @@ I'm your intelligent game recommendation assistant! I can understand natural lan
 
 def analyze_user_intent(text):
     """Analyze user input to understand their intent and extract key information."""
-    text_lower = text.lower()
-    
-    # Extract mood indicators
-    mood_indicators = {
-        'happy': ['happy', 'cheerful', 'excited', 'joyful', 'upbeat', 'positive', 'good mood'],
-        'sad': ['sad', 'depressed', 'down', 'blue', 'melancholy', 'gloomy', 'feeling low'],
-        'stressed': ['stressed', 'anxious', 'overwhelmed', 'tense', 'worried', 'pressure'],
-        'chill': ['chill', 'relaxed', 'calm', 'peaceful', 'zen', 'mellow', 'laid back'],
-        'bored': ['bored', 'boring', 'nothing to do', 'uninterested', 'tired of', 'stuck'],
-        'excited': ['excited', 'pumped', 'thrilled', 'energetic', 'hyped', 'ready for action']
-    }
-    
-    detected_mood = 'any'
-    for mood, keywords in mood_indicators.items():
-        if any(keyword in text_lower for keyword in keywords):
-            detected_mood = mood
-            break
-    
-    # Extract time constraints
-    time_indicators = {
-        'quick': ['quick', 'fast', 'short', '30 minutes', '15 minutes', 'brief', 'casual'],
-        'long': ['long', 'extended', 'hours', 'all day', 'marathon', 'deep dive'],
-        'any': ['any time', 'flexible', 'whenever']
-    }
-    
-    time_preference = 'any'
-    for time_type, keywords in time_indicators.items():
-        if any(keyword in text_lower for keyword in keywords):
-            time_preference = time_type
-            break
-    
-    # Extract social preferences
-    social_indicators = {
-        'solo': ['alone', 'solo', 'by myself', 'single player', 'personal'],
-        'multiplayer': ['friends', 'multiplayer', 'together', 'co-op', 'social', 'with others'],
-        'competitive': ['competitive', 'vs', 'against', 'challenge', 'battle', 'fight']
-    }
-    
-    social_preference = 'any'
-    for social_type, keywords in social_indicators.items():
-        if any(keyword in text_lower for keyword in keywords):
-            social_preference = social_type
-            break
-    
-    # Extract learning goals
-    learning_indicators = ['learn', 'education', 'skill', 'practice', 'improve', 'study', 'knowledge']
-    wants_learning = any(indicator in text_lower for indicator in learning_indicators)
-    
-    # Extract genre preferences
-    genre_indicators = {
-        'adventure': ['adventure', 'explore', 'journey', 'quest', 'discovery'],
-        'puzzle': ['puzzle', 'brain', 'think', 'logic', 'challenge', 'problem solving'],
-        'action': ['action', 'fast', 'intense', 'thrilling', 'exciting', 'adrenaline'],
-        'strategy': ['strategy', 'planning', 'tactical', 'thinking', 'management'],
-        'creative': ['creative', 'build', 'design', 'art', 'craft', 'create'],
-        'story': ['story', 'narrative', 'plot', 'characters', 'drama', 'cinematic']
-    }
-    
-    detected_genres = []
-    for genre, keywords in genre_indicators.items():
-        if any(keyword in text_lower for keyword in keywords):
-            detected_genres.append(genre)
+    # One pass over the text covers every keyword table (cached per text)
+    matches = match_intents(text)
     
     return {
-        'mood': detected_mood,
-        'time': time_preference,
-        'social': social_preference,
-        'learning': wants_learning,
-        'genres': detected_genres,
+        'mood': matches.first('mood', 'any'),
+        'time': matches.first('time', 'any'),
+        'social': matches.first('social', 'any'),
+        'learning': matches.has('learning'),
+        'genres': matches.all('genre'),
         'original_text': text
     }
 
-def generate_personalized_response(intent_analysis, recommendations, explanation):
+def generate_personalized_response(intent_analysis, recommendations, explanation, formatted_recs=None):
     """Generate a personalized, conversational response based on user intent."""
     mood = intent_analysis['mood']
     time_pref = intent_analysis['time']
@@ -287,7 +230,9 @@ def generate_personalized_response(intent_analysis, recommendations, explanation
     if context:
         response += f"**Based on what you told me:** {context}\n\n"
     
-    response += f"**Here are my recommendations:**\n\n{format_recommendations(recommendations)}"
+    if formatted_recs is None:
+        formatted_recs = format_recommendations(recommendations)
+    response += f"**Here are my recommendations:**\n\n{formatted_recs}"
     
     # Add personalized closing
     closings = [
@@ -302,41 +247,52 @@ def generate_personalized_response(intent_analysis, recommendations, explanation
     
     return response
 
-def get_smart_recommendations(user_input, mood):
-    """Get intelligent recommendations based on natural language understanding."""
+def get_smart_recommendations(user_input, mood, session_id=None):
+    """
+    Get intelligent recommendations based on natural language understanding.
+    Returns the response text and the recommendations shown.
+    """
     # Analyze the user's intent
     intent_analysis = analyze_user_intent(user_input)
     
-    # Get recommendations using the analyzed intent
-    recommendations, explanation = get_recommendations(user_input, mood)
+    # Get recommendations using the analyzed intent (personalized per session)
+    recommendations, explanation, formatted_recs, _ = get_recommendations_response(user_input, mood, session_id=session_id,
+                                                                                   budget_ms=LATENCY_BUDGET_MS)
     
     # Generate personalized response
     if recommendations:
-        response = generate_personalized_response(intent_analysis, recommendations, explanation)
+        response = generate_personalized_response(intent_analysis, recommendations, explanation, formatted_recs)
     else:
         response = f"🤖 **GameBot:** I understand you're looking for something, but I need a bit more information to give you the best recommendations.\n\n**Could you tell me more about:**\n• What kind of experience you're seeking?\n• How much time you have?\n• Whether you want to play alone or with others?\n• Any specific genres or styles you prefer?\n\n**Or try asking me something like:**\n• \"I want something relaxing for 30 minutes\"\n• \"I need an exciting game to play with friends\"\n• \"I'm looking for a challenging puzzle game\""
     
-    return response
+    return response, recommendations
+
+# Conversation starters shown as clickable suggestions; answers are precomputed at startup
+CONVERSATION_SUGGESTIONS = [
+    "I'm bored and want something exciting",
+    "I need something relaxing after work",
+    "I want to play with my friends tonight",
+    "I have 30 minutes to kill",
+    "I'm feeling sad and need cheering up",
+    "I want to learn something new",
+    "I'm looking for a good story game",
+    "I need a challenging puzzle game",
+    "I want something creative to build",
+    "I'm stressed and need to unwind"
+]
+
+MOOD_CHOICES = ["Any", "Happy", "Sad", "Chill", "Stressed", "Bored", "Excited"]
 
 def get_conversation_suggestions():
     """Generate dynamic conversation suggestions based on common patterns."""
-    suggestions = [
-        "I'm bored and want something exciting",
-        "I need something relaxing after work",
-        "I want to play with my friends tonight",
-        "I have 30 minutes to kill",
-        "I'm feeling sad and need cheering up",
-        "I want to learn something new",
-        "I'm looking for a good story game",
-        "I need a challenging puzzle game",
-        "I want something creative to build",
-        "I'm stressed and need to unwind"
-    ]
-    return random.sample(suggestions, 5)
+    return random.sample(CONVERSATION_SUGGESTIONS, 5)
 
 def main():
     """Create and launch the interactive Gradio interface."""
     
+    # Answer every suggestion ahead of time so clicks never hit the model
+    precompute_canned_answers(CONVERSATION_SUGGESTIONS, MOOD_CHOICES)
+    
     with gr.Blocks(css=custom_css, title="GameBot - Interactive AI Game Recommendations") as demo:
         
         # Header section
@@ -357,7 +313,7 @@ def main():
                 
                 # Mood selector
                 mood_selector = gr.Dropdown(
-                    choices=["Any", "Happy", "Sad", "Chill", "Stressed", "Bored", "Excited"],
+                    choices=MOOD_CHOICES,
                     value="Any",
                     label="🎭 How are you feeling? (Optional - I'll also detect your mood from your message!)",
                     info="This helps me personalize recommendations even better!"
@@ -401,6 +357,14 @@ def main():
                     elem_classes=["output-section"]
                 )
                 
+                # Feedback for session personalization
+                liked_games = gr.Dropdown(
+                    choices=[],
+                    value=None,
+                    label="❤️ Liked one of these?",
+                    info="I'll tailor your next recommendations to it and skip games you've already seen"
+                )
+                
                 gr.HTML('</div>')
         
         # Information panel
@@ -417,33 +381,68 @@ def main():
                 </div>
                 """)
         
+        # Engine load (queue depth, wait times, rejections), cache hit rates and serving modes
+        with gr.Accordion("📊 Server load", open=False):
+            load_stats = gr.JSON(label="Engine pool")
+            cache_stats_json = gr.JSON(label="Caches")
+            serving_stats_json = gr.JSON(label="Serving modes")
+            refresh_stats_btn = gr.Button("🔄 Refresh", variant="secondary", elem_classes=["btn-secondary"])
+        
         # Event handlers
-        def process_request(input_text, mood):
+        async def process_request(input_text, mood, request: gr.Request):
             if not input_text.strip():
-                return create_welcome_message()
-            return get_smart_recommendations(input_text, mood)
+                return create_welcome_message(), gr.update(choices=[], value=None)
+            try:
+                # Engine work runs in the shared bounded pool, not on the event loop
+                response, recommendations = await get_engine_pool().run(
+                    get_smart_recommendations, input_text, mood, session_id=request.session_hash)
+            except QueueFullError:
+                return BUSY_MESSAGE, gr.update(choices=[], value=None)
+            return response, gr.update(choices=[game['name'] for game in recommendations], value=None)
+        
+        async def record_like(game_name, request: gr.Request):
+            if game_name:
+                try:
+                    await get_engine_pool().run(record_feedback, request.session_hash, [game_name])
+                except QueueFullError:
+                    pass  # Feedback is best-effort under load
         
         def clear_conversation():
-            return create_welcome_message()
+            return create_welcome_message(), gr.update(choices=[], value=None)
         
         # Connect the interface
         get_recs_btn.click(
             process_request, 
             inputs=[user_input, mood_selector], 
-            outputs=output_text
+            outputs=[output_text, liked_games]
         )
         
         user_input.submit(
             process_request, 
             inputs=[user_input, mood_selector], 
-            outputs=output_text
+            outputs=[output_text, liked_games]
+        )
+        
+        liked_games.input(
+            record_like,
+            inputs=liked_games,
+            outputs=None
         )
         
         clear_btn.click(
             clear_conversation, 
             inputs=None, 
-            outputs=output_text
+            outputs=[output_text, liked_games]
         )
+
+        refresh_stats_btn.click(
+            lambda: (get_engine_pool().stats(), cache_stats(), serving_stats()),
+            inputs=None,
+            outputs=[load_stats, cache_stats_json, serving_stats_json]
+        )
+    
+    # Bounded Gradio queue; engine work is rejected fast once the pool is full
+    demo.queue(**GRADIO_QUEUE_KWARGS)
     
     # Launch the interface
     demo.launch(
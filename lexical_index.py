@@ -0,0 +1,226 @@
+"""
+Lexical (BM25) retrieval over the game catalog.
+Complements the FAISS embedding search with exact title and keyword matching,
+and lets clear keyword queries be answered without encoding the query.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Small stop list so filler words in chat-style queries don't dominate BM25
+STOP_WORDS = frozenset([
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'game',
+    'games', 'have', 'i', 'im', 'in', 'is', 'it', 'like', 'me', 'my', 'of', 'on',
+    'or', 'play', 'some', 'something', 'that', 'the', 'to', 'want', 'with', 'you'
+])
+
+# Title and genre hits count more than a word buried in a review
+DEFAULT_FIELD_WEIGHTS = {
+    'Game Title': 3,
+    'Genre': 2,
+    'User Review Text': 1,
+}
+
+
+def tokenize(text):
+    """Lowercase and split text into alphanumeric tokens, dropping stop words."""
+    return [tok for tok in TOKEN_PATTERN.findall(str(text).lower()) if tok not in STOP_WORDS]
+
+
+def normalize_title(text):
+    """Normalize a title or query for exact title lookup."""
+    return " ".join(TOKEN_PATTERN.findall(str(text).lower()))
+
+
+def reciprocal_rank_fusion(ranked_lists, k=60):
+    """
+    Fuse several ranked lists of row ids with reciprocal-rank fusion.
+
+    Args:
+        ranked_lists: Iterable of row id sequences, best first
+        k: RRF damping constant
+
+    Returns:
+        List of (row_id, fused_score) sorted by fused score, best first
+    """
+    fused = {}
+    for ranked in ranked_lists:
+        for rank, idx in enumerate(ranked):
+            idx = int(idx)
+            fused[idx] = fused.get(idx, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class LexicalIndex:
+    """
+    Inverted index with BM25 scoring over title, genre and review text.
+
+    Per-posting BM25 weights are precomputed at build time, so scoring a query
+    is a single weighted bincount over the postings of its terms.
+    """
+    def __init__(self, k1=1.2, b=0.75, field_weights=None):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        self.num_docs = 0
+        self.postings = {}
+        self.title_lookup = {}
+        self.row_titles = np.empty(0, dtype=np.int32)
+
+    def build(self, df):
+        """Build the index from a catalog DataFrame."""
+        self.num_docs = len(df)
+        columns = [col for col in self.field_weights if col in df.columns]
+        field_values = [df[col].astype(str).tolist() for col in columns]
+
+        doc_terms = []
+        doc_lengths = np.zeros(self.num_docs, dtype=np.float32)
+        for doc_id in range(self.num_docs):
+            counts = Counter()
+            for col, values in zip(columns, field_values):
+                weight = self.field_weights[col]
+                for tok in tokenize(values[doc_id]):
+                    counts[tok] += weight
+            doc_terms.append(counts)
+            doc_lengths[doc_id] = sum(counts.values())
+
+        avg_length = float(doc_lengths.mean()) if self.num_docs else 0.0
+        length_norm = self.k1 * (1 - self.b + self.b * doc_lengths / max(avg_length, 1e-9))
+
+        raw_postings = {}
+        for doc_id, counts in enumerate(doc_terms):
+            for term, tf in counts.items():
+                raw_postings.setdefault(term, ([], []))
+                raw_postings[term][0].append(doc_id)
+                raw_postings[term][1].append(tf)
+
+        self.postings = {}
+        for term, (doc_ids, tfs) in raw_postings.items():
+            doc_ids = np.asarray(doc_ids, dtype=np.int32)
+            tfs = np.asarray(tfs, dtype=np.float32)
+            df_t = len(doc_ids)
+            idf = np.log(1 + (self.num_docs - df_t + 0.5) / (df_t + 0.5))
+            weights = idf * tfs * (self.k1 + 1) / (tfs + length_norm[doc_ids])
+            self.postings[term] = (doc_ids, weights.astype(np.float32))
+
+        self.title_lookup = {}
+        # Title id of every row: review-level catalogs repeat a game across rows
+        self.row_titles = np.arange(self.num_docs, dtype=np.int32)
+        if 'Game Title' in df.columns:
+            for doc_id, title in enumerate(df['Game Title'].astype(str).tolist()):
+                self.title_lookup.setdefault(normalize_title(title), []).append(doc_id)
+            for title_id, doc_ids in enumerate(self.title_lookup.values()):
+                self.row_titles[doc_ids] = title_id
+
+        print(f"Lexical index built: {len(self.postings)} terms over {self.num_docs} games")
+        return self
+
+    def score(self, query):
+        """Return the BM25 score of every document for a query."""
+        terms = [term for term in tokenize(query) if term in self.postings]
+        if not terms:
+            return np.zeros(self.num_docs, dtype=np.float32)
+        doc_ids = np.concatenate([self.postings[term][0] for term in terms])
+        weights = np.concatenate([self.postings[term][1] for term in terms])
+        return np.bincount(doc_ids, weights=weights, minlength=self.num_docs)
+
+    def search(self, query, top_k=5):
+        """
+        Find top-k documents for a query.
+
+        Returns:
+            Tuple of (row_ids, scores) arrays, best first, only matching rows
+        """
+        scores = self.score(query)
+        matched = np.flatnonzero(scores)
+        if len(matched) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if len(matched) > top_k:
+            top = np.argpartition(-scores[matched], top_k - 1)[:top_k]
+            matched = matched[top]
+        order = np.argsort(-scores[matched], kind='stable')
+        matched = matched[order]
+        return matched, scores[matched]
+
+    def exact_title(self, query):
+        """Return row ids whose title exactly matches the query, or an empty list."""
+        return self.title_lookup.get(normalize_title(query), [])
+
+    def distinct_titles(self, ranked, limit):
+        """First `limit` (row_id, score) entries of a ranked list, keeping one row per title."""
+        seen, distinct = set(), []
+        for idx, score in ranked:
+            title = int(self.row_titles[idx])
+            if title not in seen:
+                seen.add(title)
+                distinct.append((idx, score))
+                if len(distinct) == limit:
+                    break
+        return distinct
+
+    def is_keyword_query(self, query, max_terms=3):
+        """
+        Check whether a query is a clear keyword query the lexical index can answer alone:
+        a few words (not a chatty sentence), every content word present in the index.
+        """
+        if len(TOKEN_PATTERN.findall(str(query).lower())) > max_terms:
+            return False
+        terms = tokenize(query)
+        return bool(terms) and all(term in self.postings for term in terms)
+
+
+def hybrid_search(lexical_index, query, dense_search, top_k=5, candidates=50, rrf_k=60,
+                  min_results=None, related=None, keyword_shortcut=True):
+    """
+    Rank catalog rows for a query by fusing BM25 and embedding results.
+
+    Clear keyword queries that the lexical index can fill on its own are answered
+    without calling dense_search, so no query encode is paid; like exact titles,
+    they keep one row per title. An exact title is answered from the lexical side
+    too: that game first, then the games `related` lists for it (e.g. from the
+    precomputed neighbor table), then other BM25 hits.
+
+    Args:
+        lexical_index: Built LexicalIndex
+        query: User's query string
+        dense_search: Callable (query, k) -> (row_ids, scores) over the embedding index
+        top_k: Number of results to return
+        candidates: Depth of each ranked list fed into the fusion
+        rrf_k: RRF damping constant
+        min_results: Lexical hits a keyword query needs to skip the dense search
+            (defaults to top_k; set lower when top_k is an over-fetch depth)
+        related: Optional callable (row_id, k) -> list of (row_id, score) of games
+            similar to that row's game, used to pad exact-title results
+        keyword_shortcut: Answer clear keyword queries from BM25 alone; pass False
+            when the caller drops results afterwards (e.g. games a session has seen)
+            and needs the dense list to draw on
+
+    Returns:
+        Tuple of (list of (row_id, score), used_dense) with scores scaled to [0, 1]
+    """
+    lexical_ids, lexical_scores = lexical_index.search(query, top_k=max(candidates, top_k))
+    top_score = float(lexical_scores[0]) if len(lexical_scores) else 1.0
+    lexical_ranked = [(int(idx), float(score) / top_score) for idx, score in zip(lexical_ids, lexical_scores)]
+
+    title_rows = lexical_index.exact_title(query)
+    if title_rows:
+        ranked = [(int(title_rows[0]), 1.0)]
+        if related is not None:
+            ranked += related(int(title_rows[0]), top_k)
+        return lexical_index.distinct_titles(ranked + lexical_ranked, top_k), False
+
+    min_results = top_k if min_results is None else min_results
+    if keyword_shortcut and lexical_index.is_keyword_query(query):
+        distinct = lexical_index.distinct_titles(lexical_ranked, top_k)
+        if len(distinct) >= min_results:
+            return distinct, False
+
+    dense_ids, _ = dense_search(query, max(candidates, top_k))
+    fused = reciprocal_rank_fusion([dense_ids, lexical_ids], k=rrf_k)
+    max_fused = 2.0 / (rrf_k + 1)
+    ranked = [(idx, score / max_fused) for idx, score in fused]
+    return ranked[:top_k], True
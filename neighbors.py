@@ -0,0 +1,216 @@
+"""
+Precomputed "more like this" neighbor table.
+Batch job that finds the top-K most similar games of every game with blocked
+matrix multiplication over the stored embeddings, and an O(1) lookup for serving.
+The review-level catalog repeats a game across rows, so each game (title) is
+represented by the normalized mean of its rows' embeddings and the table is keyed
+by title id. The table is saved with the fingerprint of the embeddings it was
+computed from (catalog texts and model), so it is never served for another catalog.
+
+Usage:
+    python neighbors.py --embeddings embeddings/game_embeddings.npy --k 20 [--csv video_game_reviews.csv]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from encoding import read_embeddings_meta
+
+NEIGHBOR_IDS_FILE = "neighbor_ids.npy"
+NEIGHBOR_SCORES_FILE = "neighbor_scores.npy"
+NEIGHBOR_META_FILE = "neighbor_meta.json"
+
+
+def embeddings_fingerprint(embeddings_path):
+    """
+    Fingerprint of the catalog and model a saved embeddings file was encoded from
+    (read from its metadata), or None for a file saved without metadata.
+    """
+    meta = read_embeddings_meta(embeddings_path)
+    if meta is None or meta.get('fingerprint') is None:
+        return None
+    return hashlib.sha1(f"{meta['fingerprint']}\0{meta.get('model')}".encode('utf-8')).hexdigest()
+
+
+def title_centroids(embeddings, title_ids, block_size=65536):
+    """
+    Normalized mean embedding of every title.
+
+    Args:
+        embeddings: (n, dim) row embeddings (may be memory-mapped; read block by block)
+        title_ids: (n,) title id of every row, 0..num_titles-1
+
+    Returns:
+        (num_titles, dim) float32 matrix
+    """
+    title_ids = np.asarray(title_ids, dtype=np.int64)
+    num_titles = int(title_ids.max()) + 1 if len(title_ids) else 0
+    sums = np.zeros((num_titles, embeddings.shape[1]), dtype=np.float32)
+    for start in range(0, len(embeddings), block_size):
+        np.add.at(sums, title_ids[start:start + block_size],
+                  np.asarray(embeddings[start:start + block_size], dtype=np.float32))
+    norms = np.linalg.norm(sums, axis=1, keepdims=True)
+    return sums / np.where(norms > 0, norms, 1.0)
+
+
+def _block_top_k(embeddings, start, stop, k, col_block):
+    """Top-k neighbors of rows [start, stop) against all rows, one column block at a time."""
+    queries = np.asarray(embeddings[start:stop], dtype=np.float32)
+    rows = np.arange(start, stop)
+    best_scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+    best_ids = np.full((len(rows), k), -1, dtype=np.int64)
+
+    for col_start in range(0, len(embeddings), col_block):
+        col_stop = min(col_start + col_block, len(embeddings))
+        sims = queries @ np.asarray(embeddings[col_start:col_stop], dtype=np.float32).T
+        cols = np.arange(col_start, col_stop)
+
+        # Never recommend a game as similar to itself
+        sims[rows[:, None] == cols[None, :]] = -np.inf
+
+        scores = np.concatenate([best_scores, sims], axis=1)
+        ids = np.concatenate([best_ids, np.broadcast_to(cols, sims.shape)], axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+
+    order = np.argsort(-best_scores, axis=1, kind='stable')
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_ids = np.take_along_axis(best_ids, order, axis=1)
+    best_ids[~np.isfinite(best_scores)] = -1
+    return best_ids, best_scores
+
+
+def compute_neighbor_table(embeddings, k=20, block_size=2048, workers=None):
+    """
+    Compute the top-k neighbors of every game (one embedding per game, e.g. title_centroids).
+
+    Work is split into row blocks processed in parallel threads (NumPy's matmul
+    releases the GIL); each block walks the catalog in column blocks, so memory
+    per worker stays at block_size x block_size scores regardless of catalog size.
+
+    Args:
+        embeddings: Normalized (n, dim) embedding matrix (may be memory-mapped)
+        k: Neighbors to keep per game
+        block_size: Rows/columns per block
+        workers: Parallel workers (defaults to the number of CPU cores)
+
+    Returns:
+        Tuple of (ids int32 (n, k), scores float16 (n, k)); missing neighbors are -1
+    """
+    n = len(embeddings)
+    k = max(1, min(k, n - 1))
+    workers = workers or os.cpu_count() or 1
+
+    ids = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float16)
+    starts = list(range(0, n, block_size))
+
+    def run(start):
+        stop = min(start + block_size, n)
+        block_ids, block_scores = _block_top_k(embeddings, start, stop, k, block_size)
+        ids[start:stop] = block_ids
+        scores[start:stop] = np.where(np.isfinite(block_scores), block_scores, 0.0)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run, starts))
+    return ids, scores
+
+
+class NeighborTable:
+    """Compact int32/float16 neighbor arrays with constant-time lookup by game (title) id."""
+    def __init__(self, ids, scores, fingerprint=None):
+        """
+        Args:
+            ids: (num_games, k) neighbor ids, -1 where missing
+            scores: (num_games, k) neighbor similarities
+            fingerprint: Fingerprint of the source embeddings (see embeddings_fingerprint)
+        """
+        self.ids = ids
+        self.scores = scores
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.ids)
+
+    def lookup(self, game_id, top_k=5):
+        """Return up to top_k (neighbor_id, score) pairs for a game id."""
+        row_ids = self.ids[game_id, :top_k]
+        row_scores = self.scores[game_id, :top_k]
+        return [(int(idx), float(score)) for idx, score in zip(row_ids, row_scores) if idx >= 0]
+
+    def save(self, directory):
+        """
+        Save the table next to the embeddings. Files are written under temporary
+        names and renamed into place, so snapshots memory-mapping the previous table
+        keep reading it; its metadata is removed first and written last, so a load
+        during the swap finds no table rather than a mix of old and new files.
+        """
+        meta_path = os.path.join(directory, NEIGHBOR_META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        for name, array in ((NEIGHBOR_IDS_FILE, self.ids), (NEIGHBOR_SCORES_FILE, self.scores)):
+            path = os.path.join(directory, name)
+            np.save(path + ".tmp.npy", array)
+            os.replace(path + ".tmp.npy", path)
+        with open(meta_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'num_games': len(self.ids)}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @classmethod
+    def load(cls, directory, fingerprint=None):
+        """
+        Load a saved table, or return None if there is none or, when fingerprint is
+        given, it was computed from other embeddings (tables saved without a
+        fingerprint are then rejected too).
+        """
+        ids_path = os.path.join(directory, NEIGHBOR_IDS_FILE)
+        scores_path = os.path.join(directory, NEIGHBOR_SCORES_FILE)
+        meta_path = os.path.join(directory, NEIGHBOR_META_FILE)
+        if not (os.path.exists(ids_path) and os.path.exists(scores_path)):
+            return None
+        saved_fingerprint = None
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                saved_fingerprint = json.load(f).get('fingerprint')
+        if fingerprint is not None and saved_fingerprint != fingerprint:
+            return None
+        return cls(np.load(ids_path, mmap_mode='r'), np.load(scores_path, mmap_mode='r'), saved_fingerprint)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the 'more like this' neighbor table.")
+    parser.add_argument("--embeddings", default=os.path.join("embeddings", "game_embeddings.npy"))
+    parser.add_argument("--k", type=int, default=20, help="neighbors per game")
+    parser.add_argument("--block-size", type=int, default=2048)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--csv", default=None,
+                        help="catalog CSV the embeddings were built from; rows of the same title form one game")
+    args = parser.parse_args()
+
+    embeddings = np.load(args.embeddings, mmap_mode='r')
+    if args.csv:
+        import pandas as pd
+        # Same title ids as BaseRecommender.index_titles (order of first appearance)
+        titles = pd.read_csv(args.csv, usecols=['Game Title'])['Game Title'].fillna('Unknown').astype(str)
+        title_ids, _ = pd.factorize(titles)
+        embeddings = title_centroids(embeddings, title_ids)
+
+    print(f"Computing top-{args.k} neighbors for {len(embeddings)} games...")
+    start = time.perf_counter()
+    ids, scores = compute_neighbor_table(embeddings, k=args.k, block_size=args.block_size, workers=args.workers)
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+    directory = os.path.dirname(args.embeddings) or "."
+    NeighborTable(ids, scores, embeddings_fingerprint(args.embeddings)).save(directory)
+    print(f"Saved neighbor table to {directory} ({ids.nbytes + scores.nbytes:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,39 +4,19 @@ This module extracts and adapts the working code from game_recommender.ipynb
 """
 
 import pandas as pd
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.preprocessing import normalize
-import torch
 import os
-import faiss
 import re
-import spacy
-from sklearn.preprocessing import MinMaxScaler
+from catalog import compact_catalog
+from hot_reload import SnapshotManager
+from recommender_base import BaseRecommender
 import warnings
 warnings.filterwarnings('ignore')
 
-class NotebookGameRecommender:
+class NotebookGameRecommender(BaseRecommender):
     """
     Direct implementation of the GameRecommender from the Jupyter notebook.
     """
-    def __init__(self, model_name='all-mpnet-base-v2', device=None, embedding_dir="embeddings"):
-        self.device = device if device else ('cuda' if torch.cuda.is_available() else 'cpu')
-        print(f"Using device: {self.device}")
-        self.model = SentenceTransformer(model_name, device=self.device)
-        self.embedding_dir = embedding_dir
-        os.makedirs(self.embedding_dir, exist_ok=True)
-        self.game_embeddings = None
-        self.game_names = None
-        self.index = None
-        self.df = None
-        
-        # Initialize spaCy for text preprocessing
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("spaCy model not found. Text preprocessing will be basic.")
-            self.nlp = None
+    SPACY_MISSING_MESSAGE = "spaCy model not found. Text preprocessing will be basic."
 
     def load_kaggle_data(self):
         """Load data from Kaggle dataset as in the notebook."""
@@ -131,70 +111,13 @@ class NotebookGameRecommender:
         # Fill missing values
         df = df.fillna('Unknown')
         
+        # Serve from a compact columnar catalog (categoricals, Arrow strings, float32)
+        df = compact_catalog(df)
+        
         print("Data preprocessing completed")
         return df
 
-    def prepare_text(self, df):
-        """Combine all textual features into a single string per game."""
-        combined = (
-            df['Game Title'].astype(str) + " | " +
-            df['Genre'].astype(str) + " | " +
-            df['User Review Text'].astype(str) + " | " +
-            "Age: " + df['Age Group Targeted'].astype(str) + " | " +
-            "Graphics: " + df['Graphics Quality'].astype(str)
-        )
-        return combined
-
-    def encode_games(self, df):
-        """Encode all games and save/load embeddings."""
-        self.game_names = df['Game Title'].tolist()
-        embedding_path = os.path.join(self.embedding_dir, "game_embeddings.npy")
-
-        if os.path.exists(embedding_path):
-            print(f"Loading game embeddings from {embedding_path}")
-            self.game_embeddings = np.load(embedding_path)
-        else:
-            print("Encoding game embeddings...")
-            combined_texts = self.prepare_text(df).tolist()
-            self.game_embeddings = self.model.encode(
-                combined_texts,
-                convert_to_tensor=False,
-                batch_size=64,
-                show_progress_bar=True
-            )
-            # Normalize embeddings
-            self.game_embeddings = normalize(self.game_embeddings)
-            np.save(embedding_path, self.game_embeddings)
-            print(f"Saved embeddings to {embedding_path}")
-
-        # Build FAISS index
-        dim = self.game_embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dim)  # inner product on normalized = cosine similarity
-        self.index.add(self.game_embeddings.astype('float32'))
-        print("FAISS index built.")
-
-    def query(self, user_input, top_k=5):
-        """Find top-k games based on a user query."""
-        if self.index is None:
-            raise ValueError("Model not initialized. Call encode_games() first.")
-            
-        user_emb = self.model.encode([user_input], convert_to_tensor=False)
-        user_emb = normalize(user_emb)
-        D, I = self.index.search(user_emb.astype('float32'), k=top_k)
-        results = [(self.game_names[idx], float(score)) for idx, score in zip(I[0], D[0])]
-        return results
-
-    def get_game_details(self, game_name):
-        """Get detailed information about a specific game."""
-        if self.df is None:
-            return None
-            
-        game_info = self.df[self.df['Game Title'] == game_name]
-        if len(game_info) > 0:
-            return game_info.iloc[0].to_dict()
-        return None
-
-    def initialize(self):
+    def initialize(self, force_encode=False):
         """Complete initialization: load data, preprocess, and encode games."""
         print("Initializing Notebook Game Recommender...")
         
@@ -205,22 +128,34 @@ class NotebookGameRecommender:
         self.df = self.preprocess_data(self.df)
         
         # Encode games
-        self.encode_games(self.df)
+        self.encode_games(self.df, force_encode=force_encode)
         
         print("Notebook Game Recommender ready!")
 
-# Global recommender instance
-_notebook_recommender = None
+
+def _build_notebook_recommender(previous=None):
+    """Build a fully initialized recommender, reusing the previous one's model on reloads."""
+    recommender = NotebookGameRecommender.for_reload(previous, device='cpu')
+    # Saved embeddings are reused if the catalog is unchanged; otherwise encoding resumes from checkpoints
+    recommender.initialize()
+    recommender.adopt_settings(previous)
+    return recommender
+
+# Global recommender snapshots (swapped atomically on reload)
+_notebook_recommender = SnapshotManager(_build_notebook_recommender, name="NotebookGameRecommender")
 
 def get_notebook_recommender():
     """Get or create the global notebook recommender instance."""
-    global _notebook_recommender
-    if _notebook_recommender is None:
-        _notebook_recommender = NotebookGameRecommender(device='cpu')
-        _notebook_recommender.initialize()
-    return _notebook_recommender
+    return _notebook_recommender.current()
 
-def get_notebook_recommendations(user_input, mood=None, top_k=5):
+def reload_notebook_recommender(wait=False):
+    """
+    Rebuild the catalog and index in the background and swap them in atomically.
+    Queries already running finish on the previous snapshot.
+    """
+    return _notebook_recommender.reload(wait=wait)
+
+def get_notebook_recommendations(user_input, mood=None, top_k=5, diversity=None, session_id=None):
     """
     Get game recommendations using the notebook's ML model.
     
@@ -228,14 +163,68 @@ def get_notebook_recommendations(user_input, mood=None, top_k=5):
         user_input: User's query string
         mood: Optional mood filter (not used in current implementation)
         top_k: Number of recommendations to return
+        diversity: Optional MMR lambda for diverse results (1.0 = pure relevance)
+        session_id: Optional chat session for personalization
     
     Returns:
         List of tuples (game_name, similarity_score)
     """
-    recommender = get_notebook_recommender()
-    return recommender.query(user_input, top_k=top_k)
+    with _notebook_recommender.acquire() as recommender:
+        return recommender.hybrid_query(user_input, top_k=top_k, diversity=diversity, session_id=session_id)
+
+def record_notebook_feedback(session_id, game_names):
+    """Record liked or clicked games for a chat session."""
+    with _notebook_recommender.acquire() as recommender:
+        recommender.record_feedback(session_id, game_names)
+
+def has_notebook_session_state(session_id):
+    """Whether a chat session has feedback or shown games (its results are personal)."""
+    with _notebook_recommender.acquire() as recommender:
+        return recommender.has_session_state(session_id)
+
+def mark_notebook_shown(session_id, game_names):
+    """Record games shown to a chat session from a cached response."""
+    with _notebook_recommender.acquire() as recommender:
+        recommender.mark_shown(session_id, game_names)
+
+def get_notebook_similar_games(game_name, top_k=5):
+    """Get games similar to a game title from the precomputed neighbor table."""
+    with _notebook_recommender.acquire() as recommender:
+        return recommender.similar_games(game_name, top_k=top_k)
+
+def get_notebook_index_version():
+    """Version token of the current catalog/index (changes whenever it is rebuilt)."""
+    with _notebook_recommender.acquire() as recommender:
+        return recommender.index_version
 
 def get_notebook_game_info(game_name):
     """Get detailed information about a specific game."""
-    recommender = get_notebook_recommender()
-    return recommender.get_game_details(game_name)
+    with _notebook_recommender.acquire() as recommender:
+        return recommender.get_game_details(game_name)
+
+def get_notebook_game_cards(game_names):
+    """Get pre-rendered result cards for a list of game titles."""
+    with _notebook_recommender.acquire() as recommender:
+        return recommender.game_cards(game_names)
+
+def get_notebook_cache_stats():
+    """Semantic query cache metrics of the current recommender (None when disabled)."""
+    with _notebook_recommender.acquire() as recommender:
+        return recommender.semantic_cache.stats() if recommender.semantic_cache is not None else None
+
+def get_notebook_deadline_recommendations(user_input, deadline, top_k=5, diversity=None, session_id=None):
+    """
+    Get game recommendations before a deadline (time.perf_counter() value), in the
+    most complete query mode that still fits.
+
+    Returns:
+        Tuple of (list of (game_name, similarity_score), mode)
+    """
+    with _notebook_recommender.acquire() as recommender:
+        return recommender.deadline_query(user_input, deadline, top_k=top_k, diversity=diversity,
+                                          session_id=session_id)
+
+def get_notebook_title_popularity():
+    """Get the number of reviews per game title in the current catalog."""
+    with _notebook_recommender.acquire() as recommender:
+        return recommender.title_popularity()
@@ -5,11 +5,23 @@ Integration with the ML-based recommendation system from Jupyter notebook.
 
 from typing import List, Dict, Optional, Tuple
 import sys
+import threading
+import time
+from collections import Counter, deque
 from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
+
+from intent_engine import match_intents
+from response_cache import ResponseCache, normalize_query
+from result_cards import format_cards, render_card
+from worker_pool import QueueFullError, get_engine_pool, task_submitted_at
+from typeahead import PrefixIndex
 
 # Import the notebook-based recommendation engine
 try:
-    from notebook_integration import get_notebook_recommendations as get_ml_recommendations, get_notebook_game_info as get_game_info
+    from notebook_integration import get_notebook_recommendations as get_ml_recommendations, get_notebook_game_cards as get_game_cards, get_notebook_index_version as get_ml_index_version, record_notebook_feedback as record_ml_feedback, get_notebook_cache_stats as get_ml_cache_stats, get_notebook_deadline_recommendations as get_ml_deadline_recommendations, get_notebook_title_popularity as get_ml_title_popularity, has_notebook_session_state as has_ml_session_state, mark_notebook_shown as mark_ml_shown
     ML_ENGINE_AVAILABLE = True
     print("✅ Notebook ML recommendation engine loaded successfully!")
 except ImportError as e:
@@ -64,78 +76,280 @@ GAME_DATABASE = {
     ]
 }
 
+# Maps each parse_user_intent rule (see intent_engine.INTENT_TABLES['intent_rules'])
+# to the recommendation category it selects. Rules are checked in table order.
+INTENT_RULE_CATEGORIES = {
+    # Mood-based recommendations
+    'sad': 'sad',
+    'stressed': 'chill',  # Recommend relaxing games for stress
+    'bored': 'adventure',
+    'happy': 'happy',
+    'chill': 'chill',
+    # Time-based recommendations
+    'quick': 'chill',  # Quick games are often casual/chill
+    'long': 'adventure',  # Long games are often adventure/RPG
+    # Social preferences
+    'social': 'happy',  # Social games are often upbeat
+    'solo': 'adventure',  # Solo games are often adventure/story-driven
+    # Learning and educational
+    'language_learning': 'language_learning',
+    'educational': 'educational',
+    # Genre preferences
+    'puzzle': 'educational',  # Puzzles are educational
+    'action': 'adventure',
+    'strategy': 'educational',
+    'creative': 'happy',  # Creative games are often uplifting
+    'story': 'sad',  # Story games often have emotional depth
+}
+
+def _build_fallback_rankings() -> Dict[Tuple[str, Optional[str]], Tuple]:
+    """
+    Top-5 placeholder games for every (intent category, mood) pair, sorted by rating.
+    
+    Built once at import from copies of GAME_DATABASE, with read-only records and
+    pre-rendered cards, so the fallback path never sorts or mutates the database.
+    """
+    rankings = {}
+    for intent_category, games in GAME_DATABASE.items():
+        for mood_category in (None, *GAME_DATABASE):
+            candidates = list(games)
+            # A mood different from the intent adds its two best-known games
+            if mood_category is not None and mood_category != intent_category:
+                candidates += GAME_DATABASE[mood_category][:2]
+            ranked = sorted(candidates, key=lambda x: x['rating'], reverse=True)[:5]
+            rankings[(intent_category, mood_category)] = tuple(
+                MappingProxyType(dict(game, card=render_card(game))) for game in ranked)
+    return MappingProxyType(rankings)
+
+# (intent category, mood category or None) -> immutable pre-sorted recommendations
+FALLBACK_RANKINGS = _build_fallback_rankings()
+
+def fallback_recommendations(intent_category: str, mood: Optional[str] = None) -> Tuple:
+    """Precomputed placeholder recommendations for an intent category and optional mood."""
+    mood_category = (mood or "").lower()
+    if mood_category not in GAME_DATABASE or mood_category == intent_category:
+        mood_category = None
+    return FALLBACK_RANKINGS.get((intent_category, mood_category), ())
+
 def parse_user_intent(user_input: str) -> str:
     """
     Enhanced natural language understanding to identify user intent.
     Analyzes mood, preferences, and context to provide better recommendations.
     """
-    user_input_lower = user_input.lower()
-    
-    # Mood-based recommendations
-    if any(word in user_input_lower for word in ['sad', 'depressed', 'down', 'blue', 'melancholy', 'gloomy', 'feeling low']):
-        return "sad"
-    
-    if any(word in user_input_lower for word in ['stressed', 'anxious', 'overwhelmed', 'tense', 'worried', 'pressure']):
-        return "chill"  # Recommend relaxing games for stress
-    
-    if any(word in user_input_lower for word in ['bored', 'boring', 'nothing to do', 'uninterested', 'tired of', 'stuck']):
-        return "adventure"
-    
-    if any(word in user_input_lower for word in ['happy', 'cheerful', 'excited', 'joyful', 'upbeat', 'positive']):
-        return "happy"
-    
-    if any(word in user_input_lower for word in ['chill', 'relaxed', 'calm', 'peaceful', 'zen', 'mellow', 'laid back']):
-        return "chill"
+    rule = match_intents(user_input).first('intent_rules')
     
-    # Time-based recommendations
-    if any(word in user_input_lower for word in ['quick', 'fast', 'short', '30 minutes', '15 minutes', 'brief', 'casual']):
-        return "chill"  # Quick games are often casual/chill
-    
-    if any(word in user_input_lower for word in ['long', 'extended', 'hours', 'all day', 'marathon', 'deep dive']):
-        return "adventure"  # Long games are often adventure/RPG
-    
-    # Social preferences
-    if any(word in user_input_lower for word in ['friends', 'multiplayer', 'together', 'co-op', 'social', 'with others']):
-        return "happy"  # Social games are often upbeat
+    # Default to adventure if no specific intent detected
+    return INTENT_RULE_CATEGORIES.get(rule, "adventure")
+
+# Final responses for repeated (query, mood) pairs; dropped when the index version changes
+_response_cache = ResponseCache(max_entries=1024, ttl_seconds=600)
+
+# Precomputed responses for the apps' fixed suggestion prompts:
+# key -> (index_version, (prompt, mood, diversity), response)
+_canned_answers = {}
+# Keys of stale canned answers with a refresh queued in the engine pool
+_canned_refreshing = set()
+_canned_lock = threading.Lock()
+
+# Type-ahead over game titles and suggestion prompts: (index_version, PrefixIndex)
+_suggestion_prompts = {}
+_suggestion_index = (None, None)
+_suggestion_lock = threading.Lock()
+
+# Which mode served recent requests, and their end-to-end latency (queue wait included)
+_serving_modes = Counter()
+_serving_latencies = deque(maxlen=1000)
+_serving_lock = threading.Lock()
+
+def _record_serving(mode: str, started: float) -> None:
+    with _serving_lock:
+        _serving_modes[mode] += 1
+        _serving_latencies.append(time.perf_counter() - started)
+
+def serving_stats() -> Dict:
+    """Requests per serving mode and end-to-end latency percentiles (ms)."""
+    with _serving_lock:
+        latencies = np.array(_serving_latencies) * 1000
+        stats = {'modes': dict(_serving_modes)}
+    stats['p50_ms'] = float(np.percentile(latencies, 50)) if len(latencies) else 0.0
+    stats['p99_ms'] = float(np.percentile(latencies, 99)) if len(latencies) else 0.0
+    stats['max_ms'] = float(latencies.max()) if len(latencies) else 0.0
+    return stats
+
+def _index_version() -> Optional[str]:
+    """Version token of the catalog/index answering requests, or None if unknown."""
+    if not ML_ENGINE_AVAILABLE:
+        return "fallback"
+    try:
+        return get_ml_index_version()
+    except Exception:
+        return None
+
+def _session_has_state(session_id: str) -> bool:
+    """Whether a session has feedback or shown games, so its results are its own."""
+    if not ML_ENGINE_AVAILABLE:
+        return False
+    try:
+        return has_ml_session_state(session_id)
+    except Exception:
+        return True
+
+def _mark_shown(session_id: Optional[str], recommendations) -> None:
+    """Record games from a shared (canned or cached) response as shown to the session."""
+    if not ML_ENGINE_AVAILABLE or not session_id:
+        return
+    try:
+        mark_ml_shown(session_id, [game['name'] for game in recommendations])
+    except Exception as e:
+        print(f"Could not record shown games: {e}")
+
+def _response_key(user_input: str, mood: Optional[str], diversity: Optional[float]) -> Tuple:
+    """Cache/table key: normalized query, folded mood ("Any" == no mood) and diversity."""
+    mood_key = (mood or "").strip().lower()
+    return (normalize_query(user_input), "" if mood_key == "any" else mood_key, diversity)
+
+def _compute_canned_answers(prompt: str, moods: List[Optional[str]], diversity: Optional[float],
+                            version: Optional[str]) -> int:
+    """
+    Compute and store one prompt's canned answers for the given moods.
     
-    if any(word in user_input_lower for word in ['alone', 'solo', 'by myself', 'single player', 'personal']):
-        return "adventure"  # Solo games are often adventure/story-driven
+    The ML engine ignores the mood, so it is queried once per prompt and the
+    response shared by every mood; only placeholder fallbacks (which rank by
+    mood) are computed per mood. Returns the number of answers stored.
+    """
+    shared = None
+    count = 0
+    for mood in moods:
+        response = shared
+        if response is None:
+            recommendations, explanation, cacheable, mode = _build_recommendations(prompt, mood, diversity)
+            if not cacheable:
+                continue
+            response = (tuple(recommendations), explanation, format_recommendations(recommendations))
+            if mode != 'fallback':
+                shared = response
+        _canned_answers[_response_key(prompt, mood, diversity)] = (version, (prompt, mood, diversity), response)
+        count += 1
+    return count
+
+def _canned_is_current(key: Tuple, version: Optional[str]) -> bool:
+    """Whether a canned answer exists and was computed against this index version."""
+    return key in _canned_answers and _canned_answers[key][0] == version
+
+def _refresh_canned_answer(key: Tuple) -> None:
+    """
+    Recompute a stale canned answer from its original prompt, together with the
+    prompt's other stale moods (runs as an engine pool task).
+    """
+    keys = [key]
+    try:
+        version = _index_version()
+        _, (prompt, _, diversity), _ = _canned_answers[key]
+        with _canned_lock:
+            # Other moods of the same prompt share one engine query; don't refresh them separately
+            siblings = [(entry_key, mood) for entry_key, (entry_version, (entry_prompt, mood, entry_diversity), _)
+                        in list(_canned_answers.items())
+                        if entry_prompt == prompt and entry_diversity == diversity and entry_version != version
+                        and (entry_key == key or entry_key not in _canned_refreshing)]
+            keys = [entry_key for entry_key, _ in siblings]
+            _canned_refreshing.update(keys)
+        _compute_canned_answers(prompt, [mood for _, mood in siblings], diversity, version)
+    except Exception as e:
+        print(f"Could not refresh canned answer: {e}")
+    finally:
+        with _canned_lock:
+            _canned_refreshing.difference_update(keys)
+
+def precompute_canned_answers(prompts: List[str], moods: Tuple = (None,),
+                              diversity: Optional[float] = None) -> int:
+    """
+    Compute full responses for fixed suggestion prompts ahead of time (call at startup).
     
-    # Learning and educational
-    if any(phrase in user_input_lower for phrase in [
-        'learn spanish', 'learn french', 'learn german', 'learn japanese', 
-        'learn language', 'spanish', 'french', 'german', 'japanese',
-        'language learning', 'learn a language'
-    ]):
-        return "language_learning"
+    A clicked suggestion is then answered from this table without touching the
+    model or the index. The engine runs once per prompt, not once per mood.
+    Entries computed against an older index keep being served while an engine
+    pool task recomputes them on their next request.
     
-    if any(phrase in user_input_lower for phrase in [
-        'parent', 'child', 'kid', 'learn math', 'educational', 'school', 
-        'homework', 'study', 'my child', 'for my kid', 'educational game',
-        'learn', 'education', 'skill', 'practice', 'improve'
-    ]):
-        return "educational"
+    Returns:
+        Number of (prompt, mood) answers stored
+    """
+    version = _index_version()
+    count = 0
+    for prompt in prompts:
+        _suggestion_prompts.setdefault(prompt, None)
+        stale = [mood for mood in moods if not _canned_is_current(_response_key(prompt, mood, diversity), version)]
+        count += _compute_canned_answers(prompt, stale, diversity, version)
+    print(f"✅ Precomputed {count} answers for suggestion prompts")
+    return count
+
+def get_recommendations_response(user_input: str, mood: Optional[str] = None,
+                                 diversity: Optional[float] = None,
+                                 session_id: Optional[str] = None,
+                                 budget_ms: Optional[float] = None) -> Tuple[List[Dict], str, str, str]:
+    """
+    Get recommendations, explanation, the rendered recommendation text and the serving mode.
     
-    # Genre preferences
-    if any(word in user_input_lower for word in ['puzzle', 'brain', 'think', 'logic', 'challenge', 'problem solving']):
-        return "educational"  # Puzzles are educational
+    Canned suggestion prompts are answered from the precomputed table, for every
+    session. Other identical requests (same query after folding case, whitespace
+    and punctuation, same mood) are answered from the response cache until the
+    index changes. Requests from a session that already has feedback or shown games
+    get personalized results and bypass the cache; games served from the table or
+    the cache are recorded as shown to the session.
     
-    if any(word in user_input_lower for word in ['action', 'fast', 'intense', 'thrilling', 'exciting', 'adrenaline']):
-        return "adventure"
+    With budget_ms, the engine steps down to cheaper modes as the budget runs out
+    (see deadlines.py). The budget starts when the request was queued in the engine
+    pool, so time spent waiting there counts.
     
-    if any(word in user_input_lower for word in ['strategy', 'planning', 'tactical', 'thinking', 'management']):
-        return "educational"
+    Returns:
+        Tuple of (recommendations_list, explanation_string, formatted_text, mode), mode
+        being "canned", "cache", one of deadlines.SERVING_MODES or "fallback"
+    """
+    started = task_submitted_at() or time.perf_counter()
+    key = _response_key(user_input, mood, diversity)
+    canned = _canned_answers.get(key)
+    if canned is not None:
+        if canned[0] != _index_version():
+            # Stale after a catalog reload: keep serving it while one pool task per key recomputes it
+            with _canned_lock:
+                refresh = key not in _canned_refreshing
+                _canned_refreshing.add(key)
+            if refresh:
+                try:
+                    get_engine_pool().submit(_refresh_canned_answer, key)
+                except QueueFullError:
+                    # Pool is saturated: drop the refresh, a later request retries it
+                    with _canned_lock:
+                        _canned_refreshing.discard(key)
+        recommendations, explanation, formatted = canned[2]
+        _mark_shown(session_id, recommendations)
+        _record_serving('canned', started)
+        return list(recommendations), explanation, formatted, 'canned'
     
-    if any(word in user_input_lower for word in ['creative', 'build', 'design', 'art', 'craft', 'create']):
-        return "happy"  # Creative games are often uplifting
+    # A new session's first results are the same as anyone's, so they can share the cache
+    personal = session_id is not None and _session_has_state(session_id)
+    version = _index_version() if not personal else None
     
-    if any(word in user_input_lower for word in ['story', 'narrative', 'plot', 'characters', 'drama', 'cinematic']):
-        return "sad"  # Story games often have emotional depth
+    if version is not None:
+        cached = _response_cache.get(key, version=version)
+        if cached is not None:
+            recommendations, explanation, formatted = cached
+            _mark_shown(session_id, recommendations)
+            _record_serving('cache', started)
+            return list(recommendations), explanation, formatted, 'cache'
     
-    # Default to adventure if no specific intent detected
-    return "adventure"
+    deadline = started + budget_ms / 1000 if budget_ms is not None else None
+    recommendations, explanation, cacheable, mode = _build_recommendations(user_input, mood, diversity, session_id,
+                                                                           deadline)
+    formatted = format_recommendations(recommendations)
+    if version is not None and cacheable:
+        _response_cache.put(key, (tuple(recommendations), explanation, formatted), version=version)
+    _record_serving(mode, started)
+    return recommendations, explanation, formatted, mode
 
-def get_recommendations(user_input: str, mood: Optional[str] = None) -> Tuple[List[Dict], str]:
+def get_recommendations(user_input: str, mood: Optional[str] = None,
+                        diversity: Optional[float] = None,
+                        session_id: Optional[str] = None,
+                        budget_ms: Optional[float] = None) -> Tuple[List[Dict], str]:
     """
     Get personalized game recommendations based on user input and mood.
     
@@ -144,66 +358,127 @@ def get_recommendations(user_input: str, mood: Optional[str] = None) -> Tuple[Li
     Args:
         user_input: User's message/request
         mood: Selected mood filter (Happy, Sad, Chill, or None)
+        diversity: Optional MMR lambda (1.0 = pure relevance, lower = more varied games)
+        session_id: Optional chat session id for personalized results
+        budget_ms: Optional latency budget; cheaper modes are used as it runs out
+            (get_recommendations_response also returns the mode used)
     
     Returns:
         Tuple of (recommendations_list, explanation_string)
     """
+    recommendations, explanation, _, _ = get_recommendations_response(user_input, mood, diversity, session_id,
+                                                                      budget_ms)
+    return recommendations, explanation
+
+def _build_recommendations(user_input: str, mood: Optional[str], diversity: Optional[float],
+                           session_id: Optional[str] = None,
+                           deadline: Optional[float] = None) -> Tuple[List[Dict], str, bool, str]:
+    """
+    Compute recommendations without the response cache.
+    
+    Returns:
+        Tuple of (recommendations_list, explanation_string, cacheable, mode); results of
+        a fallback caused by an ML engine error, and of degraded modes, are not cacheable
+    """
     # Use ML recommendation engine if available
     if ML_ENGINE_AVAILABLE:
         try:
             # Get ML-based recommendations
-            ml_recommendations = get_ml_recommendations(user_input, mood, top_k=5)
-            
-            # Convert to the expected format
-            recommendations = []
-            for game_name, similarity_score in ml_recommendations:
-                # Get detailed game info
-                game_info = get_game_info(game_name)
-                if game_info:
-                    recommendations.append({
-                        'name': game_name,
-                        'rating': game_info.get('User Rating', 8.0),
-                        'price': game_info.get('Price', 19.99),
-                        'reviews': 1000,  # Placeholder
-                        'description': f"Genre: {game_info.get('Genre', 'Unknown')} | {game_info.get('User Review Text', 'Great game!')[:100]}...",
-                        'similarity_score': similarity_score,
-                        'genre': game_info.get('Genre', 'Unknown'),
-                        'platform': 'Multi-platform'
-                    })
-                else:
-                    # Fallback if game info not found
-                    recommendations.append({
-                        'name': game_name,
-                        'rating': 8.0,
-                        'price': 19.99,
-                        'reviews': 1000,
-                        'description': f"Recommended based on: {user_input}",
-                        'similarity_score': similarity_score,
-                        'genre': 'Unknown',
-                        'platform': 'Multi-platform'
-                    })
+            mode = 'full'
+            if deadline is None:
+                ml_recommendations = get_ml_recommendations(user_input, mood, top_k=5, diversity=diversity,
+                                                            session_id=session_id)
+            else:
+                ml_recommendations, mode = get_ml_deadline_recommendations(user_input, deadline, top_k=5,
+                                                                           diversity=diversity,
+                                                                           session_id=session_id)
+            # "fallback": no engine mode fits in the remaining budget
+            if mode != 'fallback':
+                # Pre-rendered cards from the index build; only the match score is per query
+                cards = get_game_cards([game_name for game_name, _ in ml_recommendations])
+                recommendations = []
+                for (game_name, similarity_score), card in zip(ml_recommendations, cards):
+                    if card:
+                        recommendations.append(dict(card, similarity_score=similarity_score))
+                    else:
+                        # Fallback if game info not found
+                        recommendations.append({
+                            'name': game_name,
+                            'rating': 8.0,
+                            'price': 19.99,
+                            'reviews': 1000,
+                            'description': f"Recommended based on: {user_input}",
+                            'similarity_score': similarity_score,
+                            'genre': 'Unknown',
+                            'platform': 'Multi-platform'
+                        })
             
-            explanation = f"I found {len(recommendations)} games that match your request '{user_input}' using advanced ML similarity matching. These recommendations are based on game titles, genres, reviews, and descriptions."
-            return recommendations, explanation
+                explanation = f"I found {len(recommendations)} games that match your request '{user_input}' using advanced ML similarity matching. These recommendations are based on game titles, genres, reviews, and descriptions."
+                return recommendations, explanation, mode == 'full', mode
             
         except Exception as e:
             print(f"Error using ML engine: {e}")
             print("Falling back to placeholder data...")
     
-    # Fallback to placeholder implementation
+    # Fallback to placeholder implementation: precomputed (intent, mood) rankings
     intent_category = parse_user_intent(user_input)
-    recommendations = GAME_DATABASE.get(intent_category, [])
-    
-    # Apply mood filter if provided and different from intent
-    if mood and mood.lower() != intent_category:
-        mood_recommendations = GAME_DATABASE.get(mood.lower(), [])
-        recommendations.extend(mood_recommendations[:2])
-    
-    # Sort by rating and limit to 5 recommendations
-    recommendations = sorted(recommendations, key=lambda x: x['rating'], reverse=True)[:5]
+    recommendations = list(fallback_recommendations(intent_category, mood))
     explanation = generate_explanation(intent_category, mood, user_input)
     
-    return recommendations, explanation
+    return recommendations, explanation, not ML_ENGINE_AVAILABLE, 'fallback'
+
+def _build_suggestion_index() -> PrefixIndex:
+    """Titles ranked by review count; suggestion prompts rank above every title."""
+    titles = {}
+    if ML_ENGINE_AVAILABLE:
+        try:
+            titles = get_ml_title_popularity()
+        except Exception as e:
+            print(f"Could not read catalog titles: {e}")
+    if not titles:
+        titles = {game['name']: game['reviews'] for games in GAME_DATABASE.values() for game in games}
+    prompt_popularity = max(titles.values(), default=0) + 1
+    return PrefixIndex(list(titles.items()) + [(prompt, prompt_popularity) for prompt in _suggestion_prompts])
+
+def suggest(prefix: str, n: int = 5) -> List[str]:
+    """
+    Type-ahead completions for a partial query: game titles (by review count) and
+    the apps' suggestion prompts with a word starting with prefix.
+    
+    Answered from an in-memory prefix index, without touching the model; the index
+    is rebuilt when the catalog changes or new prompts are precomputed.
+    """
+    global _suggestion_index
+    version, index = _suggestion_index
+    current = (_index_version(), len(_suggestion_prompts))
+    if index is None or version != current:
+        with _suggestion_lock:
+            version, index = _suggestion_index
+            if index is None or version != current:
+                index = _build_suggestion_index()
+                _suggestion_index = (current, index)
+    return index.suggest(prefix, n)
+
+def cache_stats() -> Dict:
+    """Hit rates and staleness of the response cache and the engine's semantic query cache."""
+    stats = {'response_cache': _response_cache.stats(), 'semantic_cache': None}
+    if ML_ENGINE_AVAILABLE:
+        try:
+            stats['semantic_cache'] = get_ml_cache_stats()
+        except Exception as e:
+            print(f"Could not read semantic cache stats: {e}")
+    return stats
+
+def record_feedback(session_id: str, game_names: List[str]) -> None:
+    """
+    Record games a session liked or clicked, to personalize its next recommendations.
+    """
+    if not ML_ENGINE_AVAILABLE or not session_id:
+        return
+    try:
+        record_ml_feedback(session_id, game_names)
+    except Exception as e:
+        print(f"Could not record feedback: {e}")
 
 def generate_explanation(intent_category: str, mood: Optional[str], user_input: str) -> str:
     """
@@ -232,24 +507,8 @@ def format_recommendations(recommendations: List[Dict]) -> str:
     if not recommendations:
         return "I couldn't find any specific recommendations right now. Could you tell me more about what you're looking for?"
     
-    formatted = "🎮 **Here are my recommendations for you:**\n\n"
-    
-    for i, game in enumerate(recommendations, 1):
-        price_text = "Free" if game['price'] == 0 else f"${game['price']}"
-        
-        # Add similarity score if available
-        score_text = ""
-        if 'similarity_score' in game:
-            score_text = f" (Match: {game['similarity_score']:.1%})"
-            
-        formatted += f"**{i}. {game['name']}** ⭐ {game['rating']}/10{score_text}\n"
-        formatted += f"   💰 {price_text} | 👥 {game['reviews']:,} reviews\n"
-        formatted += f"   🎭 {game.get('genre', 'Unknown')} | 🖥️ {game.get('platform', 'Multi-platform')}\n"
-        formatted += f"   📝 {game['description']}\n\n"
-    
-    formatted += "💡 *Recommendations are based on semantic similarity and user ratings.*"
-    
-    return formatted
+    # Games from the ML engine carry a card pre-rendered at index build time
+    return format_cards(recommendations)
 
 # Placeholder for future backend connection
 def connect_to_backend(backend_url: str, api_key: str = None):
@@ -0,0 +1,679 @@
+"""
+Shared recommendation engine.
+GameRecommender and NotebookGameRecommender only differ in how they load and
+preprocess the catalog; encoding, indexes, query paths, sessions, caches and
+index modes live here.
+"""
+
+import os
+import json
+import time
+import uuid
+from contextlib import nullcontext
+
+import faiss
+import numpy as np
+import pandas as pd
+import spacy
+import torch
+from sentence_transformers import SentenceTransformer
+from sklearn.preprocessing import MinMaxScaler, normalize
+
+from lexical_index import LexicalIndex, hybrid_search
+from neighbors import NeighborTable, compute_neighbor_table, embeddings_fingerprint, title_centroids
+from sessions import SessionStore
+from catalog import filter_mask
+from reranking import DEFAULT_RERANK_WEIGHTS, build_rerank_features, mmr, rerank
+from sharding import ShardedIndex
+from binary_index import COARSE_RERANK, DEFAULT_RERANK, BinaryPrefilterIndex
+from deadlines import SERVING_MODES, LatencyModel
+from field_embeddings import DEFAULT_EMBEDDING_WEIGHTS, MultiFieldEmbeddings, fingerprint_fields
+from encoding import EncoderPool, encode_checkpointed, encode_texts, load_encoded
+from result_cards import ResultCards
+from response_cache import SEMANTIC_CACHE_THRESHOLD, SemanticCache
+
+
+class BaseRecommender:
+    """
+    Game recommender using combined embeddings.
+    Subclasses load and preprocess self.df, then call encode_games().
+    """
+    SPACY_MISSING_MESSAGE = "spaCy model not found. Please install with: python -m spacy download en_core_web_sm"
+
+    def __init__(self, model_name='all-mpnet-base-v2', device=None, embedding_dir="embeddings", model=None,
+                 encode_workers=1):
+        self.device = device if device else ('cuda' if torch.cuda.is_available() else 'cpu')
+        print(f"Using device: {self.device}")
+        # An already-loaded model can be passed in, e.g. when reloading the catalog
+        self.model = model if model is not None else SentenceTransformer(model_name, device=self.device)
+        self.model_name = model_name
+        # Worker processes for catalog encoding (each loads its own model copy)
+        self.encode_workers = encode_workers
+        self.embedding_dir = embedding_dir
+        os.makedirs(self.embedding_dir, exist_ok=True)
+        self.game_embeddings = None
+        self.game_names = None
+        self.title_ids = None
+        self.title_rows = None
+        self.titles = None
+        self.index = None
+        self.lexical_index = None
+        self.result_cards = None
+        self.semantic_cache = None
+        self.latency_model = LatencyModel()
+        self.index_version = None
+        self.reencoded = False
+        self.neighbor_table = None
+        self.sessions = None
+        self.df = None
+        self.scaler = MinMaxScaler()
+        self.rating_norm = None
+        self.value_norm = None
+        self.rerank_weights = dict(DEFAULT_RERANK_WEIGHTS)
+        self.field_embeddings = None
+        self.field_weights = dict(DEFAULT_EMBEDDING_WEIGHTS)
+        
+        # Initialize spaCy for text preprocessing
+        try:
+            self.nlp = spacy.load("en_core_web_sm")
+        except OSError:
+            print(self.SPACY_MISSING_MESSAGE)
+            self.nlp = None
+
+    def prepare_text(self, df):
+        """
+        Combine all textual features into a single string per game.
+        """
+        combined = (
+            df['Game Title'].astype(str) + " | " +
+            df['Genre'].astype(str) + " | " +
+            df['User Review Text'].astype(str) + " | " +
+            "Age: " + df['Age Group Targeted'].astype(str) + " | " +
+            "Graphics: " + df['Graphics Quality'].astype(str)
+        )
+        return combined
+
+    def encode_games(self, df=None, force_encode=False):
+        """
+        Encode all games and save/load embeddings.
+        Saved embeddings are reused when they were encoded from the same catalog texts
+        (e.g. on a reload with an unchanged catalog); force_encode ignores them.
+        """
+        if df is None:
+            df = self.df
+        
+        self.game_names = df['Game Title'].tolist()
+        embedding_path = os.path.join(self.embedding_dir, "game_embeddings.npy")
+
+        combined_texts = self.prepare_text(df).tolist()
+        self.game_embeddings = None if force_encode else load_encoded(embedding_path, combined_texts, self.model_name)
+        # Derived artifacts (neighbor table, field embeddings) are stale after a re-encode
+        self.reencoded = self.game_embeddings is None
+        if not self.reencoded:
+            print(f"Loading game embeddings from {embedding_path}")
+        else:
+            print("Encoding game embeddings...")
+            # Length-bucketed, normalized, checkpointed in shards so an interrupted run resumes;
+            # written to a temp file and renamed, so a running snapshot never sees a partial file
+            with EncoderPool(self.model_name, workers=self.encode_workers) if self.encode_workers > 1 else nullcontext() as pool:
+                encode_checkpointed(self.model, combined_texts, embedding_path, pool=pool, model_name=self.model_name)
+            self.game_embeddings = np.load(embedding_path)
+            print(f"Saved embeddings to {embedding_path}")
+
+        # Build FAISS index
+        dim = self.game_embeddings.shape[1]
+        self.index = faiss.IndexFlatIP(dim)  # inner product on normalized = cosine similarity
+        self.index.add(self.game_embeddings.astype('float32'))
+        print("FAISS index built.")
+
+        # Build BM25 index for exact title and keyword matches
+        self.lexical_index = LexicalIndex().build(df)
+
+        # Render every game's result card once; responses join these by game id
+        self.result_cards = ResultCards.build(df)
+
+        # Precompute normalized rating and price arrays for re-ranking
+        self.rating_norm, self.value_norm = build_rerank_features(df, self.scaler)
+
+        # New token for every rebuilt index; response caches key on it
+        self.index_version = uuid.uuid4().hex
+
+        self.index_titles()
+
+        # Precomputed "more like this" table (one row per title) from the batch job, if it matches this catalog
+        self.neighbor_table = None if self.reencoded else NeighborTable.load(
+            self.embedding_dir, fingerprint=embeddings_fingerprint(embedding_path))
+        if self.reencoded:
+            print("Catalog re-encoded; rebuild the neighbor table with build_neighbor_table().")
+        elif self.neighbor_table is not None and len(self.neighbor_table) != len(self.titles):
+            print("Neighbor table does not match the catalog, ignoring it. Rebuild with build_neighbor_table().")
+            self.neighbor_table = None
+
+        # Per-session preference vectors and shown-game bitmaps (bounded, LRU)
+        self.sessions = SessionStore(dim, len(self.title_rows))
+
+    def index_titles(self):
+        """
+        Map catalog rows to game (title) ids; the review-level catalog repeats a
+        game across rows. Sets title_ids (per row), titles (per title id) and
+        title_rows (title -> first row).
+        """
+        codes, titles = pd.factorize(pd.Series(self.game_names, dtype=object))
+        _, first_rows = np.unique(codes, return_index=True)
+        self.title_ids = codes.astype(np.int64)
+        self.titles = titles.tolist()
+        self.title_rows = dict(zip(self.titles, first_rows.tolist()))
+
+    def _encode_query(self, user_input, session_id=None):
+        """
+        Normalized query vector; with a session_id it is blended with the session's
+        preference vector.
+        """
+        user_emb = normalize(self.model.encode([user_input], convert_to_tensor=False))[0]
+        if session_id is not None and self.sessions is not None:
+            user_emb = self.sessions.blend(session_id, user_emb)
+        return user_emb
+
+    def _search_vector(self, user_emb, k, coarse=False):
+        """
+        Search the index with one normalized query vector. Returns (row_ids, scores).
+        coarse trades recall for speed where the index supports it (binary prefilter).
+        """
+        if self.field_embeddings is not None:
+            return self.field_embeddings.search(user_emb, k, self.field_weights)
+        user_emb = np.asarray(user_emb, dtype='float32')[None, :]
+        if coarse and isinstance(self.index, BinaryPrefilterIndex):
+            D, I = self.index.search(user_emb, k=min(k, self.index.ntotal), rerank=COARSE_RERANK)
+            return I[0], D[0]
+        D, I = self.index.search(user_emb, k=min(k, self.index.ntotal))
+        return I[0], D[0]
+
+    def _dense_search(self, user_input, k, session_id=None, coarse=False):
+        """
+        Encode a query and search the FAISS index. Returns (row_ids, scores).
+        See _encode_query and _search_vector for session_id and coarse.
+        """
+        return self._search_vector(self._encode_query(user_input, session_id), k, coarse=coarse)
+
+    def _distinct_games(self, ranked):
+        """Keep the first (row_id, score) of every game (title) in a ranked list."""
+        seen, distinct = set(), []
+        for idx, score in ranked:
+            title = int(self.title_ids[idx])
+            if title not in seen:
+                seen.add(title)
+                distinct.append((idx, score))
+        return distinct
+
+    def query(self, user_input, top_k=5):
+        """
+        Find top-k games based on a user query.
+        """
+        if self.index is None:
+            raise ValueError("Model not initialized. Call encode_games() first.")
+
+        I, D = self._dense_search(user_input, top_k)
+        results = [(self.game_names[idx], float(score)) for idx, score in zip(I, D)]
+        return results
+
+    def hybrid_query(self, user_input, top_k=5, candidates=50, rerank_results=True, diversity=None,
+                     session_id=None, allowed=None, dense_search=None):
+        """
+        Find top-k games by fusing BM25 and embedding rankings (RRF).
+        Clear keyword queries and exact titles are answered from the lexical index
+        alone, without encoding the query (keyword queries only while no games are
+        being excluded for the session); an exact title puts that game first,
+        followed by its "more like this" neighbors (or, without the table, BM25
+        hits for its genre and review text).
+        With rerank=True, over-fetches `candidates` results and re-ranks them
+        by similarity, rating and price (see self.rerank_weights).
+        With diversity set (MMR lambda, 1.0 = pure relevance), the top-k is
+        picked from the candidates by Maximal Marginal Relevance.
+        With session_id, the results are recorded as shown to that session; once
+        it has feedback or shown games, the query is blended with the session's
+        preference vector and games already shown to it are skipped (a new
+        session's first results are anyone's, so they may come from the cache).
+        allowed is an optional boolean row mask (see catalog.filter_mask); dense_search
+        replaces the query encode + index search, e.g. with precomputed batch results.
+        Without a lexical index (streamed catalogs) only the embedding ranking is used.
+        Every result is a different game: the review-level catalog repeats games
+        across rows, so the candidate pool is deduplicated (and widened if needed).
+        """
+        if self.index is None:
+            raise ValueError("Model not initialized. Call encode_games() first.")
+
+        lexical = self.lexical_index is not None
+        # Exact title lookups keep their order so the named game stays first
+        is_title = lexical and bool(self.lexical_index.exact_title(user_input))
+        use_rerank = rerank_results and self.rating_norm is not None and not is_title
+        use_mmr = diversity is not None and not is_title
+        track_session = session_id is not None and self.sessions is not None
+        personalize = track_session and self.has_session_state(session_id)
+        filtering = allowed is not None
+        # Near-duplicate phrasings reuse earlier results; keyword queries rarely need the encoder, so skip them
+        use_cache = (self.semantic_cache is not None and dense_search is None and not personalize and not filtering
+                     and not is_title and not (lexical and self.lexical_index.is_keyword_query(user_input)))
+        query_vector = None
+        if use_cache:
+            query_vector = self._encode_query(user_input)
+            options = (top_k, candidates, rerank_results, diversity)
+            cached = self.semantic_cache.get(query_vector, options, version=self.index_version)
+            if cached is not None:
+                if track_session:
+                    self.mark_shown(session_id, [name for name, _ in cached])
+                return list(cached)
+        if dense_search is None or personalize:
+            # Encoded at most once, even when the candidate pool is widened below
+            def dense_search(query, k):
+                nonlocal query_vector
+                if query_vector is None:
+                    query_vector = self._encode_query(query, session_id if personalize else None)
+                return self._search_vector(query_vector, k)
+        exclude = personalize and not is_title
+        # Filters and shown games drop rows from the pool, so fetch that much deeper
+        candidates = self._filtered_candidates(candidates, allowed)
+        if exclude:
+            shown = self.sessions.shown_count(session_id)
+            candidates += -(-shown * len(self.game_names) // len(self.title_rows))
+        # Rows are deduplicated by game below, so always fetch the candidate depth
+        depth = max(candidates, top_k)
+        min_results = top_k
+        while True:
+            if lexical:
+                # Shown games are dropped below, so BM25 hits alone can't be trusted to fill the page
+                ranked, used_dense = hybrid_search(self.lexical_index, user_input, dense_search,
+                                                   top_k=depth, candidates=candidates, min_results=min_results,
+                                                   related=self._related_games, keyword_shortcut=not exclude)
+            else:
+                ranked = [(int(idx), float(score)) for idx, score in zip(*dense_search(user_input, depth)) if idx >= 0]
+                used_dense = True
+            if filtering:
+                ranked = [(idx, score) for idx, score in ranked if allowed[idx]]
+            # The review-level catalog repeats a game across rows; show each game once
+            ranked = self._distinct_games(ranked)
+            if ranked and exclude:
+                ids, scores = (np.asarray(values) for values in zip(*ranked))
+                ids, scores = self.sessions.exclude_shown(session_id, ids, scores, item_ids=self.title_ids[ids])
+                remaining = len(ids)
+            else:
+                remaining = len(ranked)
+            # Stop once the dense list covered the catalog; a lexical-only answer is widened
+            # until BM25 alone must hold every row to skip it (exact titles never search)
+            if remaining >= top_k or (candidates >= self.index.ntotal
+                                      and (used_dense or min_results >= self.index.ntotal)):
+                break
+            # Still short of top_k: widen, and only skip the dense list if BM25 alone fills the wider pool
+            candidates = depth = min_results = min(4 * candidates, self.index.ntotal)
+        if ranked and (use_rerank or use_mmr or personalize):
+            if not exclude:
+                ids, scores = (np.asarray(values) for values in zip(*ranked))
+            if use_rerank:
+                ids, scores = rerank(ids, scores, self.rating_norm, self.value_norm,
+                                     weights=self.rerank_weights,
+                                     top_k=len(ids) if use_mmr else top_k)
+            if use_mmr:
+                ids, scores = mmr(ids, scores, self.game_embeddings, top_k=top_k, lambda_=diversity)
+            ranked = list(zip(ids[:top_k], scores[:top_k]))
+        if ranked and track_session:
+            self.sessions.mark_shown(session_id, self.title_ids[[idx for idx, _ in ranked[:top_k]]])
+        results = [(self.game_names[idx], float(score)) for idx, score in ranked[:top_k]]
+        if use_cache:
+            self.semantic_cache.put(query_vector, results, options, version=self.index_version)
+        return results
+
+    def _related_games(self, row, k):
+        """
+        (row, score) of games similar to a row's game, without encoding anything: its
+        neighbor table entries, or BM25 hits for its genre and review text when there
+        is no table.
+        """
+        if self.neighbor_table is not None:
+            return [(self.title_rows[self.titles[idx]], score)
+                    for idx, score in self.neighbor_table.lookup(int(self.title_ids[row]), k)]
+        text = " ".join(str(self.df[column].iloc[row]) for column in ('Genre', 'User Review Text')
+                        if column in self.df.columns)
+        # Many rows share a title, so look deep enough to find k other games
+        ids, scores = self.lexical_index.search(text, top_k=50 * k)
+        top_score = float(scores[0]) if len(scores) else 1.0
+        return [(int(idx), float(score) / top_score) for idx, score in zip(ids, scores)]
+
+    def lexical_query(self, user_input, top_k=5):
+        """
+        BM25-only results, without encoding the query, one per game. Scores are
+        scaled to [0, 1].
+        """
+        if self.lexical_index is None:
+            raise ValueError("Lexical index not built (streamed catalogs have none).")
+
+        # Games repeat across review rows, so fetch about top_k games' worth of rows and widen if short
+        depth = min(top_k * -(-len(self.game_names) // len(self.title_rows)), self.index.ntotal)
+        while True:
+            ids, scores = self.lexical_index.search(user_input, top_k=depth)
+            ranked = self._distinct_games(zip(ids, scores))
+            if len(ranked) >= top_k or len(ids) < depth or depth >= self.index.ntotal:
+                break
+            depth = min(4 * depth, self.index.ntotal)
+        top_score = float(scores[0]) if len(scores) else 1.0
+        return [(self.game_names[idx], float(score) / top_score) for idx, score in ranked[:top_k]]
+
+    def deadline_query(self, user_input, deadline, top_k=5, diversity=None, session_id=None):
+        """
+        hybrid_query under a deadline (a time.perf_counter() value). Picks the most
+        complete mode expected to finish in the time left, from recent latencies:
+        full, no_rerank (no re-ranking or MMR), coarse (shallow candidate lists,
+        coarser index search, no personalization) and lexical (BM25 only).
+        coarse is only offered where the index has a coarser search (binary
+        prefilter), and lexical only with a lexical index. Results of every mode
+        are recorded as shown to session_id.
+
+        Returns:
+            Tuple of (results, mode); mode is "fallback" with no results when none fits
+        """
+        if self.index is None:
+            raise ValueError("Model not initialized. Call encode_games() first.")
+
+        modes = tuple(mode for mode in SERVING_MODES[:-1]
+                      if (mode != 'coarse' or self._has_coarse_search())
+                      and (mode != 'lexical' or self.lexical_index is not None))
+        mode = self.latency_model.choose(deadline - time.perf_counter(), modes)
+        start = time.perf_counter()
+        if mode == 'full':
+            results = self.hybrid_query(user_input, top_k=top_k, diversity=diversity, session_id=session_id)
+        elif mode == 'no_rerank':
+            results = self.hybrid_query(user_input, top_k=top_k, rerank_results=False, session_id=session_id)
+        elif mode == 'coarse':
+            results = self.hybrid_query(user_input, top_k=top_k, candidates=top_k, rerank_results=False,
+                                        dense_search=lambda query, k: self._dense_search(query, k, coarse=True))
+        elif mode == 'lexical':
+            results = self.lexical_query(user_input, top_k=top_k)
+        else:
+            return [], mode
+        self.latency_model.record(mode, time.perf_counter() - start)
+        if mode in ('coarse', 'lexical') and session_id is not None:
+            self.mark_shown(session_id, [name for name, _ in results])
+        return results, mode
+
+    def _has_coarse_search(self):
+        """Whether _search_vector(coarse=True) is cheaper than a normal search."""
+        return self.field_embeddings is None and isinstance(self.index, BinaryPrefilterIndex)
+
+    def _filtered_candidates(self, candidates, allowed):
+        """Candidates to fetch so that about `candidates` of them pass a filter mask (if any)."""
+        if allowed is None:
+            return candidates
+        share = max(float(allowed.mean()), 1.0 / len(allowed))
+        return min(int(np.ceil(candidates / share)), self.index.ntotal)
+
+    def _search_vectors(self, vectors, k):
+        """Dense search for a batch of normalized query vectors. Returns (ids, scores) per row."""
+        if self.field_embeddings is not None:
+            hits = [self.field_embeddings.search(vector, k, self.field_weights) for vector in vectors]
+            return [ids for ids, _ in hits], [scores for _, scores in hits]
+        D, I = self.index.search(np.ascontiguousarray(vectors, dtype='float32'), k=k)
+        return I, D
+
+    def batch_query(self, queries, top_k=5, candidates=50, filters=None, rerank_results=True):
+        """
+        Answer many queries at once, e.g. for offline jobs.
+
+        Queries that need the embedding index are encoded in one length-bucketed
+        call and searched with one index call; each is then fused, filtered and
+        re-ranked like hybrid_query.
+
+        Args:
+            queries: List of query strings
+            filters: Optional list with one filter dict (or None) per query, see catalog.filter_mask
+
+        Returns:
+            List of [(game_name, score), ...], one per query in input order
+        """
+        if self.index is None:
+            raise ValueError("Model not initialized. Call encode_games() first.")
+        filters = filters or [None] * len(queries)
+        masks = {}
+        allowed = []
+        for query_filters in filters:
+            if query_filters:
+                key = json.dumps(query_filters, sort_keys=True)
+                if key not in masks:
+                    masks[key] = filter_mask(self.df, query_filters)
+                allowed.append(masks[key])
+            else:
+                allowed.append(None)
+
+        # Exact titles and short keyword queries are usually answered lexically; don't encode them up front
+        if self.lexical_index is None:
+            needs_dense = list(range(len(queries)))
+        else:
+            needs_dense = [i for i, query in enumerate(queries)
+                           if not (self.lexical_index.exact_title(query) or self.lexical_index.is_keyword_query(query))]
+        dense = {}
+        if needs_dense:
+            vectors = normalize(encode_texts(self.model, [queries[i] for i in needs_dense], show_progress=False))
+            # Filtered queries need deeper lists (see hybrid_query); one index call per depth
+            by_depth = {}
+            for row, i in enumerate(needs_dense):
+                depth = min(max(self._filtered_candidates(candidates, allowed[i]), top_k), self.index.ntotal)
+                by_depth.setdefault(depth, []).append(row)
+            for depth, rows in by_depth.items():
+                ids, scores = self._search_vectors(vectors[rows], depth)
+                dense.update({needs_dense[row]: (ids[n], scores[n]) for n, row in enumerate(rows)})
+
+        results = []
+        for i, query in enumerate(queries):
+            dense_search = None
+            if i in dense:
+                def dense_search(query, k, hits=dense[i]):
+                    # Widened past the precomputed list: search again
+                    return (hits[0][:k], hits[1][:k]) if k <= len(hits[0]) else self._dense_search(query, k)
+            results.append(self.hybrid_query(query, top_k=top_k, candidates=candidates, rerank_results=rerank_results,
+                                             allowed=allowed[i], dense_search=dense_search))
+        return results
+
+    def record_feedback(self, session_id, game_names):
+        """
+        Update a session's preference vector from liked or clicked games.
+        """
+        if self.sessions is None:
+            return
+        ids = []
+        for name in game_names:
+            row = self.title_rows.get(name)
+            if row is None and self.lexical_index is not None:
+                # Loosely typed names ("hollow knight") still match a title
+                row = next(iter(self.lexical_index.exact_title(name)), None)
+            if row is not None:
+                ids.append(row)
+        if ids:
+            self.sessions.record_feedback(session_id, self.game_embeddings[ids])
+
+    def has_session_state(self, session_id):
+        """Whether a session has feedback or shown games, i.e. its results are personal."""
+        return self.sessions is not None and session_id in self.sessions
+
+    def mark_shown(self, session_id, game_names):
+        """Remember games shown to a session outside hybrid_query (e.g. from a response cache)."""
+        if self.sessions is None:
+            return
+        rows = [self.title_rows[name] for name in game_names if name in self.title_rows]
+        if rows:
+            self.sessions.mark_shown(session_id, self.title_ids[rows])
+
+    def build_neighbor_table(self, k=20, block_size=2048, workers=None):
+        """
+        Compute and save the top-k neighbors of every game (blocked, parallel matmul).
+        Each title is one game, represented by the mean of its review rows' embeddings.
+        """
+        if self.game_embeddings is None:
+            raise ValueError("Model not initialized. Call encode_games() first.")
+
+        centroids = title_centroids(self.game_embeddings, self.title_ids)
+        ids, scores = compute_neighbor_table(centroids, k=k, block_size=block_size, workers=workers)
+        embedding_path = os.path.join(self.embedding_dir, "game_embeddings.npy")
+        self.neighbor_table = NeighborTable(ids, scores, embeddings_fingerprint(embedding_path))
+        self.neighbor_table.save(self.embedding_dir)
+        print(f"Neighbor table built: top-{ids.shape[1]} for {len(ids)} games")
+        return self.neighbor_table
+
+    def enable_field_embeddings(self, weights=None, force_encode=False):
+        """
+        Score games per field (title, genre, review, age, graphics) with query-time
+        weights instead of the single combined embedding. Field vectors are encoded
+        once and saved, and reused only for the same field values and model;
+        set_field_weights() then re-weights without re-encoding.
+        """
+        if self.df is None:
+            raise ValueError("Model not initialized. Call encode_games() first.")
+
+        fingerprint = fingerprint_fields(self.df, self.model_name)
+        self.field_embeddings = None if force_encode else MultiFieldEmbeddings.load(
+            self.embedding_dir, len(self.game_names), fingerprint=fingerprint)
+        if self.field_embeddings is None:
+            print("Encoding per-field embeddings...")
+            self.field_embeddings = MultiFieldEmbeddings.build(self.df, self.model, fingerprint=fingerprint)
+            self.field_embeddings.save(self.embedding_dir)
+        print(f"Field embeddings ready: {', '.join(self.field_embeddings.fields)}")
+        self.set_field_weights(weights if weights is not None else self.field_weights)
+        return self.field_embeddings
+
+    def set_field_weights(self, weights):
+        """Change the per-field weights used by dense search; takes effect on the next query."""
+        self.field_weights = dict(weights)
+        # Results change with the weights, so cached responses must not be reused
+        self.index_version = uuid.uuid4().hex
+
+    def enable_semantic_cache(self, threshold=SEMANTIC_CACHE_THRESHOLD, max_entries=512, ttl_seconds=600):
+        """
+        Reuse result lists across near-duplicate queries: a query whose embedding is
+        within `threshold` cosine similarity of a recent one skips the search and re-ranking.
+        """
+        if self.game_embeddings is None:
+            raise ValueError("Model not initialized. Call encode_games() first.")
+
+        self.semantic_cache = SemanticCache(self.game_embeddings.shape[1], threshold=threshold,
+                                            max_entries=max_entries, ttl_seconds=ttl_seconds)
+        return self.semantic_cache
+
+    def shard_index(self, num_shards=2, threads_per_shard=1):
+        """
+        Replace the in-process FAISS index with one split across worker processes.
+        Each worker holds a row range of the saved embeddings; queries are fanned out
+        to all of them and the partial top-k results merged. The coordinator drops
+        its dense index and memory-maps the embedding matrix instead of holding it.
+        """
+        if self.game_embeddings is None:
+            raise ValueError("Model not initialized. Call encode_games() first.")
+
+        embedding_path = os.path.join(self.embedding_dir, "game_embeddings.npy")
+        self.index = ShardedIndex(embedding_path, num_shards=num_shards, threads_per_shard=threads_per_shard)
+        self.game_embeddings = np.load(embedding_path, mmap_mode='r')
+        return self.index
+
+    def enable_binary_prefilter(self, rerank=DEFAULT_RERANK):
+        """
+        Replace the FAISS index with sign-bit binary codes searched by Hamming distance;
+        the top `rerank` candidates are re-scored against the full-precision vectors,
+        which are read from the saved embeddings file instead of held in memory.
+        The dense FAISS index and the in-memory embedding matrix are released; the
+        matrix (used by MMR and session feedback) is memory-mapped from disk instead.
+        """
+        if self.game_embeddings is None:
+            raise ValueError("Model not initialized. Call encode_games() first.")
+
+        embedding_path = os.path.join(self.embedding_dir, "game_embeddings.npy")
+        self.index = BinaryPrefilterIndex(embedding_path, rerank=rerank)
+        self.game_embeddings = np.load(embedding_path, mmap_mode='r')
+        return self.index
+
+    def similar_games(self, game_name, top_k=5):
+        """
+        Find games similar to a game title with an O(1) neighbor table lookup.
+        Returns an empty list for titles not in the catalog.
+        """
+        if self.neighbor_table is None:
+            raise ValueError("Neighbor table not built. Call build_neighbor_table() or run neighbors.py.")
+        row = self.title_rows.get(game_name)
+        if row is None and self.lexical_index is not None:
+            # Loosely typed names ("hollow knight") still match a title
+            row = next(iter(self.lexical_index.exact_title(game_name)), None)
+        if row is None:
+            return []
+        title_id = int(self.title_ids[row])
+        return [(self.titles[idx], score) for idx, score in self.neighbor_table.lookup(title_id, top_k)]
+
+    def title_popularity(self):
+        """Number of catalog rows (reviews) per game title."""
+        if self.df is None:
+            return {}
+        return self.df['Game Title'].astype(str).value_counts().to_dict()
+
+    def game_cards(self, game_names):
+        """Pre-rendered display records (with 'card') for the given titles; None for unknown titles."""
+        if self.result_cards is None:
+            return [None] * len(game_names)
+        return [self.result_cards.get(name) for name in game_names]
+
+    def get_game_details(self, game_name):
+        """
+        Get detailed information about a specific game.
+        """
+        if self.df is None:
+            return None
+            
+        game_info = self.df[self.df['Game Title'] == game_name]
+        if len(game_info) > 0:
+            return game_info.iloc[0].to_dict()
+        return None
+
+
+    @classmethod
+    def for_reload(cls, previous=None, **kwargs):
+        """
+        New, uninitialized recommender; on reloads it reuses the previous snapshot's
+        model and encoder workers instead of loading them again.
+        """
+        if previous is not None:
+            kwargs.setdefault('model', previous.model)
+            kwargs.setdefault('encode_workers', previous.encode_workers)
+        return cls(**kwargs)
+
+    def adopt_settings(self, previous=None):
+        """
+        Carry optional features over from the snapshot being replaced: field
+        embeddings, the semantic cache (on by default for the first snapshot), a
+        sharded or binary-prefilter index, and the sessions (see adopt_sessions).
+        """
+        if previous is not None and previous.field_embeddings is not None:
+            self.enable_field_embeddings(previous.field_weights, force_encode=self.reencoded)
+        if previous is None or previous.semantic_cache is not None:
+            self.enable_semantic_cache(previous.semantic_cache.threshold if previous is not None
+                                       else SEMANTIC_CACHE_THRESHOLD)
+        if isinstance(getattr(previous, 'index', None), ShardedIndex):
+            self.shard_index(previous.index.num_shards, threads_per_shard=previous.index.threads_per_shard)
+        elif isinstance(getattr(previous, 'index', None), BinaryPrefilterIndex):
+            self.enable_binary_prefilter(rerank=previous.index.rerank)
+        # Last, so feedback arriving while the snapshot was built is not missed
+        self.adopt_sessions(previous)
+
+    def adopt_sessions(self, previous):
+        """
+        Keep users' personalization across a catalog reload: with the same model,
+        every session's preference vector is copied and its shown games are remapped
+        by title, so games no longer in the catalog are dropped and the rest stay
+        skipped. With a different model the vectors are not comparable, and sessions
+        start fresh.
+        """
+        if previous is None or previous.sessions is None or self.sessions is None:
+            return
+        if previous.model_name != self.model_name or previous.sessions.dim != self.sessions.dim:
+            print("Embedding model changed; sessions start fresh")
+            return
+        title_map = np.array([self.title_ids[self.title_rows[title]] if title in self.title_rows else -1
+                              for title in previous.titles], dtype=np.int64)
+        self.sessions.adopt(previous.sessions, title_map)
+        print(f"Carried over {len(self.sessions)} sessions")
+
+    def close(self):
+        """Stop the worker processes this recommender owns (a sharded index)."""
+        if isinstance(self.index, ShardedIndex):
+            self.index.close()
@@ -0,0 +1,112 @@
+"""
+Candidate re-ranking for the recommenders.
+Blends retrieval similarity with normalized rating and price in one NumPy expression.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Weights of the blended score; similarity stays dominant so results remain on-topic
+DEFAULT_RERANK_WEIGHTS = {
+    'similarity': 0.7,
+    'rating': 0.2,
+    'price': 0.1,
+}
+
+
+def build_rerank_features(df, scaler):
+    """
+    Precompute normalized rating and price arrays for every catalog row.
+
+    Args:
+        df: Preprocessed catalog DataFrame (missing values may be 'Unknown')
+        scaler: Unfitted MinMaxScaler used to map both columns to [0, 1]
+
+    Returns:
+        Tuple of float32 arrays (rating_norm, value_norm); value_norm is
+        1 - normalized price, so cheaper games score higher
+    """
+    numeric = pd.DataFrame({
+        col: pd.to_numeric(df[col], errors='coerce') if col in df.columns else np.nan
+        for col in ('User Rating', 'Price')
+    })
+    numeric = numeric.fillna(numeric.median()).fillna(0.0)
+    scaled = scaler.fit_transform(numeric.values)
+    rating_norm = scaled[:, 0].astype(np.float32)
+    value_norm = (1.0 - scaled[:, 1]).astype(np.float32)
+    return rating_norm, value_norm
+
+
+def rerank(candidate_ids, similarities, rating_norm, value_norm, weights=None, top_k=5):
+    """
+    Re-rank over-fetched candidates by blended similarity, rating and price.
+
+    Args:
+        candidate_ids: Catalog row ids of the candidates
+        similarities: Retrieval scores of the candidates, in [0, 1]
+        rating_norm: Precomputed normalized ratings for the whole catalog
+        value_norm: Precomputed normalized price value for the whole catalog
+        weights: Dict with 'similarity', 'rating' and 'price' weights
+        top_k: Number of results to keep
+
+    Returns:
+        Tuple of (row_ids, blended_scores) arrays, best first
+    """
+    weights = weights or DEFAULT_RERANK_WEIGHTS
+    ids = np.asarray(candidate_ids, dtype=np.int64)
+    if len(ids) == 0:
+        return ids, np.empty(0, dtype=np.float32)
+    sims = np.asarray(similarities, dtype=np.float32)
+
+    blended = (weights['similarity'] * sims
+               + weights['rating'] * rating_norm[ids]
+               + weights['price'] * value_norm[ids])
+
+    k = min(top_k, len(ids))
+    top = np.argpartition(-blended, k - 1)[:k]
+    top = top[np.argsort(-blended[top], kind='stable')]
+    return ids[top], blended[top]
+
+
+def mmr(candidate_ids, relevance, embeddings, top_k=5, lambda_=0.5):
+    """
+    Select a diverse top-k from candidates with Maximal Marginal Relevance.
+
+    The candidate-to-candidate similarity matrix is computed with one matmul,
+    and each greedy step is a vectorized update of the running max similarity
+    to the already-selected set, so there are no pairwise Python loops.
+
+    Args:
+        candidate_ids: Catalog row ids of the candidates, best first
+        relevance: Relevance scores of the candidates
+        embeddings: Normalized catalog embedding matrix
+        top_k: Number of results to select
+        lambda_: Trade-off knob; 1.0 is pure relevance, 0.0 is pure diversity
+
+    Returns:
+        Tuple of (row_ids, relevance_scores) arrays in selection order
+    """
+    ids = np.asarray(candidate_ids, dtype=np.int64)
+    rel = np.asarray(relevance, dtype=np.float32)
+    k = min(top_k, len(ids))
+    if k == 0:
+        return ids, rel
+
+    vectors = np.asarray(embeddings[ids], dtype=np.float32)
+    similarity = vectors @ vectors.T
+
+    selected = np.empty(k, dtype=np.int64)
+    available = np.ones(len(ids), dtype=bool)
+    max_sim = np.zeros(len(ids), dtype=np.float32)
+    for step in range(k):
+        if step == 0:
+            scores = rel.copy()
+        else:
+            scores = lambda_ * rel - (1.0 - lambda_) * max_sim
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected[step] = best
+        available[best] = False
+        max_sim = similarity[:, best] if step == 0 else np.maximum(max_sim, similarity[:, best])
+
+    return ids[selected], rel[selected]
@@ -0,0 +1,190 @@
+"""
+Response cache for recommendation requests.
+Bounded LRU + TTL cache keyed by a normalized query, invalidated when the
+catalog/index version changes, plus a semantic cache that matches near-duplicate
+queries by embedding similarity.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+# Cosine similarity at which two queries share results (override via environment)
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("GAMEBOT_SEMANTIC_CACHE_THRESHOLD", 0.95))
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text):
+    """Fold case, punctuation and whitespace so trivially different phrasings share a key."""
+    text = _PUNCTUATION.sub(" ", str(text).casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+
+    The whole cache is tied to a version token (catalog/index version); passing a
+    different version to get() or put() drops every entry built on the old one.
+    """
+    def __init__(self, max_entries=1024, ttl_seconds=600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version=None):
+        """Return the cached value for key, or None on a miss, expiry or version change."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, version=None):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+class SemanticCache:
+    """
+    Second-level cache matched on query meaning instead of query text.
+
+    Recent query vectors are kept in a small in-memory matrix; a normalized query
+    vector within `threshold` cosine similarity of a cached one (searched with the
+    same options) reuses that query's result list. Bounded (the oldest entry is
+    overwritten), with a per-entry TTL, and tied to a version token like ResponseCache.
+    """
+    def __init__(self, dim, threshold=SEMANTIC_CACHE_THRESHOLD, max_entries=512, ttl_seconds=600, window=1000):
+        """
+        Args:
+            dim: Query embedding dimension
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Number of query vectors kept
+            ttl_seconds: Age after which an entry is stale and dropped
+            window: Number of recent hits kept for the age/similarity metrics
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._created = np.full(max_entries, -np.inf)  # -inf marks an empty slot
+        self._entries = [None] * max_entries  # (options, results) per slot
+        self._next = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+        self._hit_ages = deque(maxlen=window)
+        self._hit_similarities = deque(maxlen=window)
+
+    def _clear(self):
+        self._created[:] = -np.inf
+        self._entries = [None] * self.max_entries
+
+    def _check_version(self, version):
+        if version != self._version:
+            self.invalidated += int(np.isfinite(self._created).sum())
+            self._clear()
+            self._version = version
+
+    def get(self, vector, options=None, version=None):
+        """Return the results of the most similar cached query, or None on a miss."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        with self._lock:
+            self._check_version(version)
+            now = time.monotonic()
+            live = now - self._created <= self.ttl_seconds
+            stale = np.flatnonzero(np.isfinite(self._created) & ~live)
+            for slot in stale:
+                self._created[slot] = -np.inf
+                self._entries[slot] = None
+            self.expired += len(stale)
+
+            sims = self._vectors @ vector
+            matches = np.flatnonzero(live & (sims >= self.threshold))
+            for slot in matches[np.argsort(-sims[matches], kind='stable')]:
+                entry_options, results = self._entries[slot]
+                if entry_options == options:
+                    self.hits += 1
+                    self._hit_ages.append(now - self._created[slot])
+                    self._hit_similarities.append(float(sims[slot]))
+                    return results
+            self.misses += 1
+            return None
+
+    def put(self, vector, results, options=None, version=None):
+        """Store the results of a query vector, overwriting the oldest entry when full."""
+        with self._lock:
+            self._check_version(version)
+            slot = self._next
+            self._vectors[slot] = np.asarray(vector, dtype=np.float32).ravel()
+            self._created[slot] = time.monotonic()
+            self._entries[slot] = (options, tuple(results))
+            self._next = (slot + 1) % self.max_entries
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._clear()
+
+    def stats(self):
+        """Hit rate, staleness (expired/invalidated entries, age of served results) and size."""
+        with self._lock:
+            total = self.hits + self.misses
+            ages = np.array(self._hit_ages)
+            return {
+                'entries': int(np.isfinite(self._created).sum()),
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'expired': self.expired,
+                'invalidated': self.invalidated,
+                'hit_age_p50_s': float(np.percentile(ages, 50)) if len(ages) else 0.0,
+                'hit_age_max_s': float(ages.max()) if len(ages) else 0.0,
+                'hit_similarity_mean': float(np.mean(self._hit_similarities)) if self._hit_similarities else 0.0,
+            }
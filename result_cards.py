@@ -0,0 +1,90 @@
+"""
+Pre-rendered result cards.
+Every game's display record and markdown fragment are built once per index build and
+looked up by game id, so formatting a response is a join of cached fragments plus the
+per-query match score.
+"""
+
+import math
+
+RESULTS_HEADER = "🎮 **Here are my recommendations for you:**\n\n"
+RESULTS_FOOTER = "💡 *Recommendations are based on semantic similarity and user ratings.*"
+
+# Shown when a catalog row has no usable value
+DEFAULT_RATING = 8.0
+DEFAULT_PRICE = 19.99
+
+
+def render_card(game):
+    """
+    Render a game's markdown block, split around the per-query parts.
+
+    Returns:
+        (head, tail): the response line is "**{rank}. " + head + match score + tail
+    """
+    price_text = "Free" if game['price'] == 0 else f"${game['price']}"
+    head = f"{game['name']}** ⭐ {game['rating']}/10"
+    tail = (f"\n   💰 {price_text} | 👥 {game['reviews']:,} reviews\n"
+            f"   🎭 {game.get('genre', 'Unknown')} | 🖥️ {game.get('platform', 'Multi-platform')}\n"
+            f"   📝 {game['description']}\n\n")
+    return head, tail
+
+
+def format_cards(games):
+    """Join rendered cards (pre-rendered when available) into the response text."""
+    parts = [RESULTS_HEADER]
+    for rank, game in enumerate(games, 1):
+        head, tail = game.get('card') or render_card(game)
+        score_text = f" (Match: {game['similarity_score']:.1%})" if 'similarity_score' in game else ""
+        parts.append(f"**{rank}. {head}{score_text}{tail}")
+    parts.append(RESULTS_FOOTER)
+    return "".join(parts)
+
+
+def _number(value, default):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if math.isnan(value) else round(value, 2)
+
+
+class ResultCards:
+    """Display record and rendered card of every game, by game id (first catalog row of a title)."""
+    def __init__(self, ids, records):
+        self.ids = ids
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def build(cls, df):
+        """Render one card per distinct title of a preprocessed catalog."""
+        ids, records = {}, []
+        first_rows = df.drop_duplicates(subset='Game Title')
+        columns = {col: first_rows[col].tolist() for col in ('Game Title', 'User Rating', 'Price', 'Genre', 'User Review Text')
+                   if col in first_rows.columns}
+        for row in range(len(first_rows)):
+            name = str(columns['Game Title'][row])
+            genre = str(columns['Genre'][row]) if 'Genre' in columns else 'Unknown'
+            review = str(columns['User Review Text'][row]) if 'User Review Text' in columns else 'Great game!'
+            record = {
+                'name': name,
+                'rating': _number(columns['User Rating'][row], DEFAULT_RATING) if 'User Rating' in columns else DEFAULT_RATING,
+                'price': _number(columns['Price'][row], DEFAULT_PRICE) if 'Price' in columns else DEFAULT_PRICE,
+                'reviews': 1000,  # Placeholder
+                'description': f"Genre: {genre} | {review[:100]}...",
+                'genre': genre,
+                'platform': 'Multi-platform',
+            }
+            record['card'] = render_card(record)
+            ids[name] = len(records)
+            records.append(record)
+        print(f"Result cards rendered for {len(records)} games")
+        return cls(ids, records)
+
+    def get(self, name):
+        """Display record of a game by title (includes the pre-rendered 'card'), or None."""
+        game_id = self.ids.get(name)
+        return None if game_id is None else self.records[game_id]
@@ -0,0 +1,163 @@
+"""
+Session-level personalization.
+Keeps a running preference vector and a "games already shown" bitmap per chat session,
+in fixed-size slots with LRU eviction so memory stays bounded under many sessions.
+Shown games are keyed by game (title) id, not catalog row, since the review-level
+catalog repeats a game across rows.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class SessionStore:
+    """
+    Bounded store of per-session user vectors and shown-game bitmaps.
+
+    Every session costs the same number of bytes (one float32 vector plus one bit
+    per catalog game), held in preallocated slabs; when all slots are in use the
+    least recently used session is evicted and its slot reused.
+    """
+    def __init__(self, dim, num_items, max_bytes=256 * 2**20, decay=0.7, query_weight=0.75):
+        """
+        Args:
+            dim: Embedding dimension
+            num_items: Number of distinct games (titles) in the catalog
+            max_bytes: Memory budget for all sessions
+            decay: Weight of the existing preference when new feedback arrives
+            query_weight: Weight of the query (vs. the session vector) when blending
+        """
+        self.dim = dim
+        self.num_items = num_items
+        self.decay = decay
+        self.query_weight = query_weight
+        self.bytes_per_session = dim * 4 + (num_items + 7) // 8
+        self.max_sessions = max(1, max_bytes // self.bytes_per_session)
+
+        # np.zeros is lazily backed, so untouched slots cost no resident memory
+        self._vectors = np.zeros((self.max_sessions, dim), dtype=np.float32)
+        self._shown = np.zeros((self.max_sessions, (num_items + 7) // 8), dtype=np.uint8)
+        self._slots = OrderedDict()
+        self._free = list(range(self.max_sessions - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, session_id):
+        """Whether a session has feedback or shown games stored."""
+        with self._lock:
+            return session_id in self._slots
+
+    def _slot(self, session_id, create=True):
+        """Slot of a session (marking it recently used), allocating or evicting if needed."""
+        slot = self._slots.get(session_id)
+        if slot is not None:
+            self._slots.move_to_end(session_id)
+            return slot
+        if not create:
+            return None
+        if self._free:
+            slot = self._free.pop()
+        else:
+            _, slot = self._slots.popitem(last=False)
+        self._vectors[slot] = 0.0
+        self._shown[slot] = 0
+        self._slots[session_id] = slot
+        return slot
+
+    def record_feedback(self, session_id, item_vectors):
+        """Fold liked/clicked game vectors into the session's preference vector."""
+        item_vectors = np.asarray(item_vectors, dtype=np.float32).reshape(-1, self.dim)
+        if len(item_vectors) == 0:
+            return
+        liked = item_vectors.mean(axis=0)
+        with self._lock:
+            slot = self._slot(session_id)
+            current = self._vectors[slot]
+            updated = liked if not current.any() else self.decay * current + (1.0 - self.decay) * liked
+            norm = np.linalg.norm(updated)
+            self._vectors[slot] = updated / norm if norm > 0 else updated
+
+    def blend(self, session_id, query_vector):
+        """Blend a normalized query vector with the session preference, if there is one."""
+        with self._lock:
+            slot = self._slot(session_id, create=False)
+            if slot is None or not self._vectors[slot].any():
+                return query_vector
+            mixed = self.query_weight * query_vector + (1.0 - self.query_weight) * self._vectors[slot]
+        norm = np.linalg.norm(mixed)
+        return mixed / norm if norm > 0 else query_vector
+
+    def shown_count(self, session_id):
+        """Number of games already shown to a session."""
+        with self._lock:
+            slot = self._slot(session_id, create=False)
+            if slot is None:
+                return 0
+            return int(np.bitwise_count(self._shown[slot]).sum())
+
+    def exclude_shown(self, session_id, ids, scores, item_ids=None):
+        """
+        Drop candidates whose game this session has already been shown.
+        item_ids gives each candidate's game id (defaults to ids themselves).
+        Returns the inputs unchanged if that would leave nothing to show.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        scores = np.asarray(scores)
+        items = ids if item_ids is None else np.asarray(item_ids, dtype=np.int64)
+        with self._lock:
+            slot = self._slot(session_id, create=False)
+            if slot is None:
+                return ids, scores
+            shown = (self._shown[slot][items >> 3] >> (items & 7)) & 1
+        keep = shown == 0
+        if not keep.any():
+            return ids, scores
+        return ids[keep], scores[keep]
+
+    def mark_shown(self, session_id, item_ids):
+        """Remember games (by game id) shown to this session."""
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        if len(item_ids) == 0:
+            return
+        with self._lock:
+            slot = self._slot(session_id)
+            np.bitwise_or.at(self._shown[slot], item_ids >> 3, (1 << (item_ids & 7)).astype(np.uint8))
+
+    def adopt(self, previous, item_map=None):
+        """
+        Copy every session of a store built for the previous catalog (same embedding
+        model), e.g. on a catalog reload. Preference vectors are copied as they are;
+        shown games are remapped to this catalog's game ids through item_map (old id ->
+        new id, -1 for games that are gone), so a game shown before stays skipped.
+        Without item_map the game ids must be unchanged. If this store has fewer slots,
+        the most recently used sessions are kept.
+        """
+        if previous.dim != self.dim:
+            raise ValueError(f"Session vectors have dim {previous.dim}, this store expects {self.dim}")
+        if item_map is None:
+            item_map = np.arange(previous.num_items)
+        item_map = np.asarray(item_map, dtype=np.int64)
+        with previous._lock:
+            sessions = list(previous._slots.items())[-self.max_sessions:]
+            slots = [slot for _, slot in sessions]
+            vectors = previous._vectors[slots].copy()
+            shown = previous._shown[slots].copy()
+
+        # One bit per game, little-endian within a byte (see mark_shown)
+        old_bits = np.unpackbits(shown, axis=1, bitorder='little')[:, :previous.num_items]
+        rows, old_items = np.nonzero(old_bits)
+        new_items = item_map[old_items]
+        keep = (new_items >= 0) & (new_items < self.num_items)
+        new_bits = np.zeros((len(sessions), self.num_items), dtype=np.uint8)
+        new_bits[rows[keep], new_items[keep]] = 1
+        new_shown = np.packbits(new_bits, axis=1, bitorder='little')
+
+        with self._lock:
+            for row, (session_id, _) in enumerate(sessions):
+                slot = self._slot(session_id)
+                self._vectors[slot] = vectors[row]
+                self._shown[slot] = new_shown[row]
@@ -0,0 +1,247 @@
+"""
+Sharded dense index.
+Splits the catalog by row id across N local worker processes, each holding its own
+FAISS shard; a coordinator fans every query batch out and merges the partial top-k.
+
+Usage (benchmark):
+    python sharding.py --embeddings embeddings/game_embeddings.npy --shards 1 2 4 --queries 2000 --k 10
+"""
+
+import argparse
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from worker_pool import ENGINE_WORKERS
+
+
+def _shard_worker(conn, embeddings_path, start, stop, threads):
+    """
+    Worker process: build the shard for rows [start, stop) and answer searches.
+    Requests already queued on the pipe are searched together in one FAISS call.
+    """
+    import faiss
+    faiss.omp_set_num_threads(threads)
+    vectors = np.ascontiguousarray(np.load(embeddings_path, mmap_mode='r')[start:stop], dtype=np.float32)
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+    del vectors
+    conn.send(index.ntotal)
+
+    while True:
+        messages = [conn.recv()]
+        while messages[-1] is not None and conn.poll():
+            messages.append(conn.recv())
+        requests = [message for message in messages if message is not None]
+        if requests:
+            k = min(max(k for _, _, k in requests), index.ntotal)
+            D, I = index.search(np.concatenate([queries for _, queries, _ in requests]), k)
+            # Shard-local row ids -> catalog row ids
+            I = np.where(I >= 0, I + start, -1)
+            offset = 0
+            for request_id, queries, request_k in requests:
+                rows = slice(offset, offset + len(queries))
+                conn.send((request_id, D[rows, :request_k], I[rows, :request_k]))
+                offset += len(queries)
+        if messages[-1] is None:
+            break
+    conn.close()
+
+
+def merge_top_k(partial_scores, partial_ids, k):
+    """
+    Merge per-shard (scores, ids) results into the global top-k.
+    Rows are padded with score -inf / id -1 when fewer than k results exist, as FAISS does.
+    """
+    scores = np.concatenate(partial_scores, axis=1)
+    ids = np.concatenate(partial_ids, axis=1)
+    scores = np.where(ids >= 0, scores, -np.inf)
+    if scores.shape[1] < k:
+        pad = k - scores.shape[1]
+        scores = np.pad(scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+        ids = np.pad(ids, ((0, 0), (0, pad)), constant_values=-1)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(ids, np.take_along_axis(top, order, axis=1), axis=1)
+
+
+class ShardedIndex:
+    """
+    Drop-in replacement for a FAISS IndexFlatIP (ntotal, search) backed by worker processes.
+
+    Each worker memory-maps the saved embedding matrix, copies only its own row
+    range into a private IndexFlatIP and searches it with threads_per_shard threads, so
+    the catalog size per process and the per-query work both shrink with N.
+
+    search() is thread-safe and concurrent searches overlap: every request carries
+    an id, a reader thread per shard hands each reply to the search waiting for it,
+    and only sending on a pipe is serialized.
+    """
+    def __init__(self, embeddings_path, num_shards=2, threads_per_shard=1):
+        """
+        Args:
+            embeddings_path: Saved normalized (n, dim) float32 .npy matrix
+            num_shards: Number of worker processes
+            threads_per_shard: FAISS threads in each worker
+        """
+        self._connections = []
+        self._processes = []
+        self._readers = []
+        self._send_locks = []
+        n = len(np.load(embeddings_path, mmap_mode='r'))
+        num_shards = max(1, min(num_shards, n))
+        bounds = np.linspace(0, n, num_shards + 1).astype(int)
+
+        # spawn, not fork: forking a process that already runs torch/FAISS threads can deadlock
+        ctx = mp.get_context("spawn")
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_shard_worker, args=(child_conn, embeddings_path, int(start), int(stop), threads_per_shard),
+                                  daemon=True)
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+        self.ntotal = sum(conn.recv() for conn in self._connections)
+        self.num_shards = num_shards
+        self.threads_per_shard = threads_per_shard
+
+        # (request id, shard) -> Future of that shard's (scores, ids)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._send_locks = [threading.Lock() for _ in self._connections]
+        self._readers = [threading.Thread(target=self._receive, args=(shard, conn), daemon=True,
+                                          name=f"shard-{shard}-reader")
+                         for shard, conn in enumerate(self._connections)]
+        for reader in self._readers:
+            reader.start()
+        print(f"Sharded index ready: {self.ntotal} vectors across {num_shards} worker processes")
+
+    def _receive(self, shard, conn):
+        """Reader thread: route each reply of one shard to the search waiting for it."""
+        try:
+            while True:
+                request_id, D, I = conn.recv()
+                with self._pending_lock:
+                    future = self._pending.pop((request_id, shard), None)
+                if future is not None:
+                    future.set_result((D, I))
+        except (EOFError, OSError):
+            pass
+        # Worker gone: fail the searches still waiting on this shard
+        with self._pending_lock:
+            orphaned = [key for key in self._pending if key[1] == shard]
+            futures = [self._pending.pop(key) for key in orphaned]
+        for future in futures:
+            future.set_exception(RuntimeError(f"Shard {shard} worker stopped"))
+
+    def search(self, queries, k):
+        """Search all shards in parallel and return the merged (scores, ids), like FAISS."""
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        request_id = next(self._request_ids)
+        futures = [Future() for _ in self._connections]
+        with self._pending_lock:
+            for shard, future in enumerate(futures):
+                self._pending[(request_id, shard)] = future
+        for conn, lock in zip(self._connections, self._send_locks):
+            with lock:
+                conn.send((request_id, queries, k))
+        parts = [future.result() for future in futures]
+        return merge_top_k([D for D, _ in parts], [I for _, I in parts], k)
+
+    def close(self):
+        """Stop the worker processes."""
+        for conn, lock in zip(self._connections, self._send_locks):
+            try:
+                with lock:
+                    conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        for reader in self._readers:
+            reader.join(timeout=5)
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+        self._processes = []
+        self._readers = []
+        self._send_locks = []
+
+    def __del__(self):
+        self.close()
+
+
+def benchmark(embeddings_path, shard_counts, num_queries=2000, k=10, batch_size=64, concurrency=ENGINE_WORKERS):
+    """
+    Single-query latency, batched throughput and the throughput of single queries
+    issued from `concurrency` threads at once (as the engine pool does) for each shard count.
+    """
+    embeddings = np.load(embeddings_path, mmap_mode='r')
+    rng = np.random.default_rng(0)
+    queries = np.asarray(embeddings[rng.integers(0, len(embeddings), num_queries)], dtype=np.float32)
+    queries += rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    rows = []
+    for num_shards in shard_counts:
+        index = ShardedIndex(embeddings_path, num_shards=num_shards)
+        index.search(queries[:8], k)  # warm-up
+
+        latencies = []
+        for query in queries[:min(num_queries, 500)]:
+            start = time.perf_counter()
+            index.search(query[None, :], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        for offset in range(0, num_queries, batch_size):
+            index.search(queries[offset:offset + batch_size], k)
+        elapsed = time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=concurrency) as threads:
+            start = time.perf_counter()
+            list(threads.map(lambda query: index.search(query[None, :], k), queries))
+            concurrent_elapsed = time.perf_counter() - start
+        index.close()
+
+        rows.append({
+            'shards': num_shards,
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'queries_per_sec': num_queries / elapsed,
+            'concurrent_queries_per_sec': num_queries / concurrent_elapsed,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sharded index as shards are added.")
+    parser.add_argument("--embeddings", default=os.path.join("embeddings", "game_embeddings.npy"))
+    parser.add_argument("--shards", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=ENGINE_WORKERS,
+                        help="threads issuing single queries at once")
+    args = parser.parse_args()
+
+    rows = benchmark(args.embeddings, args.shards, num_queries=args.queries, k=args.k, batch_size=args.batch_size,
+                     concurrency=args.concurrency)
+    print(f"\n{'shards':>8} | {'p50_ms':>10} | {'p99_ms':>10} | {'batched q/s':>12} | {'concurrent q/s':>14}")
+    print("-" * 67)
+    for row in rows:
+        print(f"{row['shards']:>8} | {row['p50_ms']:>10.3f} | {row['p99_ms']:>10.3f} | {row['queries_per_sec']:>12.1f} | "
+              f"{row['concurrent_queries_per_sec']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
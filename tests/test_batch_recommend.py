@@ -0,0 +1,56 @@
+"""JSONL batch answering: output order and per-line errors."""
+
+import json
+
+import pandas as pd
+
+from batch_recommend import answer_batch
+from catalog import filter_mask
+
+
+class StubRecommender:
+    """Answers each query with its own text; filters are validated like the real engine."""
+    df = pd.DataFrame({'Game Title': ['Celeste'], 'Genre': ['Platformer'], 'Price': [19.99]})
+
+    def __init__(self):
+        self.calls = []
+
+    def batch_query(self, queries, top_k=5, candidates=50, filters=None):
+        self.calls.append(list(queries))
+        for query_filters in filters or []:
+            filter_mask(self.df, query_filters)
+        return [[(query.upper(), 0.123456)] for query in queries]
+
+
+def test_keeps_input_order_in_one_batch():
+    recommender = StubRecommender()
+    lines = [json.dumps({'id': i, 'query': f"query {i}", 'mood': 'Chill'}) for i in range(5)]
+    records = [json.loads(line) for line in answer_batch(recommender, lines)]
+    assert [record['id'] for record in records] == list(range(5))
+    assert records[3] == {'id': 3, 'query': 'query 3', 'mood': 'Chill',
+                          'results': [{'name': 'QUERY 3', 'score': 0.1235}]}
+    assert recommender.calls == [[f"query {i}" for i in range(5)]]
+
+
+def test_bad_lines_and_filters_fail_only_their_own_record():
+    recommender = StubRecommender()
+    lines = [
+        json.dumps({'id': 'a', 'query': 'first', 'filters': {'max_price': 20}}),
+        'not json',
+        json.dumps({'id': 'b', 'query': 'second', 'filters': ['genre']}),
+        json.dumps({'id': 'c', 'query': 'third', 'filters': {'colour': 'red'}}),
+        json.dumps({'id': 'd'}),
+        json.dumps({'id': 'e', 'query': 'fifth', 'filters': {'max_price': 'cheap'}}),
+        json.dumps({'id': 'f', 'query': 'sixth'}),
+    ]
+    records = [json.loads(line) for line in answer_batch(recommender, lines)]
+    assert len(records) == len(lines)
+    assert [record.get('id') for record in records] == ['a', None, 'b', 'c', None, 'e', 'f']
+    assert records[0]['results'] == [{'name': 'FIRST', 'score': 0.1235}]
+    assert records[1]['error'].startswith('invalid input line')
+    assert records[2]['error'].startswith('invalid filters')
+    assert records[3]['error'] == "Unknown filter 'colour'"
+    assert records[4]['error'].startswith('invalid input line')
+    assert "needs a number" in records[5]['error']
+    assert records[6]['results'] == [{'name': 'SIXTH', 'score': 0.1235}]
+    assert not any('results' in record for record in records[1:6])
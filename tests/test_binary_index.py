@@ -0,0 +1,50 @@
+"""Sign-bit codes and the Hamming prefilter with exact re-scoring."""
+
+import numpy as np
+import pytest
+
+from binary_index import BinaryPrefilterIndex, binary_codes
+
+
+@pytest.fixture
+def embeddings(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 70)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    path = tmp_path / 'embeddings.npy'
+    np.save(path, vectors)
+    return str(path), vectors
+
+
+def test_codes_pack_sign_bits_into_words():
+    vectors = np.array([[1, -1, 2] + [-1] * 62, [-1] * 65], dtype=np.float32)
+    codes = binary_codes(vectors)
+    assert codes.shape == (2, 2) and codes.dtype == np.uint64
+    bits = np.unpackbits(codes.view(np.uint8), axis=1)[:, :65]
+    np.testing.assert_array_equal(bits, vectors > 0)
+
+
+def test_hamming_distance_of_identical_vector_is_zero(embeddings):
+    path, vectors = embeddings
+    index = BinaryPrefilterIndex(path, block_size=64)
+    assert index.ntotal == len(vectors)
+    assert 7 in index.hamming_candidates(vectors[7], depth=1)
+
+
+def test_full_rerank_is_exact(embeddings):
+    path, vectors = embeddings
+    index = BinaryPrefilterIndex(path, rerank=len(vectors))
+    queries = vectors[:10] + 0.05
+    D, I = index.search(queries, k=5)
+    expected = np.argsort(-(queries @ vectors.T), axis=1, kind='stable')[:, :5]
+    np.testing.assert_array_equal(I, expected)
+    np.testing.assert_allclose(D, np.take_along_axis(queries @ vectors.T, expected, axis=1), rtol=1e-5)
+
+
+def test_prefilter_keeps_near_duplicates(embeddings):
+    path, vectors = embeddings
+    index = BinaryPrefilterIndex(path, rerank=30)
+    _, I = index.search(vectors[:20], k=1)
+    assert I[:, 0].tolist() == list(range(20))
+    D, I = index.search(vectors[0], k=500)
+    assert I.shape == (1, len(vectors)) and (I >= 0).all()
@@ -0,0 +1,43 @@
+"""Compact columnar catalog, built whole or from streamed chunks."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import compact_catalog, concat_compact
+
+
+@pytest.fixture
+def catalog():
+    return pd.DataFrame({
+        'Game Title': ['Celeste', 'Journey', 'Celeste', 'Journey', 'Celeste', 'Spiritfarer'],
+        'Genre': ['Platformer', 'Adventure', 'Platformer', 'Adventure', 'Platformer', 'Management'],
+        'User Review Text': ['hard', 'calm', 'precise', 'short', 'great music', 'emotional'],
+        'User Rating': [9.0, 8.5, 'Unknown', 9.1, 8.8, 9.0],
+        'Price': [19.99, 14.99, 19.99, 14.99, 19.99, 29.99],
+    })
+
+
+def test_compact_catalog_keeps_values(catalog):
+    compact = compact_catalog(catalog, verbose=False)
+    assert isinstance(compact['Genre'].dtype, pd.CategoricalDtype)
+    assert compact['User Rating'].dtype == np.float32
+    assert np.isnan(compact['User Rating'][2])
+    assert compact['Game Title'].astype(str).tolist() == catalog['Game Title'].tolist()
+    assert compact['User Review Text'].astype(str).tolist() == catalog['User Review Text'].tolist()
+
+
+def test_streamed_chunks_concat_to_the_whole_catalog(catalog):
+    catalog = pd.concat([catalog] * 4, ignore_index=True)
+    # Chunks from pd.read_csv(chunksize=...) keep their row offsets as index
+    chunks = [catalog.iloc[start:start + 8] for start in range(0, len(catalog), 8)]
+    assert chunks[1].index[0] == 8
+    combined = concat_compact([compact_catalog(chunk, verbose=False) for chunk in chunks], verbose=False)
+    whole = compact_catalog(catalog, verbose=False)
+
+    assert list(combined.index) == list(range(len(catalog)))
+    for col in catalog.columns:
+        assert combined[col].isna().sum() == whole[col].isna().sum(), col
+        assert combined[col].astype(str).tolist() == whole[col].astype(str).tolist(), col
+    assert isinstance(combined['Genre'].dtype, pd.CategoricalDtype)
+    assert combined['Price'].dtype == np.float32
@@ -0,0 +1,54 @@
+"""Latency-based choice of serving mode."""
+
+import types
+
+import pytest
+
+import deadlines
+from deadlines import LatencyModel
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable perf_counter for the deadlines module."""
+    clock = types.SimpleNamespace(now=100.0)
+    monkeypatch.setattr(deadlines, 'time', types.SimpleNamespace(perf_counter=lambda: clock.now))
+    return clock
+
+
+def test_estimate_is_the_percentile_of_recent_samples(clock):
+    model = LatencyModel(percentile=50)
+    assert model.estimate('full') == 0.0
+    for seconds in (0.1, 0.2, 0.9):
+        model.record('full', seconds)
+    assert model.estimate('full') == pytest.approx(0.2)
+
+
+def test_choose_picks_the_most_complete_mode_that_fits(clock):
+    model = LatencyModel(percentile=100)
+    model.record('full', 0.5)
+    model.record('no_rerank', 0.3)
+    model.record('coarse', 0.1)
+    model.record('lexical', 0.01)
+    assert model.choose(1.0) == 'full'
+    assert model.choose(0.4) == 'no_rerank'
+    assert model.choose(0.05) == 'lexical'
+    assert model.choose(0.001) == 'fallback'
+    assert model.choose(0.0) == 'fallback'
+
+
+def test_old_samples_age_out(clock):
+    model = LatencyModel(max_age_seconds=60)
+    model.record('full', 2.0)
+    assert model.choose(0.5) != 'full'
+    clock.now += 61
+    # Without recent samples a mode is tried again
+    assert model.choose(0.5) == 'full'
+
+
+def test_window_keeps_latest_samples(clock):
+    model = LatencyModel(percentile=100, window=2)
+    for seconds in (5.0, 0.1, 0.2):
+        model.record('full', seconds)
+    assert model.estimate('full') == pytest.approx(0.2)
+    assert model.stats()['full'] == pytest.approx(200.0)
@@ -0,0 +1,124 @@
+"""Length-bucketed encoding and resumable, checkpointed catalog encoding."""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pytest
+
+from encoding import (MANIFEST_FILE, benchmark, encode_checkpointed, encode_texts, load_encoded, plan_batches,
+                      pool_shard_size)
+
+
+class FakeModel:
+    """Deterministic stand-in for a SentenceTransformer: one vector per text, seeded by its hash."""
+    max_seq_length = 512
+
+    def __init__(self, dim=8, fail_after=None, salt=''):
+        self.dim = dim
+        self.fail_after = fail_after
+        self.salt = salt
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        if self.fail_after is not None and len(self.encoded) >= self.fail_after:
+            raise RuntimeError('preempted')
+        self.encoded.append(list(texts))
+        return np.stack([self.vector(text) for text in texts])
+
+    def vector(self, text):
+        seed = int.from_bytes(hashlib.sha1((self.salt + text).encode()).digest()[:4], 'little')
+        return np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+
+
+@pytest.fixture
+def texts():
+    return [f"game {i} " + "word " * (i % 7) for i in range(23)]
+
+
+def normalized(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_plan_batches_respects_token_budget():
+    lengths = np.array([10, 200, 50, 200, 5, 120])
+    batches = plan_batches(lengths, token_budget=400, max_batch_size=4)
+    assert sorted(np.concatenate(batches).tolist()) == list(range(len(lengths)))
+    for batch in batches:
+        assert lengths[batch].max() * len(batch) <= 400
+    assert batches[0][0] in (1, 3)
+
+
+def test_encode_texts_restores_input_order(texts):
+    model = FakeModel()
+    vectors = encode_texts(model, texts, token_budget=16, show_progress=False)
+    expected = np.stack([model.vector(text) for text in texts])
+    np.testing.assert_allclose(vectors, expected)
+    assert len(model.encoded) > 1
+
+
+def test_checkpointed_encode_matches_plain_encode(tmp_path, texts):
+    output = str(tmp_path / 'emb.npy')
+    model = FakeModel()
+    encode_checkpointed(model, texts, output, shard_size=5, model_name='fake')
+    expected = normalized(np.stack([model.vector(text) for text in texts]))
+    np.testing.assert_allclose(np.load(output), expected, rtol=1e-6)
+    assert not os.path.exists(output + '.parts')
+    np.testing.assert_allclose(load_encoded(output, texts, model_name='fake'), expected, rtol=1e-6)
+    assert load_encoded(output, texts + ['new game'], model_name='fake') is None
+    assert load_encoded(output, texts, model_name='other') is None
+
+
+def test_resume_encodes_only_missing_shards(tmp_path, texts):
+    output = str(tmp_path / 'emb.npy')
+    # Each shard is one encode call at this budget: fail after two shards are checkpointed
+    crashing = FakeModel(fail_after=2)
+    with pytest.raises(RuntimeError):
+        encode_checkpointed(crashing, texts, output, shard_size=5, model_name='fake')
+    with open(os.path.join(output + '.parts', MANIFEST_FILE)) as f:
+        assert json.load(f)['completed'] == [0, 1]
+
+    resumed = FakeModel()
+    encode_checkpointed(resumed, texts, output, shard_size=5, model_name='fake')
+    assert sorted(text for batch in resumed.encoded for text in batch) == sorted(texts[10:])
+    expected = normalized(np.stack([resumed.vector(text) for text in texts]))
+    np.testing.assert_allclose(np.load(output), expected, rtol=1e-6)
+
+
+@pytest.mark.parametrize('change', ['model', 'texts', 'dim'])
+def test_stale_checkpoint_is_discarded(tmp_path, texts, change):
+    output = str(tmp_path / 'emb.npy')
+    with pytest.raises(RuntimeError):
+        encode_checkpointed(FakeModel(fail_after=2), texts, output, shard_size=5, model_name='fake')
+
+    model_name, model = 'fake', FakeModel(salt='v2')
+    if change == 'model':
+        model_name = 'fake-v2'
+    elif change == 'texts':
+        texts = texts[:-1] + ['a different game']
+    else:
+        # Same name, different model: the dim mismatch alone must restart the encode
+        model = FakeModel(dim=4, salt='v2')
+    encode_checkpointed(model, texts, output, shard_size=5, model_name=model_name)
+    assert sum(len(batch) for batch in model.encoded) == len(texts)
+    expected = normalized(np.stack([model.vector(text) for text in texts]))
+    np.testing.assert_allclose(np.load(output), expected, rtol=1e-6)
+
+
+def test_pool_shard_size_spreads_work_over_workers():
+    assert pool_shard_size(1000, workers=4) == 63
+    assert pool_shard_size(10 ** 6, workers=4, shard_size=10000) == 10000
+    assert pool_shard_size(3, workers=8) == 1
+
+
+def test_benchmark_baseline_encodes_source_order_slices(texts):
+    model = FakeModel()
+    rows = benchmark(model, texts, batch_size=5)
+    assert [row['mode'].split(',')[0] for row in rows] == ['source order', 'library length-sorted', 'bucketed']
+    # Warm-up, then one call per consecutive slice of the input
+    assert model.encoded[1:6] == [texts[i:i + 5] for i in range(0, len(texts), 5)]
+    assert rows[0]['padding_efficiency'] <= rows[1]['padding_efficiency']
@@ -0,0 +1,84 @@
+"""Per-field embeddings: query-time weights and reuse of saved vectors."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from field_embeddings import MultiFieldEmbeddings, fingerprint_fields
+
+
+class OneHotModel:
+    """Encodes each distinct word of a text into its own dimension."""
+    vocabulary = ['celeste', 'journey', 'platformer', 'adventure', 'teen', 'everyone']
+
+    def encode(self, texts, **kwargs):
+        vectors = np.full((len(texts), len(self.vocabulary)), 1e-3, dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                if word in self.vocabulary:
+                    vectors[row, self.vocabulary.index(word)] = 1.0
+        return vectors
+
+
+@pytest.fixture
+def catalog():
+    return pd.DataFrame({
+        'Game Title': ['Celeste', 'Journey', 'Celeste'],
+        'Genre': ['Adventure', 'Platformer', 'Adventure'],
+        'Age Group Targeted': ['Teen', 'Everyone', 'Teen'],
+    })
+
+
+def query(*words):
+    return OneHotModel().encode([" ".join(words)])[0]
+
+
+def test_distinct_values_are_encoded_once(catalog):
+    embeddings = MultiFieldEmbeddings.build(catalog, OneHotModel())
+    assert embeddings.fields == ['title', 'genre', 'age']
+    assert len(embeddings) == 3
+    assert embeddings.vectors['title'].shape[0] == 2
+    assert embeddings.codes['title'].tolist() == [0, 1, 0]
+
+
+def test_weights_change_the_ranking_without_re_encoding(catalog):
+    embeddings = MultiFieldEmbeddings.build(catalog, OneHotModel())
+    q = query('journey', 'adventure')
+    ids, _ = embeddings.search(q, k=1, weights={'title': 1.0})
+    assert ids.tolist() == [1]
+    ids, _ = embeddings.search(q, k=1, weights={'genre': 1.0})
+    assert ids.tolist() in ([0], [2])
+    assert embeddings.scores(q, weights={'title': 0.0}).tolist() == [0.0, 0.0, 0.0]
+
+
+def test_saved_vectors_are_reused_only_for_the_same_fields(tmp_path, catalog):
+    fingerprint = fingerprint_fields(catalog, 'model-a')
+    MultiFieldEmbeddings.build(catalog, OneHotModel(), fingerprint=fingerprint).save(str(tmp_path))
+    assert MultiFieldEmbeddings.load(str(tmp_path), 3, fingerprint=fingerprint) is not None
+
+    # Same row count, different field values
+    changed = catalog.assign(**{'Genre': ['Adventure', 'Adventure', 'Platformer']})
+    assert fingerprint_fields(changed, 'model-a') != fingerprint
+    assert MultiFieldEmbeddings.load(str(tmp_path), 3, fingerprint=fingerprint_fields(changed, 'model-a')) is None
+    assert MultiFieldEmbeddings.load(str(tmp_path), 3, fingerprint=fingerprint_fields(catalog, 'model-b')) is None
+    assert MultiFieldEmbeddings.load(str(tmp_path), 4) is None
+
+
+def test_files_without_fingerprint_are_rejected_when_one_is_expected(tmp_path, catalog):
+    MultiFieldEmbeddings.build(catalog, OneHotModel()).save(str(tmp_path))
+    assert MultiFieldEmbeddings.load(str(tmp_path), 3) is not None
+    assert MultiFieldEmbeddings.load(str(tmp_path), 3, fingerprint=fingerprint_fields(catalog)) is None
+
+
+def test_fields_are_encoded_in_length_buckets(catalog, monkeypatch):
+    import field_embeddings
+    calls = []
+
+    def spy(model, texts, **kwargs):
+        calls.append((list(texts), kwargs))
+        return OneHotModel().encode(texts)
+
+    monkeypatch.setattr(field_embeddings, 'encode_texts', spy)
+    MultiFieldEmbeddings.build(catalog, OneHotModel(), batch_size=16)
+    assert [texts for texts, _ in calls] == [['Celeste', 'Journey'], ['Adventure', 'Platformer'], ['Teen', 'Everyone']]
+    assert all(kwargs['max_batch_size'] == 16 for _, kwargs in calls)
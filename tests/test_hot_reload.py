@@ -0,0 +1,106 @@
+"""Reference-counted snapshots and atomic swaps."""
+
+import threading
+
+import pytest
+
+from hot_reload import SnapshotManager
+
+
+class Catalog:
+    def __init__(self, version):
+        self.version = version
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def built():
+    return []
+
+
+@pytest.fixture
+def manager(built):
+    def build(previous):
+        catalog = Catalog(0 if previous is None else previous.version + 1)
+        built.append(catalog)
+        return catalog
+    return SnapshotManager(build, name='test')
+
+
+def test_first_use_builds_once(manager, built):
+    assert manager.current().version == 0
+    with manager.acquire() as catalog:
+        assert catalog is built[0]
+    assert manager.generation == 1 and len(built) == 1
+
+
+def test_reload_swaps_and_releases_idle_snapshot(manager, built):
+    manager.current()
+    manager.reload(wait=True)
+    assert manager.current().version == 1
+    assert manager.generation == 2
+    assert built[0].closed and not built[1].closed
+
+
+def test_in_flight_query_keeps_its_snapshot_until_done(manager, built):
+    manager.current()
+    started, finish = threading.Event(), threading.Event()
+    seen = []
+
+    def query():
+        with manager.acquire() as catalog:
+            started.set()
+            finish.wait(5)
+            seen.append((catalog.version, catalog.closed))
+
+    worker = threading.Thread(target=query)
+    worker.start()
+    started.wait(5)
+    manager.reload(wait=True)
+    # New queries see the new snapshot, the old one stays open while pinned
+    assert manager.current().version == 1
+    assert not built[0].closed
+    finish.set()
+    worker.join(5)
+    assert seen == [(0, False)]
+    assert built[0].closed
+
+
+def test_refcount_releases_after_last_of_several_queries(manager, built):
+    manager.current()
+    first, second = manager.acquire(), manager.acquire()
+    first.__enter__()
+    second.__enter__()
+    manager.reload(wait=True)
+    first.__exit__(None, None, None)
+    assert not built[0].closed
+    second.__exit__(None, None, None)
+    assert built[0].closed
+
+
+def test_failed_rebuild_keeps_current_snapshot(built):
+    def build(previous):
+        if previous is not None:
+            raise RuntimeError('catalog download failed')
+        built.append(Catalog(0))
+        return built[0]
+
+    manager = SnapshotManager(build, name='test')
+    manager.current()
+    manager.reload(wait=True)
+    assert manager.current() is built[0]
+    assert manager.generation == 1 and not built[0].closed
+
+
+def test_close_errors_do_not_break_the_swap(built):
+    class Broken(Catalog):
+        def close(self):
+            raise OSError('worker already gone')
+
+    manager = SnapshotManager(lambda previous: Broken(0 if previous is None else 1), name='test')
+    manager.current()
+    manager.reload(wait=True)
+    assert manager.current().version == 1
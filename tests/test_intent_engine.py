@@ -0,0 +1,65 @@
+"""The Aho-Corasick matcher must agree with plain `keyword in text.lower()` matching."""
+
+import random
+
+import pytest
+
+from intent_engine import INTENT_TABLES, IntentEngine, match_intents
+
+
+def naive_hits(tables, text):
+    text_lower = text.lower()
+    return {
+        table: {category for category, keywords in categories.items()
+                if any(keyword.lower() in text_lower for keyword in keywords)}
+        for table, categories in tables.items()
+    }
+
+
+def engine_hits(engine, tables, text):
+    match = engine.scan(text)
+    return {table: set(match.all(table)) for table in tables}
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    "I'm feeling low and want something chill",
+    'Quick co-op game to play with FRIENDS for 30 minutes',
+    'I want to learn Spanish with my child',
+    'thinking about a long strategy marathon',
+    'downtown adventure',  # keyword inside a longer word still counts
+    'nothing to do, tired of everything, stuck',
+])
+def test_scan_matches_naive_substring_search(text):
+    engine = IntentEngine(INTENT_TABLES)
+    assert engine_hits(engine, INTENT_TABLES, text) == naive_hits(INTENT_TABLES, text)
+
+
+def test_scan_matches_naive_on_random_keyword_soup():
+    rng = random.Random(0)
+    keywords = sorted({kw for categories in INTENT_TABLES.values()
+                       for kws in categories.values() for kw in kws})
+    engine = IntentEngine(INTENT_TABLES)
+    for _ in range(200):
+        words = rng.sample(keywords, 3) + ['xyz', 'the', 'Ab']
+        rng.shuffle(words)
+        # Drop spaces at random so keywords overlap and straddle word boundaries
+        text = ''.join(word + rng.choice([' ', '']) for word in words)
+        assert engine_hits(engine, INTENT_TABLES, text) == naive_hits(INTENT_TABLES, text)
+
+
+def test_overlapping_and_suffix_keywords():
+    tables = {'t': {'he': ['he'], 'she': ['she'], 'his': ['his'], 'hers': ['hers']}}
+    engine = IntentEngine(tables)
+    for text in ['ushers', 'she', 'this', 'h', 'hishers']:
+        assert engine_hits(engine, tables, text) == naive_hits(tables, text)
+
+
+def test_first_follows_table_order():
+    match = match_intents('feeling sad but also happy')
+    # 'sad' comes before 'happy' in intent_rules, 'happy' before 'sad' in mood
+    assert match.first('intent_rules') == 'sad'
+    assert match.first('mood') == 'happy'
+    assert match.first('time', 'any') == 'any'
+    assert match.has('mood', 'sad')
+    assert not match.has('social')
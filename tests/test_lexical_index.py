@@ -0,0 +1,115 @@
+"""BM25 scoring, reciprocal-rank fusion and the hybrid retrieval shortcuts."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lexical_index import LexicalIndex, hybrid_search, reciprocal_rank_fusion
+
+
+@pytest.fixture
+def catalog():
+    # Review-level catalog: the same game appears on several rows
+    return pd.DataFrame({
+        'Game Title': ['Stardew Valley', 'Stardew Valley', 'Hollow Knight', 'Celeste',
+                       'Hollow Knight', 'Portal 2'],
+        'Genre': ['Simulation', 'Simulation', 'Metroidvania', 'Platformer',
+                  'Metroidvania', 'Puzzle'],
+        'User Review Text': ['cozy farming with friends', 'relaxing farming life',
+                             'hard combat and exploration', 'hard precise platforming',
+                             'beautiful dark world', 'clever puzzle co-op'],
+    })
+
+
+@pytest.fixture
+def index(catalog):
+    return LexicalIndex().build(catalog)
+
+
+def no_dense(query, k):
+    raise AssertionError('dense search should not be called')
+
+
+def test_rrf_sums_reciprocal_ranks():
+    fused = dict(reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=60))
+    assert fused[1] == pytest.approx(1 / 61 + 1 / 62)
+    assert fused[2] == pytest.approx(1 / 62)
+    assert fused[3] == pytest.approx(1 / 63 + 1 / 61)
+
+
+def test_rrf_orders_best_first():
+    ranked = reciprocal_rank_fusion([[5, 7], [7, 9]], k=1)
+    assert [idx for idx, _ in ranked] == [7, 5, 9]
+
+
+def test_search_ranks_by_bm25(index):
+    ids, scores = index.search('farming', top_k=5)
+    assert sorted(ids.tolist()) == [0, 1]
+    assert np.all(np.diff(scores) <= 0)
+    # Title hits weigh more than review hits
+    ids, _ = index.search('puzzle', top_k=1)
+    assert ids.tolist() == [5]
+
+
+def test_search_without_matches_is_empty(index):
+    ids, scores = index.search('racing', top_k=5)
+    assert len(ids) == 0 and len(scores) == 0
+
+
+def test_score_matches_bincount_of_postings(index):
+    scores = index.score('hard farming')
+    expected = np.zeros(index.num_docs)
+    for term in ('hard', 'farming'):
+        doc_ids, weights = index.postings[term]
+        expected[doc_ids] += weights
+    np.testing.assert_allclose(scores, expected, rtol=1e-6)
+
+
+def test_exact_title_answers_without_dense_search(index):
+    related = lambda row, k: [(3, 0.9), (0, 0.8)]
+    ranked, used_dense = hybrid_search(index, 'hollow knight', no_dense, top_k=3, related=related)
+    assert not used_dense
+    assert [idx for idx, _ in ranked] == [2, 3, 0]
+    assert ranked[0][1] == 1.0
+
+
+def test_exact_title_pads_from_bm25_without_related(index):
+    ranked, used_dense = hybrid_search(index, 'Stardew Valley', no_dense, top_k=3)
+    assert not used_dense
+    # Only one row per game, even though the title matches two rows
+    assert [idx for idx, _ in ranked] == [0]
+
+
+def test_keyword_query_keeps_one_row_per_title(index):
+    ranked, used_dense = hybrid_search(index, 'metroidvania', no_dense, top_k=2, min_results=1)
+    assert not used_dense
+    assert len(ranked) == 1
+    assert index.row_titles[ranked[0][0]] == index.row_titles[2]
+
+
+def test_short_keyword_results_fall_back_to_fusion(index):
+    calls = []
+
+    def dense(query, k):
+        calls.append(k)
+        return np.array([3, 5, 0]), np.array([0.9, 0.8, 0.7])
+
+    ranked, used_dense = hybrid_search(index, 'farming', dense, top_k=3, candidates=10)
+    assert used_dense and calls == [10]
+    ids = [idx for idx, _ in ranked]
+    assert len(ids) == 3 and ids[0] == 0
+    assert all(0 < score <= 1 for _, score in ranked)
+
+
+def test_chatty_query_uses_dense_search(index):
+    dense = lambda query, k: (np.array([5]), np.array([1.0]))
+    ranked, used_dense = hybrid_search(index, 'a clever puzzle to solve with my partner tonight', dense, top_k=1)
+    assert used_dense
+    assert ranked[0][0] == 5
+
+
+def test_keyword_shortcut_can_be_turned_off(index):
+    dense = lambda query, k: (np.array([3]), np.array([1.0]))
+    ranked, used_dense = hybrid_search(index, 'metroidvania', dense, top_k=1, keyword_shortcut=False)
+    assert used_dense
+    assert {idx for idx, _ in ranked} <= {2, 3, 4}
@@ -0,0 +1,83 @@
+"""Title centroids and the blocked "more like this" neighbor table."""
+
+import os
+
+import numpy as np
+import pytest
+
+from encoding import save_embeddings_meta
+from neighbors import NeighborTable, compute_neighbor_table, embeddings_fingerprint, title_centroids
+
+
+def normalized(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_title_centroids_are_normalized_means():
+    embeddings = np.array([[1, 0], [0, 1], [3, 0], [0, 2]], dtype=np.float32)
+    centroids = title_centroids(embeddings, [0, 1, 0, 1], block_size=3)
+    np.testing.assert_allclose(centroids, [[1, 0], [0, 1]])
+    centroids = title_centroids(embeddings, [0, 0, 1, 1])
+    np.testing.assert_allclose(centroids, normalized(np.array([[1, 1], [3, 2]], dtype=np.float32)), rtol=1e-6)
+
+
+@pytest.mark.parametrize('block_size', [3, 7, 64])
+def test_blocked_table_matches_brute_force(block_size):
+    embeddings = normalized(np.random.default_rng(0).standard_normal((40, 8)).astype(np.float32))
+    ids, scores = compute_neighbor_table(embeddings, k=5, block_size=block_size, workers=2)
+
+    sims = embeddings @ embeddings.T
+    np.fill_diagonal(sims, -np.inf)
+    expected = np.argsort(-sims, axis=1, kind='stable')[:, :5]
+    np.testing.assert_array_equal(ids, expected)
+    np.testing.assert_allclose(scores, np.take_along_axis(sims, expected, axis=1), atol=1e-3)
+    assert ids.dtype == np.int32 and scores.dtype == np.float16
+
+
+def test_k_is_capped_by_catalog_size():
+    embeddings = normalized(np.eye(3, dtype=np.float32) + 0.1)
+    ids, _ = compute_neighbor_table(embeddings, k=10)
+    assert ids.shape == (3, 2)
+    assert all(row not in ids[row] for row in range(3))
+
+
+def small_table(fingerprint=None, score=0.5):
+    return NeighborTable(np.array([[1, -1], [0, -1]], dtype=np.int32),
+                         np.array([[score, 0.0], [score, 0.0]], dtype=np.float16), fingerprint)
+
+
+def test_table_round_trips_through_disk(tmp_path):
+    assert NeighborTable.load(str(tmp_path)) is None
+    small_table('abc').save(str(tmp_path))
+    loaded = NeighborTable.load(str(tmp_path), fingerprint='abc')
+    assert len(loaded) == 2 and loaded.fingerprint == 'abc'
+    assert loaded.lookup(0, top_k=5) == [(1, 0.5)]
+
+
+def test_table_from_other_embeddings_is_rejected(tmp_path):
+    small_table('abc').save(str(tmp_path))
+    assert NeighborTable.load(str(tmp_path), fingerprint='other') is None
+    small_table().save(str(tmp_path))
+    assert NeighborTable.load(str(tmp_path)) is not None
+    assert NeighborTable.load(str(tmp_path), fingerprint='abc') is None
+
+
+def test_rebuild_leaves_open_tables_intact(tmp_path):
+    small_table('old', score=0.5).save(str(tmp_path))
+    serving = NeighborTable.load(str(tmp_path), fingerprint='old')
+    small_table('new', score=0.25).save(str(tmp_path))
+    assert serving.lookup(0) == [(1, 0.5)]
+    assert NeighborTable.load(str(tmp_path), fingerprint='new').lookup(0) == [(1, 0.25)]
+    assert not [name for name in os.listdir(tmp_path) if '.tmp' in name]
+
+
+def test_embeddings_fingerprint_follows_catalog_and_model(tmp_path):
+    path = str(tmp_path / 'embeddings.npy')
+    np.save(path, np.zeros((2, 2), dtype=np.float32))
+    assert embeddings_fingerprint(path) is None
+    save_embeddings_meta(path, 'texts-a', 2, 2, 'model-a')
+    first = embeddings_fingerprint(path)
+    save_embeddings_meta(path, 'texts-a', 2, 2, 'model-b')
+    assert embeddings_fingerprint(path) not in (None, first)
+    save_embeddings_meta(path, 'texts-b', 2, 2, 'model-a')
+    assert embeddings_fingerprint(path) not in (None, first)
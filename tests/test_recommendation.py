@@ -0,0 +1,143 @@
+"""Precomputed answers for the apps' suggestion prompts."""
+
+import pytest
+
+import recommendation
+
+
+def game(name):
+    return {'name': name, 'rating': 9.0, 'price': 0, 'reviews': 100, 'description': 'A game'}
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """Stubbed engine: counts _build_recommendations calls, serves index version `engine.version`."""
+    class Engine:
+        version = 'v1'
+        mode = 'full'
+
+        def __init__(self):
+            self.calls = []
+
+        def build(self, user_input, mood, diversity, session_id=None, deadline=None):
+            self.calls.append((user_input, mood))
+            name = f"{user_input} / {mood if self.mode == 'fallback' else 'any'}"
+            return [game(name)], 'because', True, self.mode
+
+    engine = Engine()
+    monkeypatch.setattr(recommendation, '_canned_answers', {})
+    monkeypatch.setattr(recommendation, '_canned_refreshing', set())
+    monkeypatch.setattr(recommendation, '_suggestion_prompts', {})
+    monkeypatch.setattr(recommendation, '_build_recommendations', engine.build)
+    monkeypatch.setattr(recommendation, '_index_version', lambda: engine.version)
+    monkeypatch.setattr(recommendation, '_mark_shown', lambda session_id, recommendations: None)
+    return engine
+
+
+MOODS = (None, 'Happy', 'Sad', 'Chill')
+
+
+def test_engine_runs_once_per_prompt(engine):
+    assert recommendation.precompute_canned_answers(['Relaxing games', 'Something scary'], moods=MOODS) == 8
+    assert engine.calls == [('Relaxing games', None), ('Something scary', None)]
+    for mood in MOODS:
+        recommendations, _, _, mode = recommendation.get_recommendations_response('relaxing games!', mood)
+        assert mode == 'canned'
+        assert recommendations == [game('Relaxing games / any')]
+    assert len(engine.calls) == 2
+
+
+def test_fallback_answers_are_computed_per_mood(engine):
+    engine.mode = 'fallback'
+    assert recommendation.precompute_canned_answers(['Relaxing games'], moods=MOODS) == 4
+    assert [mood for _, mood in engine.calls] == list(MOODS)
+    recommendations, _, _, _ = recommendation.get_recommendations_response('Relaxing games', 'Sad')
+    assert recommendations == [game('Relaxing games / Sad')]
+
+
+def test_only_stale_answers_are_recomputed(engine):
+    recommendation.precompute_canned_answers(['Relaxing games'], moods=MOODS)
+    assert recommendation.precompute_canned_answers(['Relaxing games'], moods=MOODS) == 0
+    assert len(engine.calls) == 1
+
+    engine.version = 'v2'
+    assert recommendation.precompute_canned_answers(['Relaxing games'], moods=MOODS) == 4
+    assert len(engine.calls) == 2
+
+
+def test_stale_refresh_recomputes_every_mood_of_the_prompt_once(engine):
+    recommendation.precompute_canned_answers(['Relaxing games'], moods=MOODS)
+    engine.version = 'v2'
+    key = recommendation._response_key('Relaxing games', 'Happy', None)
+    recommendation._refresh_canned_answer(key)
+    assert len(engine.calls) == 2
+    assert all(entry[0] == 'v2' for entry in recommendation._canned_answers.values())
+    assert not recommendation._canned_refreshing
+
+
+class FakePool:
+    """Engine pool stand-in: holds submitted tasks until run(), or rejects them when full."""
+    def __init__(self, full=False):
+        self.full = full
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        if self.full:
+            raise recommendation.QueueFullError("full")
+        self.tasks.append((fn, args))
+
+    def run(self):
+        tasks, self.tasks = self.tasks, []
+        for fn, args in tasks:
+            fn(*args)
+
+
+def test_stale_answer_refreshes_once_through_the_pool(engine, monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(recommendation, 'get_engine_pool', lambda: pool)
+    recommendation.precompute_canned_answers(['Relaxing games'], moods=MOODS)
+    engine.version = 'v2'
+    for _ in range(3):
+        _, _, _, mode = recommendation.get_recommendations_response('Relaxing games', 'Happy')
+        assert mode == 'canned'
+    assert len(pool.tasks) == 1
+    pool.run()
+    assert len(engine.calls) == 2
+    assert not recommendation._canned_refreshing
+    recommendation.get_recommendations_response('Relaxing games', 'Happy')
+    assert not pool.tasks
+
+
+def test_refresh_is_dropped_when_the_pool_is_full(engine, monkeypatch):
+    pool = FakePool(full=True)
+    monkeypatch.setattr(recommendation, 'get_engine_pool', lambda: pool)
+    recommendation.precompute_canned_answers(['Relaxing games'], moods=MOODS)
+    engine.version = 'v2'
+    recommendations, _, _, mode = recommendation.get_recommendations_response('Relaxing games', None)
+    assert (recommendations, mode) == ([game('Relaxing games / any')], 'canned')
+    assert not recommendation._canned_refreshing
+    # A later request retries once the pool has room
+    pool.full = False
+    recommendation.get_recommendations_response('Relaxing games', None)
+    assert len(pool.tasks) == 1
+
+
+def test_fallback_rankings_are_read_only_and_do_not_grow(monkeypatch):
+    import copy
+    database = copy.deepcopy(recommendation.GAME_DATABASE)
+    monkeypatch.setattr(recommendation, 'ML_ENGINE_AVAILABLE', False)
+    ranking = recommendation.fallback_recommendations('adventure', 'Happy')
+    with pytest.raises(TypeError):
+        ranking[0]['rating'] = 1.0
+    with pytest.raises(TypeError):
+        recommendation.FALLBACK_RANKINGS[('adventure', None)] = ()
+    # Same ranking as sorting the intent's games plus the mood's top two
+    expected = sorted(database['adventure'] + database['happy'][:2], key=lambda x: x['rating'], reverse=True)[:5]
+    assert [game['name'] for game in ranking] == [game['name'] for game in expected]
+
+    for _ in range(3):
+        recommendations, _, _, mode = recommendation._build_recommendations('an adventure', 'Happy', None)
+        assert mode == 'fallback' and len(recommendations) == 5
+        recommendations.append({'name': 'Added by a caller'})
+    assert len(recommendation.fallback_recommendations('adventure', 'Happy')) == 5
+    assert recommendation.GAME_DATABASE == database
@@ -0,0 +1,250 @@
+"""
+End-to-end query paths of the recommender over a small review-level catalog.
+A deterministic bag-of-words model stands in for the sentence transformer.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('spacy')
+pytest.importorskip('sentence_transformers')
+
+from game_recommender import GameRecommender  # noqa: E402
+
+
+class BagOfWordsModel:
+    """Hashes every word into one of `dim` buckets; counts encode calls."""
+    dim = 32
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        vectors = np.full((len(texts), self.dim), 1e-3, dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in str(text).lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dim] += 1
+        return vectors
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """The sample catalog with every game reviewed three times, as a CSV."""
+    sample = GameRecommender(device='cpu', embedding_dir=str(tmp_path / 'sample'), model=BagOfWordsModel())
+    df = pd.concat([sample._create_sample_data()] * 3, ignore_index=True)
+    path = tmp_path / 'catalog.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def recommender(tmp_path, catalog):
+    recommender = GameRecommender(device='cpu', embedding_dir=str(tmp_path / 'embeddings'), model=BagOfWordsModel())
+    recommender.initialize_model(catalog)
+    return recommender
+
+
+def test_new_session_is_served_from_semantic_cache_and_marked_shown(recommender):
+    cache = recommender.enable_semantic_cache(threshold=0.99)
+    query = 'a relaxing peaceful simulation with cute animals'
+    first = recommender.hybrid_query(query, top_k=3)
+    assert cache.stats()['hits'] == 0
+
+    assert not recommender.has_session_state('fresh')
+    assert recommender.hybrid_query(query, top_k=3, session_id='fresh') == first
+    assert cache.stats()['hits'] == 1
+    # A cache hit still records what the session was shown
+    assert recommender.has_session_state('fresh')
+    assert recommender.sessions.shown_count('fresh') == 3
+
+
+def test_session_with_state_bypasses_semantic_cache(recommender):
+    cache = recommender.enable_semantic_cache(threshold=0.99)
+    query = 'a relaxing peaceful simulation with cute animals'
+    first = recommender.hybrid_query(query, top_k=3, session_id='s')
+    second = recommender.hybrid_query(query, top_k=3, session_id='s')
+    assert cache.stats()['hits'] == 0
+    # Games already shown to the session are skipped
+    assert not {name for name, _ in first} & {name for name, _ in second}
+
+
+def test_exact_title_is_answered_without_encoding(recommender):
+    calls = recommender.model.calls
+    results = recommender.hybrid_query('hollow knight', top_k=5)
+    assert recommender.model.calls == calls
+    names = [name for name, _ in results]
+    assert names[0] == 'Hollow Knight'
+    assert len(names) == 5 and len(set(names)) == 5
+
+
+def test_results_show_each_game_once(recommender):
+    for query in ['emotional platformer', 'something beautiful and peaceful to explore alone']:
+        names = [name for name, _ in recommender.hybrid_query(query, top_k=5)]
+        assert len(names) == 5 and len(set(names)) == 5
+
+
+def test_similar_games_are_other_titles(recommender):
+    recommender.build_neighbor_table(k=4)
+    # One row per game, not per review
+    assert len(recommender.neighbor_table) == len(recommender.titles) == 10
+    similar = recommender.similar_games('Celeste', top_k=4)
+    names = [name for name, _ in similar]
+    assert len(names) == 4 and len(set(names)) == 4 and 'Celeste' not in names
+    assert recommender.similar_games('celeste', top_k=4) == similar
+    assert recommender.similar_games('Not A Real Game') == []
+
+
+def test_streamed_catalog_is_served_from_disk(tmp_path, catalog):
+    recommender = GameRecommender(device='cpu', embedding_dir=str(tmp_path / 'streamed'), model=BagOfWordsModel())
+    recommender.initialize_model(catalog, chunk_size=7)
+    assert isinstance(recommender.game_embeddings, np.memmap)
+    assert len(recommender.df) == recommender.index.ntotal == 30
+    # Every chunk's titles survive compaction, not only the first one's
+    assert not recommender.df['Game Title'].isna().any()
+    assert len(recommender.titles) == 10
+
+    names = [name for name, _ in recommender.hybrid_query('emotional platformer', top_k=5)]
+    assert len(set(names)) == 5 and set(names) <= set(recommender.titles)
+
+
+def test_streamed_catalog_reuses_matching_embeddings(tmp_path, catalog):
+    model = BagOfWordsModel()
+    first = GameRecommender(device='cpu', embedding_dir=str(tmp_path / 'streamed'), model=model)
+    first.initialize_model(catalog, chunk_size=7)
+    assert first.reencoded and model.calls > 0
+
+    calls = model.calls
+    second = GameRecommender(device='cpu', embedding_dir=str(tmp_path / 'streamed'), model=model)
+    second.initialize_model(catalog, chunk_size=7)
+    assert not second.reencoded and model.calls == calls
+    assert second.hybrid_query('emotional platformer', top_k=3) == first.hybrid_query('emotional platformer', top_k=3)
+
+    # An edited catalog is encoded again
+    df = pd.read_csv(catalog)
+    df.loc[0, 'User Review Text'] = 'Completely different review'
+    df.to_csv(catalog, index=False)
+    third = GameRecommender(device='cpu', embedding_dir=str(tmp_path / 'streamed'), model=model)
+    third.initialize_model(catalog, chunk_size=7)
+    assert third.reencoded and model.calls > calls
+
+
+def test_binary_prefilter_releases_the_dense_matrix(recommender):
+    expected = recommender.hybrid_query('emotional platformer', top_k=3)
+    index = recommender.enable_binary_prefilter(rerank=recommender.index.ntotal)
+    assert recommender.index is index
+    assert isinstance(recommender.game_embeddings, np.memmap)
+    results = recommender.hybrid_query('emotional platformer', top_k=3)
+    assert [name for name, _ in results] == [name for name, _ in expected]
+    assert [score for _, score in results] == pytest.approx([score for _, score in expected], rel=1e-5)
+
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_cheap_deadline_modes_record_shown_games(recommender, binary):
+    import time
+    if binary:
+        recommender.enable_binary_prefilter()
+    for mode in ('full', 'no_rerank'):
+        recommender.latency_model.record(mode, 60.0)
+    results, mode = recommender.deadline_query('emotional platformer', time.perf_counter() + 30,
+                                               top_k=3, session_id='s')
+    # A flat index has no coarser search, so the engine drops straight to BM25
+    assert mode == ('coarse' if binary else 'lexical')
+    assert len(results) == 3
+    assert recommender.sessions.shown_count('s') == 3
+
+
+@pytest.mark.parametrize('query', ['emotional platformer', 'a game to unwind with after a long day'])
+def test_one_session_pages_through_the_catalog(recommender, query):
+    seen = []
+    for _ in range(3):
+        names = [name for name, _ in recommender.hybrid_query(query, top_k=3, session_id='pager')]
+        assert len(names) == 3
+        assert not set(names) & set(seen)
+        seen += names
+    # One game left: it is shown rather than a repeat of an earlier page
+    last = [name for name, _ in recommender.hybrid_query(query, top_k=3, session_id='pager')]
+    assert set(last) - set(seen) == set(recommender.titles) - set(seen)
+
+
+def test_neighbor_table_is_not_served_for_an_edited_catalog(tmp_path, catalog):
+    directory = str(tmp_path / 'embeddings')
+    first = GameRecommender(device='cpu', embedding_dir=directory, model=BagOfWordsModel())
+    first.initialize_model(catalog)
+    first.build_neighbor_table(k=3)
+
+    # Same titles, different reviews: re-encoded once, then reused on the next start
+    df = pd.read_csv(catalog)
+    df['User Review Text'] = df['User Review Text'].str.upper() + ' remastered'
+    df.to_csv(catalog, index=False)
+    for _ in range(2):
+        restarted = GameRecommender(device='cpu', embedding_dir=directory, model=BagOfWordsModel())
+        restarted.initialize_model(catalog)
+        assert restarted.neighbor_table is None
+
+    restarted.build_neighbor_table(k=3)
+    again = GameRecommender(device='cpu', embedding_dir=directory, model=BagOfWordsModel())
+    again.initialize_model(catalog)
+    assert again.neighbor_table is not None and not again.reencoded
+
+
+def test_reload_carries_sessions_over(tmp_path, catalog, recommender):
+    recommender.record_feedback('s', ['Celeste'])
+    shown = [name for name, _ in recommender.hybrid_query('emotional platformer', top_k=3, session_id='s')]
+
+    # A game is added; title ids of the other games are unchanged or shifted
+    df = pd.read_csv(catalog)
+    extra = df.iloc[[0]].assign(**{'Game Title': 'A Short Hike', 'User Review Text': 'tiny cozy hiking'})
+    pd.concat([extra, df], ignore_index=True).to_csv(catalog, index=False)
+    reloaded = GameRecommender.for_reload(recommender, device='cpu', embedding_dir=str(tmp_path / 'embeddings'))
+    reloaded.initialize_model(catalog)
+    reloaded.adopt_settings(recommender)
+
+    assert reloaded.has_session_state('s')
+    assert reloaded.sessions.shown_count('s') == 3
+    query = reloaded._encode_query('emotional platformer')
+    np.testing.assert_allclose(reloaded.sessions.blend('s', query), recommender.sessions.blend('s', query), rtol=1e-5)
+    names = [name for name, _ in reloaded.hybrid_query('emotional platformer', top_k=3, session_id='s')]
+    assert not set(names) & set(shown)
+
+
+def test_retired_sharded_snapshot_stops_its_workers(recommender):
+    index = recommender.shard_index(num_shards=2)
+    processes = list(index._processes)
+    recommender.close()
+    assert not any(process.is_alive() for process in processes)
+
+
+def test_evaluation_reports_each_index_types_footprint(tmp_path, catalog):
+    from evaluate import CONFIGURATIONS, INDEX_MODES, evaluate
+
+    queries = [('emotional platformer', {'celeste'}), ('farming simulation', {'stardew valley'})]
+    rows = {}
+    previous = None
+    for mode, switch_index in INDEX_MODES.items():
+        recommender = GameRecommender.for_reload(previous, device='cpu', embedding_dir=str(tmp_path / 'embeddings'),
+                                                 model=BagOfWordsModel())
+        recommender.initialize_model(catalog)
+        switch_index(recommender)
+        for config in [name for name, (config_mode, _) in CONFIGURATIONS.items() if config_mode == mode]:
+            rows[config] = evaluate(recommender, queries, config, k=3, warmup=1)
+        recommender.close()
+        previous = recommender
+
+    assert set(rows) == set(CONFIGURATIONS)
+    flat, binary = rows['hybrid+rerank'], rows['binary+hybrid+rerank']
+    sharded, fields = rows['sharded+hybrid+rerank'], rows['fields+hybrid+rerank']
+    # Flat: FAISS vectors plus the in-memory matrix; binary: one 64-bit code word per row plus the mapped matrix
+    assert flat['index_mb'] == pytest.approx(2 * 30 * 32 * 4 / 1e6) and flat['mapped_mb'] == 0
+    assert binary['index_mb'] == pytest.approx(30 * 8 / 1e6)
+    assert binary['mapped_mb'] == sharded['mapped_mb'] == pytest.approx(30 * 32 * 4 / 1e6)
+    assert sharded['index_mb'] == pytest.approx(30 * 32 * 4 / 1e6)
+    assert fields['index_mb'] > flat['index_mb']
+    assert all(0 <= row['recall@3'] <= 1 for row in rows.values())
@@ -0,0 +1,50 @@
+"""Maximal Marginal Relevance selection."""
+
+import numpy as np
+import pytest
+
+from reranking import mmr
+
+
+def naive_mmr(ids, relevance, embeddings, top_k, lambda_):
+    selected, remaining = [], list(range(len(ids)))
+    while remaining and len(selected) < top_k:
+        def score(i):
+            if not selected:
+                return relevance[i]
+            redundancy = max(float(embeddings[ids[i]] @ embeddings[ids[j]]) for j in selected)
+            return lambda_ * relevance[i] - (1 - lambda_) * redundancy
+        best = max(remaining, key=score)
+        selected.append(best)
+        remaining.remove(best)
+    return [ids[i] for i in selected]
+
+
+@pytest.mark.parametrize('lambda_', [0.0, 0.3, 0.7, 1.0])
+def test_matches_greedy_definition(lambda_):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((50, 8)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    ids = rng.choice(50, size=20, replace=False)
+    relevance = np.sort(rng.random(20).astype(np.float32))[::-1]
+    selected, scores = mmr(ids, relevance, embeddings, top_k=6, lambda_=lambda_)
+    assert selected.tolist() == naive_mmr(ids.tolist(), relevance, embeddings, 6, lambda_)
+    # Scores stay the candidates' own relevance, not the MMR objective
+    relevance_of = dict(zip(ids.tolist(), relevance.tolist()))
+    assert scores.tolist() == [relevance_of[idx] for idx in selected.tolist()]
+
+
+def test_diversity_skips_near_duplicates():
+    embeddings = np.array([[1, 0], [1, 0], [0, 1]], dtype=np.float32)
+    ids, _ = mmr([0, 1, 2], [1.0, 0.99, 0.5], embeddings, top_k=2, lambda_=0.5)
+    assert ids.tolist() == [0, 2]
+    ids, _ = mmr([0, 1, 2], [1.0, 0.99, 0.5], embeddings, top_k=2, lambda_=1.0)
+    assert ids.tolist() == [0, 1]
+
+
+def test_short_and_empty_candidate_lists():
+    embeddings = np.eye(3, dtype=np.float32)
+    ids, scores = mmr([2], [0.4], embeddings, top_k=5)
+    assert ids.tolist() == [2] and scores.tolist() == pytest.approx([0.4])
+    ids, scores = mmr([], [], embeddings, top_k=5)
+    assert len(ids) == 0 and len(scores) == 0
@@ -0,0 +1,108 @@
+"""LRU/TTL response cache keyed by normalized queries, and the semantic query cache."""
+
+import types
+
+import numpy as np
+import pytest
+
+import response_cache
+from response_cache import ResponseCache, SemanticCache, normalize_query
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the cache module."""
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(response_cache, 'time', types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_normalize_query_folds_case_punctuation_and_spaces():
+    assert normalize_query("  Relaxing   GAMES, please!! ") == 'relaxing games please'
+    assert normalize_query('co-op') == normalize_query('Co op')
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl_seconds=10)
+    cache.put('a', 1)
+    clock.now += 10
+    assert cache.get('a') == 1
+    clock.now += 1
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_version_change_drops_every_entry():
+    cache = ResponseCache()
+    cache.put('a', 1, version=1)
+    assert cache.get('a', version=1) == 1
+    assert cache.get('a', version=2) is None
+    cache.put('b', 2, version=2)
+    assert cache.get('a', version=2) is None and cache.get('b', version=2) == 2
+
+
+def test_stats_count_hits_and_misses():
+    cache = ResponseCache()
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('a')
+    cache.get('missing')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 1)
+    assert stats['hit_rate'] == pytest.approx(2 / 3)
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_semantic_cache_hits_near_duplicates_only():
+    cache = SemanticCache(dim=3, threshold=0.95)
+    cache.put(unit(1, 0, 0), [('Celeste', 0.9)], options=(5,))
+    assert cache.get(unit(1, 0.1, 0), options=(5,)) == (('Celeste', 0.9),)
+    assert cache.get(unit(1, 1, 0), options=(5,)) is None
+
+
+def test_semantic_cache_requires_same_options():
+    cache = SemanticCache(dim=3)
+    cache.put(unit(1, 0, 0), [('Celeste', 0.9)], options=(5, None))
+    assert cache.get(unit(1, 0, 0), options=(5, 0.5)) is None
+    assert cache.get(unit(1, 0, 0), options=(5, None)) is not None
+
+
+def test_semantic_cache_returns_most_similar_entry():
+    cache = SemanticCache(dim=3, threshold=0.9)
+    cache.put(unit(1, 0.3, 0), ['far'])
+    cache.put(unit(1, 0.05, 0), ['near'])
+    assert cache.get(unit(1, 0, 0)) == ('near',)
+
+
+def test_semantic_cache_overwrites_oldest_when_full():
+    cache = SemanticCache(dim=3, max_entries=2)
+    cache.put(unit(1, 0, 0), ['x'])
+    cache.put(unit(0, 1, 0), ['y'])
+    cache.put(unit(0, 0, 1), ['z'])
+    assert cache.get(unit(1, 0, 0)) is None
+    assert cache.get(unit(0, 1, 0)) == ('y',) and cache.get(unit(0, 0, 1)) == ('z',)
+
+
+def test_semantic_cache_expiry_and_version(clock):
+    cache = SemanticCache(dim=3, ttl_seconds=10)
+    cache.put(unit(1, 0, 0), ['x'], version=1)
+    clock.now += 11
+    assert cache.get(unit(1, 0, 0), version=1) is None
+    cache.put(unit(1, 0, 0), ['x'], version=1)
+    assert cache.get(unit(1, 0, 0), version=2) is None
+    stats = cache.stats()
+    assert (stats['expired'], stats['invalidated'], stats['entries']) == (1, 1, 0)
@@ -0,0 +1,66 @@
+"""Pre-rendered result cards produce the same text as the original per-request formatting."""
+
+import pandas as pd
+
+from result_cards import ResultCards, format_cards, render_card
+
+
+def legacy_format(recommendations):
+    """The response formatting that ran on every request before cards were pre-rendered."""
+    formatted = "🎮 **Here are my recommendations for you:**\n\n"
+    for i, game in enumerate(recommendations, 1):
+        price_text = "Free" if game['price'] == 0 else f"${game['price']}"
+        score_text = ""
+        if 'similarity_score' in game:
+            score_text = f" (Match: {game['similarity_score']:.1%})"
+        formatted += f"**{i}. {game['name']}** ⭐ {game['rating']}/10{score_text}\n"
+        formatted += f"   💰 {price_text} | 👥 {game['reviews']:,} reviews\n"
+        formatted += f"   🎭 {game.get('genre', 'Unknown')} | 🖥️ {game.get('platform', 'Multi-platform')}\n"
+        formatted += f"   📝 {game['description']}\n\n"
+    formatted += "💡 *Recommendations are based on semantic similarity and user ratings.*"
+    return formatted
+
+
+GAMES = [
+    {'name': 'Celeste', 'rating': 8.8, 'price': 19.99, 'reviews': 4800, 'description': 'Challenging platformer',
+     'similarity_score': 0.8765},
+    {'name': 'Fortnite', 'rating': 7.5, 'price': 0, 'reviews': 1234567, 'description': 'Battle royale',
+     'genre': 'Shooter', 'platform': 'PC'},
+]
+
+
+def test_render_card_splits_around_the_match_score():
+    head, tail = render_card(GAMES[0])
+    assert head == "Celeste** ⭐ 8.8/10"
+    assert tail.startswith("\n   💰 $19.99 | 👥 4,800 reviews\n")
+
+
+def test_format_cards_matches_the_legacy_text():
+    assert format_cards(GAMES) == legacy_format(GAMES)
+    # Pre-rendered cards are used as-is
+    cards = [dict(game, card=render_card(game)) for game in GAMES]
+    assert format_cards(cards) == legacy_format(GAMES)
+    assert format_cards([]) == legacy_format([])
+
+
+def test_catalog_cards_match_the_legacy_records():
+    df = pd.DataFrame({
+        'Game Title': ['Celeste', 'Celeste', 'Journey'],
+        'User Rating': [8.8, 5.0, float('nan')],
+        'Price': [19.99, 0.0, 0.0],
+        'Genre': ['Platformer', 'Platformer', 'Adventure'],
+        'User Review Text': ['A' * 150, 'Second review', 'Beautiful'],
+    })
+    cards = ResultCards.build(df)
+    assert len(cards) == 2 and cards.get('Unknown game') is None
+    # The records the request path used to build from the first catalog row of a title
+    legacy = {'name': 'Celeste', 'rating': 8.8, 'price': 19.99, 'reviews': 1000,
+              'description': f"Genre: Platformer | {'A' * 100}...", 'genre': 'Platformer',
+              'platform': 'Multi-platform', 'similarity_score': 0.5}
+    served = dict(cards.get('Celeste'), similarity_score=0.5)
+    assert {key: served[key] for key in legacy} == legacy
+    assert format_cards([served]) == legacy_format([legacy])
+    # Missing values fall back to the defaults shown before
+    journey = cards.get('Journey')
+    assert (journey['rating'], journey['price']) == (8.0, 0.0)
+    assert format_cards([journey]).count("Free") == 1
@@ -0,0 +1,63 @@
+"""Bounded per-session preference vectors and shown-game bitmaps."""
+
+import numpy as np
+import pytest
+
+from sessions import SessionStore
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_shown_games_are_excluded_until_nothing_is_left():
+    store = SessionStore(dim=2, num_items=10)
+    store.mark_shown('s', [1, 9])
+    assert store.shown_count('s') == 2
+    ids, scores = store.exclude_shown('s', [1, 2, 9], [0.9, 0.8, 0.7])
+    assert ids.tolist() == [2] and scores.tolist() == [0.8]
+    ids, _ = store.exclude_shown('s', [1, 9], [0.9, 0.7])
+    assert ids.tolist() == [1, 9]
+    ids, _ = store.exclude_shown('unknown', [1], [0.9])
+    assert ids.tolist() == [1]
+
+
+def test_least_recently_used_session_is_evicted():
+    store = SessionStore(dim=2, num_items=8, max_bytes=2 * (2 * 4 + 1))
+    store.mark_shown('a', [0])
+    store.mark_shown('b', [1])
+    store.shown_count('a')  # 'b' is now the least recently used
+    store.mark_shown('c', [2])
+    assert 'a' in store and 'c' in store and 'b' not in store
+    assert store.shown_count('c') == 1
+
+
+def test_adopt_keeps_vectors_and_remaps_shown_games():
+    old = SessionStore(dim=2, num_items=4)
+    old.record_feedback('s', [unit(1, 0)])
+    old.mark_shown('s', [0, 2, 3])
+    old.mark_shown('t', [1])
+
+    # Game 0 moved to id 5, game 2 was removed, game 3 kept its id
+    new = SessionStore(dim=2, num_items=12)
+    new.adopt(old, item_map=[5, 1, -1, 3])
+    assert len(new) == 2
+    np.testing.assert_allclose(new.blend('s', unit(0, 1)), old.blend('s', unit(0, 1)))
+    ids, _ = new.exclude_shown('s', np.arange(12), np.zeros(12))
+    assert set(range(12)) - set(ids.tolist()) == {5, 3}
+    assert new.shown_count('t') == 1
+
+
+def test_adopt_keeps_most_recent_sessions_when_smaller():
+    old = SessionStore(dim=2, num_items=8)
+    for name in 'abc':
+        old.mark_shown(name, [0])
+    new = SessionStore(dim=2, num_items=8, max_bytes=2 * (2 * 4 + 1))
+    new.adopt(old)
+    assert 'a' not in new and 'b' in new and 'c' in new
+
+
+def test_adopt_rejects_other_dims():
+    with pytest.raises(ValueError):
+        SessionStore(dim=3, num_items=4).adopt(SessionStore(dim=2, num_items=4))
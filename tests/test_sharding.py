@@ -0,0 +1,71 @@
+"""Merging per-shard top-k results, and the sharded index against an exact search."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from sharding import ShardedIndex, merge_top_k
+
+
+def exact_top_k(vectors, queries, k):
+    scores = queries @ vectors.T
+    ids = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(scores, ids, axis=1), ids
+
+
+def split_top_k(vectors, queries, bounds, k):
+    partial_scores, partial_ids = [], []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        D, I = exact_top_k(vectors[start:stop], queries, min(k, stop - start))
+        partial_scores.append(D)
+        partial_ids.append(I + start)
+    return partial_scores, partial_ids
+
+
+def test_merge_matches_global_top_k():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((100, 8)).astype(np.float32)
+    queries = rng.standard_normal((5, 8)).astype(np.float32)
+    D, I = merge_top_k(*split_top_k(vectors, queries, [0, 30, 61, 100], 10), k=10)
+    expected_D, expected_I = exact_top_k(vectors, queries, 10)
+    np.testing.assert_array_equal(I, expected_I)
+    np.testing.assert_allclose(D, expected_D, rtol=1e-6)
+
+
+def test_merge_pads_short_results_like_faiss():
+    D, I = merge_top_k([np.array([[0.5]]), np.array([[0.9, -1.0]])],
+                       [np.array([[3]]), np.array([[7, -1]])], k=4)
+    assert I.tolist() == [[7, 3, -1, -1]]
+    assert D[0, :2].tolist() == [pytest.approx(0.9), pytest.approx(0.5)]
+    assert np.all(np.isneginf(D[0, 2:]))
+
+
+@pytest.fixture(scope='module')
+def embeddings(tmp_path_factory):
+    pytest.importorskip('faiss')
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((500, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    path = tmp_path_factory.mktemp('shards') / 'embeddings.npy'
+    np.save(path, vectors)
+    return path, vectors
+
+
+def test_sharded_index_matches_exact_search(embeddings):
+    path, vectors = embeddings
+    queries = vectors[:20] + 0.01
+    expected_D, expected_I = exact_top_k(vectors, queries, 5)
+    index = ShardedIndex(str(path), num_shards=3)
+    try:
+        assert index.ntotal == len(vectors)
+        D, I = index.search(queries, 5)
+        np.testing.assert_array_equal(I, expected_I)
+        np.testing.assert_allclose(D, expected_D, rtol=1e-5)
+
+        # Concurrent single-query searches each get their own reply back
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda q: index.search(q[None], 5), queries))
+        np.testing.assert_array_equal(np.concatenate([I for _, I in results]), expected_I)
+    finally:
+        index.close()
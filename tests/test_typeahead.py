@@ -0,0 +1,69 @@
+"""Type-ahead prefix lookups."""
+
+import pytest
+
+from typeahead import PrefixIndex
+
+
+@pytest.fixture
+def index():
+    return PrefixIndex([
+        ('The Legend of Zelda', 50),
+        ('Stardew Valley', 80),
+        ('Star Wars: Squadrons', 20),
+        ('Starfield', 40),
+        ('Hollow Knight', 60),
+        ('Stardew Valley', 10),  # duplicate keeps the highest popularity
+        ('  ', 99),
+    ], max_results=2)
+
+
+def test_suggests_by_popularity(index):
+    assert len(index) == 5
+    assert index.suggest('sta', n=2) == ['Stardew Valley', 'Starfield']
+    assert index.suggest('STAR w') == ['Star Wars: Squadrons']
+
+
+def test_matches_any_word_start(index):
+    assert index.suggest('zel') == ['The Legend of Zelda']
+    assert index.suggest('k') == ['Hollow Knight']
+    assert index.suggest('ight') == []
+
+
+def test_empty_or_unknown_prefix(index):
+    assert index.suggest('') == []
+    assert index.suggest('!!') == []
+    assert index.suggest('xyz') == []
+    assert index.suggest('sta', n=0) == []
+
+
+def test_node_lists_agree_with_range_scan():
+    entries = [(f"game {word} {i}", i % 17) for i, word in enumerate(['alpha', 'beta', 'alps', 'bet', 'al'] * 8)]
+    stored = PrefixIndex(entries, max_results=10)
+    scanned = PrefixIndex(entries, max_results=0)
+    for prefix in ['g', 'game', 'game a', 'al', 'alp', 'be', 'beta 1', '1', '3']:
+        for n in (1, 5, 10):
+            assert stored.suggest(prefix, n) == scanned.suggest(prefix, n), (prefix, n)
+    # Beyond max_results the range scan takes over
+    assert stored.suggest('game', n=20) == scanned.suggest('game', n=20)
+    assert len(stored.suggest('game', n=20)) == 20
+
+
+def test_matches_brute_force_at_every_depth():
+    import random
+    rng = random.Random(7)
+    words = ['star', 'stardew', 'sta', 'wars', 'war', 'legend', 'leg', 'zelda', 'a']
+    entries = [(" ".join(rng.choice(words) for _ in range(rng.randint(1, 4))), rng.randint(0, 50))
+               for _ in range(60)]
+    index = PrefixIndex(entries, max_results=4, max_depth=3)
+
+    def expected(prefix, n):
+        hits = [text for text in index.texts
+                if any(text.lower()[i:].startswith(prefix) for i in range(len(text))
+                       if i == 0 or text[i - 1] == ' ')]
+        return hits[:n]
+
+    for prefix in ['s', 'st', 'sta', 'star', 'stard', 'star w', 'war', 'a', 'a s', 'leg', 'zelda a']:
+        for n in (1, 4, 9):
+            assert index.suggest(prefix, n) == expected(prefix, n), (prefix, n)
+    assert index.nodes > 0
@@ -0,0 +1,61 @@
+"""Bounded engine pool: fast rejection, slot accounting and stats."""
+
+import threading
+
+import pytest
+
+from worker_pool import EnginePool, QueueFullError, task_submitted_at
+
+
+@pytest.fixture
+def pool():
+    pool = EnginePool(max_workers=1, max_queue=1)
+    yield pool
+    pool._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_rejects_immediately_when_full(pool):
+    release = threading.Event()
+    running = pool.submit(release.wait, 5)
+    queued = pool.submit(lambda: 'queued')
+    with pytest.raises(QueueFullError):
+        pool.submit(lambda: 'rejected')
+    assert pool.stats()['rejected'] == 1
+    release.set()
+    assert running.result(timeout=5) is True
+    assert queued.result(timeout=5) == 'queued'
+    # Slots are released once tasks finish
+    assert pool.submit(lambda: 'again').result(timeout=5) == 'again'
+
+
+def test_cancelled_queued_task_releases_its_slot(pool):
+    release = threading.Event()
+    running = pool.submit(release.wait, 5)
+    queued = pool.submit(lambda: 'never')
+    assert queued.cancel()
+    assert pool.stats()['queue_depth'] == 0
+    # The cancelled task's slot is free again while the worker is still busy
+    replacement = pool.submit(lambda: 'replacement')
+    release.set()
+    assert replacement.result(timeout=5) == 'replacement'
+    running.result(timeout=5)
+    pool._executor.shutdown(wait=True)
+    stats = pool.stats()
+    assert (stats['completed'], stats['queue_depth'], stats['running']) == (2, 0, 0)
+
+
+def test_stats_count_completed_and_failed_tasks(pool):
+    def fail():
+        raise ValueError("boom")
+
+    assert pool.submit(lambda: task_submitted_at() is not None).result(timeout=5)
+    with pytest.raises(ValueError):
+        pool.submit(fail).result(timeout=5)
+    pool._executor.shutdown(wait=True)
+    stats = pool.stats()
+    assert stats['completed'] == 2
+    assert stats['failed'] == 1
+    assert stats['rejected'] == 0
+    assert stats['max_workers'] == 1 and stats['max_queue'] == 1
+    assert stats['run_max_ms'] >= stats['run_p50_ms'] >= 0
+    assert task_submitted_at() is None
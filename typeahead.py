@@ -0,0 +1,167 @@
+"""
+Type-ahead suggestions.
+Keys are the word starts of every normalized entry, kept as one sorted array of
+(entry, offset) pairs into the normalized texts, so no suffix string is stored:
+a prefix matches a contiguous range of that array, found by bisect. Each trie
+node (a distinct key prefix up to max_depth characters) stores its top entries by
+popularity as one row of an int32 table, addressed by the range start and the
+prefix length, so a lookup is two bisects and a row read and never touches the
+model. Deeper prefixes match few keys and are ranked by scanning their range.
+
+Usage (benchmark):
+    python typeahead.py --csv video_game_reviews.csv --prefixes the leg sta "hollow k"
+"""
+
+import argparse
+import heapq
+import os
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from response_cache import normalize_query
+
+
+class PrefixIndex:
+    """Prefix lookup over titles/prompts, ranked by popularity."""
+    def __init__(self, entries, max_results=10, max_depth=8):
+        """
+        Args:
+            entries: Iterable of (text, popularity); duplicates keep the highest popularity
+            max_results: Entries stored per prefix node; larger n falls back to a range scan
+            max_depth: Longest prefix with a stored node; longer prefixes scan their range
+        """
+        best = {}
+        for text, popularity in entries:
+            text = str(text).strip()
+            if text and popularity >= best.get(text, float('-inf')):
+                best[text] = popularity
+        # Most popular first, so positions double as ranks
+        self.texts = sorted(best, key=lambda text: (-best[text], text))
+        self._normalized = [normalize_query(text) for text in self.texts]
+
+        # One key per word start: "zel" finds "The Legend of Zelda"
+        starts = []
+        for rank, text in enumerate(self._normalized):
+            offset = 0
+            for word in text.split(" "):
+                if word:
+                    starts.append((rank, offset))
+                offset += len(word) + 1
+        starts.sort(key=lambda start: self._normalized[start[0]][start[1]:])
+        self._ranks = array('i', [rank for rank, _ in starts])
+        self._offsets = array('i', [offset for _, offset in starts])
+
+        self.max_results = max_results
+        self.max_depth = max_depth
+        self._build_nodes()
+
+    def _key(self, position, length=None):
+        """Key at a sorted position, optionally cut to its first length characters."""
+        offset = self._offsets[position]
+        text = self._normalized[self._ranks[position]]
+        return text[offset:] if length is None else text[offset:offset + length]
+
+    def _build_nodes(self):
+        """
+        Node ids follow the sorted keys: key i opens the nodes for its prefixes
+        longer than the part it shares with key i - 1, so the node of a prefix is
+        found from the first key in its range. Top lists are merged child to parent
+        while walking the keys with a stack of open nodes, one pass in total.
+        """
+        depth = self.max_depth
+        count = len(self._ranks)
+        self._shared = array('i', bytes(4 * count))
+        self._first_node = array('i', bytes(4 * (count + 1)))
+        previous = ""
+        for position in range(count):
+            key = self._key(position, depth)
+            shared = len(os.path.commonprefix([previous, key]))
+            self._shared[position] = shared
+            self._first_node[position + 1] = self._first_node[position] + len(key) - shared
+            previous = key
+        self._top = np.full((self._first_node[-1], self.max_results), -1, dtype=np.int32)
+
+        def close(node, ranks):
+            self._top[node, :len(ranks)] = ranks
+
+        stack = []  # (depth, node, sorted top ranks) along the current key
+        for position in range(count):
+            shared = self._shared[position]
+            while stack and stack[-1][0] > shared:
+                _, node, ranks = stack.pop()
+                close(node, ranks)
+                if stack:
+                    stack[-1][2][:] = sorted(set(stack[-1][2]) | set(ranks))[:self.max_results]
+            node = self._first_node[position]
+            for length in range(shared + 1, len(self._key(position, depth)) + 1):
+                stack.append((length, node, []))
+                node += 1
+            top = stack[-1][2]
+            top[:] = sorted(set(top) | {self._ranks[position]})[:self.max_results]
+        while stack:
+            _, node, ranks = stack.pop()
+            close(node, ranks)
+            if stack:
+                stack[-1][2][:] = sorted(set(stack[-1][2]) | set(ranks))[:self.max_results]
+
+    @property
+    def nodes(self):
+        """Number of stored prefix nodes."""
+        return len(self._top)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def suggest(self, prefix, n=5):
+        """Up to n entries with a word starting with prefix, most popular first."""
+        key = normalize_query(prefix)
+        if not key or n <= 0:
+            return []
+        length = len(key)
+        texts, ranks, offsets = self._normalized, self._ranks, self._offsets
+
+        def cut(position):
+            return texts[ranks[position]][offsets[position]:offsets[position] + length]
+
+        positions = range(len(ranks))
+        lo = bisect_left(positions, key, key=cut)
+        hi = bisect_right(positions, key, lo, key=cut)
+        if lo == hi:
+            return []
+        if n <= self.max_results and length <= self.max_depth:
+            node = self._first_node[lo] + length - self._shared[lo] - 1
+            top = [rank for rank in self._top[node, :n].tolist() if rank >= 0]
+        else:
+            top = heapq.nsmallest(n, set(ranks[lo:hi]))
+        return [self.texts[rank] for rank in top]
+
+
+def benchmark(csv_path, prefixes, repeats=10000):
+    """Build time and microseconds per lookup for a catalog's titles."""
+    import pandas as pd
+    counts = pd.read_csv(csv_path, usecols=['Game Title'])['Game Title'].value_counts()
+    start = time.perf_counter()
+    index = PrefixIndex(counts.items())
+    print(f"Indexed {len(index):,} titles ({index.nodes:,} prefix nodes) in {(time.perf_counter() - start) * 1000:.1f}ms")
+    for prefix in prefixes:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            suggestions = index.suggest(prefix)
+        micros = (time.perf_counter() - start) / repeats * 1e6
+        print(f"{prefix!r:>14}: {micros:6.1f}µs -> {suggestions}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Type-ahead lookup latency over catalog titles.")
+    parser.add_argument("--csv", required=True, help="catalog CSV")
+    parser.add_argument("--prefixes", nargs="+", default=["the", "leg", "sta", "hollow k"])
+    parser.add_argument("--repeats", type=int, default=10000)
+    args = parser.parse_args()
+    benchmark(args.csv, args.prefixes, repeats=args.repeats)
+
+
+if __name__ == "__main__":
+    main()
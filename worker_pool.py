@@ -0,0 +1,150 @@
+"""
+Shared, bounded worker pool for recommendation engine calls.
+Gradio handlers hand engine work to a fixed number of threads with an explicit queue
+limit; once the queue is full, new requests are rejected right away instead of piling
+up, and queue depth / wait-time metrics show how loaded the app is.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Engine threads and how many requests may wait for one (override via environment)
+ENGINE_WORKERS = int(os.environ.get("GAMEBOT_ENGINE_WORKERS", 4))
+ENGINE_QUEUE_LIMIT = int(os.environ.get("GAMEBOT_ENGINE_QUEUE_LIMIT", 32))
+
+# demo.queue() settings: let Gradio admit as many events as the pool can hold, so
+# overload is rejected fast by the pool; Gradio's own queue is bounded as well
+GRADIO_QUEUE_KWARGS = {
+    'default_concurrency_limit': ENGINE_WORKERS + ENGINE_QUEUE_LIMIT,
+    'max_size': 2 * (ENGINE_WORKERS + ENGINE_QUEUE_LIMIT),
+}
+
+BUSY_MESSAGE = ("🤖 **GameBot:** I'm helping a lot of players right now and my queue is full. "
+                "Please try again in a few seconds!")
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the engine pool cannot accept more work."""
+
+
+# Submit time of the task running on the current engine thread
+_current_task = threading.local()
+
+
+def task_submitted_at():
+    """time.perf_counter() at which the running engine task was queued, or None outside the pool."""
+    return getattr(_current_task, 'submitted', None)
+
+
+class EnginePool:
+    """
+    Fixed-size thread pool with a bounded queue and fast rejection.
+
+    At most max_workers calls run at once and at most max_queue more wait;
+    submit() raises QueueFullError immediately beyond that.
+    """
+    def __init__(self, max_workers=ENGINE_WORKERS, max_queue=ENGINE_QUEUE_LIMIT, window=1000):
+        """
+        Args:
+            max_workers: Engine calls running at the same time
+            max_queue: Calls allowed to wait for a free worker
+            window: Number of recent calls kept for wait/run time percentiles
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="engine")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._waits = deque(maxlen=window)
+        self._runs = deque(maxlen=window)
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs); returns a Future or raises QueueFullError."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise QueueFullError("Engine queue is full")
+        enqueued = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        state = {}
+
+        def task():
+            state['started'] = started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._waits.append(started - enqueued)
+            _current_task.submitted = enqueued
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current_task.submitted = None
+                state['finished'] = time.perf_counter()
+
+        def done(future):
+            # Runs for cancelled futures too, whose task() never started
+            with self._lock:
+                if 'started' not in state:
+                    self._queued -= 1
+                else:
+                    self._running -= 1
+                    self._completed += 1
+                    self._failed += future.exception() is not None
+                    self._runs.append(state['finished'] - state['started'])
+            self._slots.release()
+
+        future = self._executor.submit(task)
+        future.add_done_callback(done)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn in the pool and await the result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self):
+        """Queue depth, throughput counters and recent wait/run time percentiles (ms)."""
+        with self._lock:
+            waits = np.array(self._waits) * 1000
+            runs = np.array(self._runs) * 1000
+            stats = {
+                'queue_depth': self._queued,
+                'running': self._running,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+            }
+        for name, values in (('wait', waits), ('run', runs)):
+            stats[f'{name}_p50_ms'] = float(np.percentile(values, 50)) if len(values) else 0.0
+            stats[f'{name}_p95_ms'] = float(np.percentile(values, 95)) if len(values) else 0.0
+            stats[f'{name}_max_ms'] = float(values.max()) if len(values) else 0.0
+        return stats
+
+
+# Global pool shared by every handler in the process
+_engine_pool = None
+_engine_pool_lock = threading.Lock()
+
+
+def get_engine_pool():
+    """Get or create the shared engine pool."""
+    global _engine_pool
+    if _engine_pool is None:
+        with _engine_pool_lock:
+            if _engine_pool is None:
+                _engine_pool = EnginePool()
+    return _engine_pool
@@ -4,9 +4,23 @@ Fixed Gradio chatbot format issues.
 """
 
 import gradio as gr
-from recommendation import get_recommendations, format_recommendations
+from recommendation import get_recommendations_response, precompute_canned_answers, cache_stats, serving_stats
+from worker_pool import BUSY_MESSAGE, GRADIO_QUEUE_KWARGS, QueueFullError, get_engine_pool
+from deadlines import LATENCY_BUDGET_MS
 import json
 
+# Clickable brainstorming prompts; their answers are precomputed at startup
+SUGGESTION_PROMPTS = [
+    "I want to discover games I've never heard of",
+    "I'm curious about games that could teach me something",
+    "I want to explore genres I've never tried",
+    "I'm looking for games that could inspire my creativity",
+    "I want to find games that could surprise me",
+    "I'm interested in games that could help me relax in a unique way",
+]
+
+MOOD_CHOICES = ["Any", "Excited", "Curious", "Creative", "Bored", "Stressed", "Adventurous"]
+
 # Custom CSS for a brainstorming-focused design
 custom_css = """
 .gradio-container {
@@ -308,10 +322,10 @@ I'm your creative gaming companion, here to help you **discover**, **explore**,
 def get_game_recommendations(message, mood):
     """Get game recommendations and format the response."""
     try:
-        recommendations, explanation = get_recommendations(message, mood)
+        recommendations, explanation, formatted_recs, _ = get_recommendations_response(message, mood,
+                                                                                       budget_ms=LATENCY_BUDGET_MS)
         
         if recommendations:
-            formatted_recs = format_recommendations(recommendations)
             response = f"🤖 **GameBot:** {explanation}\n\n{formatted_recs}"
         else:
             response = f"🤖 **GameBot:** {explanation}\n\nI'd love to help you find the perfect game! Could you tell me more about what you're looking for?"
@@ -323,6 +337,9 @@ def get_game_recommendations(message, mood):
 def main():
     """Create and launch the Gradio interface."""
     
+    # Answer the clickable prompts ahead of time so clicks never hit the model
+    precompute_canned_answers(SUGGESTION_PROMPTS, MOOD_CHOICES)
+    
     with gr.Blocks(css=custom_css, title="GameBot - AI Game Recommendations") as demo:
         
         # Header section
@@ -341,7 +358,7 @@ def main():
             with gr.Column():
                 gr.HTML('<div class="input-section">')
                 mood_selector = gr.Dropdown(
-                    choices=["Any", "Excited", "Curious", "Creative", "Bored", "Stressed", "Adventurous"],
+                    choices=MOOD_CHOICES,
                     value="Any",
                     label="🎭 What's your creative mood today?",
                     info="This helps me tailor my brainstorming approach to your energy!"
@@ -371,14 +388,9 @@ def main():
                 # Brainstorming ideas box
                 gr.HTML('<div class="brainstorm-ideas">')
                 gr.HTML('<h4>💡 Try these brainstorming prompts:</h4>')
-                suggestions_html = """
-                <div class='idea-item' onclick='document.querySelector("textarea").value=this.textContent; document.querySelector("textarea").dispatchEvent(new Event("input"));'>I want to discover games I've never heard of</div>
-                <div class='idea-item' onclick='document.querySelector("textarea").value=this.textContent; document.querySelector("textarea").dispatchEvent(new Event("input"));'>I'm curious about games that could teach me something</div>
-                <div class='idea-item' onclick='document.querySelector("textarea").value=this.textContent; document.querySelector("textarea").dispatchEvent(new Event("input"));'>I want to explore genres I've never tried</div>
-                <div class='idea-item' onclick='document.querySelector("textarea").value=this.textContent; document.querySelector("textarea").dispatchEvent(new Event("input"));'>I'm looking for games that could inspire my creativity</div>
-                <div class='idea-item' onclick='document.querySelector("textarea").value=this.textContent; document.querySelector("textarea").dispatchEvent(new Event("input"));'>I want to find games that could surprise me</div>
-                <div class='idea-item' onclick='document.querySelector("textarea").value=this.textContent; document.querySelector("textarea").dispatchEvent(new Event("input"));'>I'm interested in games that could help me relax in a unique way</div>
-                """
+                suggestions_html = ""
+                for suggestion in SUGGESTION_PROMPTS:
+                    suggestions_html += f"<div class='idea-item' onclick='document.querySelector(\"textarea\").value=this.textContent; document.querySelector(\"textarea\").dispatchEvent(new Event(\"input\"));'>{suggestion}</div>"
                 gr.HTML(suggestions_html)
                 gr.HTML('</div>')
             
@@ -412,11 +424,22 @@ def main():
                 </div>
                 """)
         
+        # Engine load (queue depth, wait times, rejections), cache hit rates and serving modes
+        with gr.Accordion("📊 Server load", open=False):
+            load_stats = gr.JSON(label="Engine pool")
+            cache_stats_json = gr.JSON(label="Caches")
+            serving_stats_json = gr.JSON(label="Serving modes")
+            refresh_stats_btn = gr.Button("🔄 Refresh", variant="secondary", elem_classes=["btn-secondary"])
+        
         # Event handlers
-        def process_message(message, mood):
+        async def process_message(message, mood):
             if not message.strip():
                 return create_welcome_message()
-            return get_game_recommendations(message, mood)
+            try:
+                # Engine work runs in the shared bounded pool, not on the event loop
+                return await get_engine_pool().run(get_game_recommendations, message, mood)
+            except QueueFullError:
+                return BUSY_MESSAGE
         
         def clear_conversation():
             return create_welcome_message()
@@ -439,6 +462,15 @@ def main():
             inputs=None, 
             outputs=output_text
         )
+
+        refresh_stats_btn.click(
+            lambda: (get_engine_pool().stats(), cache_stats(), serving_stats()),
+            inputs=None,
+            outputs=[load_stats, cache_stats_json, serving_stats_json]
+        )
+    
+    # Bounded Gradio queue; engine work is rejected fast once the pool is full
+    demo.queue(**GRADIO_QUEUE_KWARGS)
     
     # Launch the interface
     demo.launch(